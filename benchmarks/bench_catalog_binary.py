@@ -0,0 +1,130 @@
+"""バイナリのカタログ（catalog_binary.py）と courses.json の、1件を引くまでの時間とメモリの比較。
+
+src/data/courses.json（--scale 倍に複製したもの）からバイナリを書き出し、
+新しいプロセスで「ファイルを開いてレッスンを1件 ID で引く」までの時間と、そのあいだの最大 RSS の増分を測る
+（モジュールの import は、サーバーでは起動時に1回だけなので計測に含めない）。
+
+    json    json.load で全体を読み込み、入れ子をたどってレッスンを探す（今のルートハンドラと同じ）
+    binary  CatalogReader で mmap して、ID の索引から1件だけ読む
+
+    python benchmarks/bench_catalog_binary.py --scales 1,100 --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+COURSES_JSON = os.path.join(ROOT, "src", "data", "courses.json")
+
+
+def memory_mb(key):
+    """/proc/self/status の VmRSS（今の RSS）/ VmHWM（最大 RSS）を MB で"""
+    with open("/proc/self/status", encoding="ascii") as f:
+        for line in f:
+            if line.startswith(key + ":"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def replicate(courses, scale):
+    """ID に複製番号を付けて courses を scale 倍にする"""
+    if scale == 1:
+        return courses
+    copies = []
+    for n in range(scale):
+        for course in courses:
+            course = dict(course, id=f"{course['id']}~{n}", curriculums=[
+                dict(curr, id=f"{curr['id']}~{n}", lessons=[
+                    dict(lesson, id=f"{lesson['id']}~{n}") for lesson in curr.get("lessons") or ()
+                ]) for curr in course.get("curriculums") or ()
+            ])
+            copies.append(course)
+    return copies
+
+
+def lookup_json(path, lesson_id):
+    with open(path, "r", encoding="utf-8") as f:
+        courses = json.load(f)
+    for course in courses:
+        for curr in course.get("curriculums") or ():
+            for lesson in curr.get("lessons") or ():
+                if lesson["id"] == lesson_id:
+                    return lesson
+    return None
+
+
+def lookup_binary(path, lesson_id):
+    from catalog_binary import CatalogReader  # measure() で import 済み
+
+    with CatalogReader(path) as reader:
+        return reader.get("lessons", lesson_id)
+
+
+def measure(kind, path, lesson_id):
+    """新しいプロセスの中で1回引き、(秒, 最大 RSS の増分 MB) を JSON で出力する"""
+    import catalog_binary  # noqa: F401
+
+    lookup = lookup_json if kind == "json" else lookup_binary
+    before = memory_mb("VmRSS")
+    start = time.perf_counter()
+    lesson = lookup(path, lesson_id)
+    elapsed = time.perf_counter() - start
+    after = memory_mb("VmHWM")
+    if lesson is None:
+        raise SystemExit(f"{lesson_id} not found in {path}")
+    print(json.dumps({"seconds": elapsed, "rss_mb": after - before}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--source", default=COURSES_JSON, help="courses.json")
+    parser.add_argument("--scales", default="1,100", help="courses.json を複製する倍率のリスト")
+    parser.add_argument("--runs", type=int, default=5, help="1条件あたりのプロセス数")
+    parser.add_argument("--measure", nargs=3, metavar=("KIND", "PATH", "ID"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        measure(*args.measure)
+        return 0
+
+    from catalog_binary import tables_from_courses_json, write_catalog
+
+    with open(args.source, "r", encoding="utf-8") as f:
+        courses = json.load(f)
+    print(f"{'scale':>6} {'lessons':>8} {'format':<7} {'size':>10} {'load+get p50':>13} {'peak RSS +':>11}")
+    with tempfile.TemporaryDirectory(prefix="bench_catalog_binary_") as tmp:
+        for scale in (int(value) for value in args.scales.split(",")):
+            data = replicate(courses, scale)
+            json_path = os.path.join(tmp, f"courses-{scale}.json")
+            bin_path = os.path.join(tmp, f"courses-{scale}.bin")
+            with open(json_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=4)
+            tables = tables_from_courses_json(data)
+            start = time.perf_counter()
+            write_catalog(bin_path, tables)
+            build_seconds = time.perf_counter() - start
+            # 走査が一番長くなる最後のレッスンを引く
+            lesson_id = tables["lessons"][-1]["id"]
+            for kind, path in (("json", json_path), ("binary", bin_path)):
+                samples = []
+                for _ in range(args.runs):
+                    command = [sys.executable, os.path.abspath(__file__), "--measure", kind, path, lesson_id]
+                    proc = subprocess.run(command, capture_output=True, text=True, check=True)
+                    samples.append(json.loads(proc.stdout))
+                seconds = statistics.median(sample["seconds"] for sample in samples)
+                rss = statistics.median(sample["rss_mb"] for sample in samples)
+                print(f"{scale:>6} {len(tables['lessons']):>8} {kind:<7} {os.path.getsize(path) / 1e6:>8.2f}MB "
+                      f"{seconds * 1000:>11.2f}ms {rss:>9.2f}MB")
+            print(f"{'':>6} binary written in {build_seconds:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,217 @@
+"""update_data_real.py の TS 生成部分のベンチマーク。
+
+旧実装（行ごとに get_video_duration + escape_js を2回、行ハッシュは json.dumps、
+lessons_str を += で連結、全体を "\n".join してから書き込み）と、
+LessonRecord ベースの現実装を
+合成 CSV（既定: コンテンツ 10万行 / カリキュラム 5千件）で比較する。
+各実装は別プロセスで動かし、処理時間と最大 RSS を出す。
+
+    python benchmarks/bench_curriculum_emit.py
+    python benchmarks/bench_curriculum_emit.py --content 20000 --curriculums 1000
+"""
+import argparse
+import json
+import os
+import re
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import fixtures  # noqa: E402
+
+
+def run_legacy(paths, cache_path, out_path):
+    """レコード化する前の update_data_real.py の生成ループを再現したもの（取得処理は除く）"""
+    import csv
+    import hashlib
+    import update_data_real as udr
+
+    def read_csv(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return list(csv.DictReader(f))
+
+    def fingerprint(*parts):
+        payload = json.dumps(parts, ensure_ascii=False, sort_keys=True)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+    with open(cache_path, encoding="utf-8") as f:
+        duration_cache = {k: v["duration"] for k, v in json.load(f)["entries"].items()}
+
+    def get_video_duration(url):
+        if not url or ("youtube" not in url and "youtu.be" not in url):
+            return "10:00"
+        video_id_match = re.search(r'(?:v=|\/)([\w-]{11})(?:[&?]|$)', url)
+        if not video_id_match:
+            return "10:00"
+        video_id = video_id_match.group(1)
+        if video_id in duration_cache:
+            return duration_cache[video_id]
+        return "10:00"
+
+    escape_js = udr.escape_js
+    contents = read_csv(paths["content"])
+    courses = read_csv(paths["course"])
+    curriculums = read_csv(paths["curriculum"])
+
+    content_by_course = {}
+    for c in contents:
+        course_name = c.get('コース', '').strip() or "未分類"
+        content_by_course.setdefault(course_name, []).append(c)
+
+    content_table, curriculum_table, course_table = (
+        udr.TableBuild(name, None) for name in ("ALL_CONTENT", "ALL_CURRICULUMS", "ALL_COURSES"))
+
+    def render_content(c, url, duration):
+        title = escape_js(c["コンテンツ名"])
+        category = escape_js(c.get("コース", "未分類"))
+        return f"""    {{
+        id: '{c["ID"]}',
+        title: '{title}',
+        type: 'video',
+        url: '{url}',
+        category: '{category}',
+        duration: '{duration}',
+        createdAt: '{c.get("Created", "")}'
+    }},"""
+
+    def render_curriculum(curr, curr_title, children):
+        lessons_str = "[\n"
+        for child in children:
+            child_url = child.get('YOUTUBE_URL', '')
+            child_dur = get_video_duration(child_url)
+            child_title = escape_js(child["コンテンツ名"])
+            child_cat = escape_js(curr_title)
+            lessons_str += f"""            {{
+                id: '{child["ID"]}',
+                title: '{child_title}',
+                type: 'video',
+                url: '{child_url}',
+                category: '{child_cat}',
+                duration: '{child_dur}',
+                createdAt: '{child.get("Created", "")}'
+            }},\n"""
+        lessons_str += "        ]"
+        return f"""    {{
+        id: '{curr["ID"]}',
+        title: '{escape_js(curr_title)}',
+        description: '{escape_js(curr.get("コース概要", ""))}',
+        courseCount: {len(children)},
+        lessons: {lessons_str}
+    }},"""
+
+    ts_output = [udr.TS_HEADER]
+    ts_output.append("export const ALL_CONTENT: ContentItem[] = [")
+    content_hashes = {}
+    for c in contents:
+        url = c.get('YOUTUBE_URL', '')
+        duration = get_video_duration(url)
+        row_hash = fingerprint(c, duration)
+        content_hashes[id(c)] = row_hash
+        ts_output.append(content_table.emit(c["ID"], row_hash, lambda: render_content(c, url, duration)))
+    ts_output.append("];\n")
+
+    ts_output.append("export const ALL_CURRICULUMS: CurriculumDef[] = [")
+    for curr in curriculums:
+        curr_title = curr['コース名']
+        children = content_by_course.get(curr_title, [])
+        row_hash = fingerprint(curr, [content_hashes[id(child)] for child in children])
+        ts_output.append(curriculum_table.emit(
+            curr["ID"], row_hash, lambda: render_curriculum(curr, curr_title, children)))
+    ts_output.append("];\n")
+
+    def render_course(course):
+        return f"""    {{
+        id: '{course["ID"]}',
+        title: '{escape_js(course["プログラム名"])}',
+        description: '{escape_js(course.get("カリキュラム説明", ""))}',
+        category: 'General',
+        lessonCount: 5
+    }},"""
+
+    ts_output.append("export const ALL_COURSES: CourseDef[] = [")
+    for course in courses:
+        ts_output.append(course_table.emit(course["ID"], fingerprint(course), lambda: render_course(course)))
+    ts_output.append("];\n")
+
+    new_text = "\n".join(ts_output)
+    old_text = None
+    if os.path.exists(out_path):
+        with open(out_path, 'r', encoding='utf-8') as f:
+            old_text = f.read()
+    if new_text != old_text:
+        with open(out_path, "w", encoding="utf-8") as f:
+            f.write(new_text)
+
+
+def run_current(paths, cache_path, out_path):
+    import update_data_real as udr
+    from duration_store import DurationStore
+
+    store = DurationStore(cache_path)
+    # CSV の解析も計測に含めるため、解析キャッシュは使わない
+    records, index_by_course, curriculums, courses = udr.load_inputs(
+        paths["content"], paths["curriculum"], paths["course"], cache_dir=None)
+
+    udr.resolve_durations(records, store)
+    tables = tuple(udr.TableBuild(name, None) for name in ("ALL_CONTENT", "ALL_CURRICULUMS", "ALL_COURSES"))
+    udr.write_if_changed(out_path, udr.generate_ts(records, index_by_course, curriculums, courses, tables))
+
+
+VARIANTS = {"legacy": run_legacy, "current": run_current}
+
+
+def run_variant(name, workdir):
+    with open(os.path.join(workdir, "paths.json"), encoding="utf-8") as f:
+        paths = json.load(f)
+    out_path = os.path.join(workdir, f"{name}.ts")
+    start = time.perf_counter()
+    VARIANTS[name](paths, os.path.join(workdir, "duration_cache.json"), out_path)
+    elapsed = time.perf_counter() - start
+    print(json.dumps({
+        "variant": name,
+        "seconds": elapsed,
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "output_bytes": os.path.getsize(out_path),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--content", type=int, default=100_000)
+    parser.add_argument("--curriculums", type=int, default=5_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--variant", choices=sorted(VARIANTS), help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.variant:
+        run_variant(args.variant, args.workdir)
+        return
+
+    with tempfile.TemporaryDirectory() as workdir:
+        paths = fixtures.write_catalog(workdir, args.content, args.curriculums, seed=args.seed)
+        fixtures.write_duration_cache(os.path.join(workdir, "duration_cache.json"), args.content, seed=args.seed)
+        with open(os.path.join(workdir, "paths.json"), "w", encoding="utf-8") as f:
+            json.dump(paths, f)
+
+        results = {}
+        for name in ("legacy", "current"):
+            out = subprocess.run(
+                [sys.executable, __file__, "--variant", name, "--workdir", workdir],
+                check=True, capture_output=True, text=True, cwd=ROOT,
+            ).stdout
+            results[name] = json.loads(out.strip().splitlines()[-1])
+
+        print(f"content={args.content} curriculums={args.curriculums}")
+        for name, r in results.items():
+            print(f"  {name:8s} {r['seconds']:7.2f}s  max RSS {r['max_rss_mb']:7.1f} MB  output {r['output_bytes'] / 2**20:.1f} MB")
+        print(f"  speedup  {results['legacy']['seconds'] / results['current']['seconds']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
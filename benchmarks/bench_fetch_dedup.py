@@ -0,0 +1,123 @@
+"""再生時間の取得で、同じ動画へのリクエストがまとまっているかを確かめる。
+
+同じ動画を複数のレッスンが、別々の書き方の URL（watch?v= / youtu.be / shorts / embed、
+&t= や ?si= 付き）で参照する合成 CSV を作り、ローカルのスタブサーバー
+（scripts/stub_youtube_server.py）に対して update_data_real.py の取得段階を実行する。
+スタブの /__stats で数えた実際のリクエスト数を、レッスン数・URL の種類数・動画 ID 数と比べる。
+
+続けて、重複を含んだままの ID の列を fetch_durations に渡し、
+SingleFlight が同時に走る同じ ID の取得を1回にまとめることも確かめる。
+
+リクエスト数が動画 ID 数と一致しなければ終了コード 1 で終わる。
+
+    python benchmarks/bench_fetch_dedup.py --lessons 3000 --videos 800
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "scripts"))
+
+import fixtures  # noqa: E402
+
+URL_FORMS = (
+    "https://www.youtube.com/watch?v={id}",
+    "https://youtu.be/{id}",
+    "https://www.youtube.com/watch?v={id}&t=42s",
+    "https://youtu.be/{id}?si=share{n}",
+    "https://m.youtube.com/watch?feature=share&v={id}",
+    "https://www.youtube.com/shorts/{id}",
+    "https://www.youtube.com/embed/{id}?start=10",
+    "https://youtu.be/{id}#t={n}",
+)
+
+
+def write_catalog(directory, n_lessons, n_videos, seed=0):
+    """レッスンが動画を重複して参照する CSV を書き、(paths, レッスンごとの動画 ID) を返す"""
+    rng = random.Random(seed)
+    paths = fixtures.write_catalog(directory, 0, 10)
+    video_ids = []
+    with open(paths["content"], "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(fixtures.CONTENT_HEADER)
+        for i in range(n_lessons):
+            # 先頭の動画ほど多くのレッスンから参照される
+            n = min(int(rng.paretovariate(0.8)) - 1, n_videos - 1) if i >= n_videos else i
+            vid = fixtures.video_id(n)
+            video_ids.append(vid)
+            url = rng.choice(URL_FORMS).format(id=vid, n=rng.randrange(100))
+            writer.writerow([str(100000 + i), f"レッスン {i}", url, fixtures.curriculum_title(i % 10),
+                             "2024-10-01T00:00:00.000Z"])
+    return paths, video_ids
+
+
+def stub_stats(base_url):
+    with urllib.request.urlopen(f"{base_url}/__stats") as response:
+        return json.load(response)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lessons", type=int, default=3000, help="コンテンツ一覧の行数")
+    parser.add_argument("--videos", type=int, default=800, help="動画の種類数")
+    parser.add_argument("--concurrency", type=int, default=16, help="同時接続数")
+    args = parser.parse_args()
+    if not 0 < args.videos <= args.lessons:
+        parser.error("--videos must be between 1 and --lessons")
+
+    import update_data_real as udr
+    from duration_fetcher import SingleFlight, fetch_durations
+    from duration_sources import ScraperSource
+    from duration_store import DurationStore
+    from stub_youtube_server import serve
+
+    fetch_options = dict(rate=10_000, burst=args.concurrency, concurrency=args.concurrency, max_retries=0)
+    failed = False
+    with tempfile.TemporaryDirectory(prefix="bench_fetch_dedup_") as tmp:
+        paths, lesson_ids = write_catalog(os.path.join(tmp, "csv"), args.lessons, args.videos)
+        records, _, _, _ = udr.load_inputs(paths["content"], paths["curriculum"], paths["course"], cache_dir=None)
+        urls = {record.url for record in records}
+        unique = {record.video_id for record in records}
+        print(f"{len(records)} lessons, {len(urls)} distinct URLs, {len(unique)} video IDs")
+
+        # 1. update_data_real の取得段階
+        server, _ = serve()
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+        store = DurationStore(os.path.join(tmp, "duration_cache.json"))
+        start = time.perf_counter()
+        udr.fetch_missing_durations(records, store, [ScraperSource(base_url=base_url, **fetch_options)])
+        elapsed = time.perf_counter() - start
+        store.close()
+        stats = stub_stats(base_url)
+        server.shutdown()
+        print(f"fetch stage: {stats['requests']} requests for {len(records)} lessons "
+              f"({len(records) - stats['requests']} saved) in {elapsed:.2f}s")
+        failed |= stats["requests"] != len(unique)
+
+        # 2. 重複を含んだ ID の列をそのまま渡す（同時に走る同じ ID の取得がまとまる）
+        server, _ = serve()
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+        flight = SingleFlight()
+        results = fetch_durations(lesson_ids, base_url=base_url, flight=flight, **fetch_options)
+        stats = stub_stats(base_url)
+        server.shutdown()
+        print(f"singleflight: {flight.calls} calls, {flight.coalesced} coalesced, "
+              f"{stats['requests']} requests, {len(results)} results")
+        failed |= stats["requests"] != len(set(lesson_ids)) or len(results) != len(set(lesson_ids))
+
+    if failed:
+        print("FAILED: requests were not deduplicated to one per video ID")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
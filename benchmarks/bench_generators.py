@@ -0,0 +1,375 @@
+"""データ生成スクリプトのスケール計測（ベンチマークハーネス）。
+
+update_data_real.py / convert_csv_to_ts.py / シード生成（seed_synthetic.py + generate_seed.SeedWriter）を
+合成データ（既定: 1k / 100k / 1M 行）で動かし、実行時間・最大 RSS・段階ごとの時間を出す。
+
+段階:
+    parse       CSV の解析（convert_csv_to_ts は計測用に別途1回読む）
+    durations   再生時間の解決（duration_cache.json の読み込みを含む、取得はしない）
+    serialize   TS / SQL の組み立て（ストリーミングで解析・生成が混ざる分もここに入る）
+    write       ファイルへの書き込み（write() の中にいた時間）
+
+各実行は別プロセスで行うので、最大 RSS は生成スクリプト1回分の値になる。
+
+    python benchmarks/bench_generators.py --scales 1k,100k
+    python benchmarks/bench_generators.py --scales 1k --profile /tmp/prof --tracemalloc
+    python benchmarks/bench_generators.py --save-baseline /tmp/baseline.json
+    python benchmarks/bench_generators.py --baseline /tmp/baseline.json   # 遅くなっていたら exit 1
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from collections import deque
+from contextlib import contextmanager
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import fixtures  # noqa: E402
+
+DEFAULT_SCALES = "1k,100k,1M"
+STAGE_ORDER = ("parse", "durations", "serialize", "write")
+UNITS = {"k": 1_000, "m": 1_000_000}
+# 差がこれ未満の秒数なら、比率が大きくても回帰とみなさない（小さい計測値の揺れを無視する）
+MIN_REGRESSION_SECONDS = 0.05
+
+
+def parse_scale(text):
+    text = text.strip().lower().replace("_", "")
+    if text[-1:] in UNITS:
+        return int(float(text[:-1]) * UNITS[text[-1]])
+    return int(text)
+
+
+def scale_label(rows):
+    if rows >= 1_000_000 and rows % 1_000_000 == 0:
+        return f"{rows // 1_000_000}M"
+    if rows >= 1_000 and rows % 1_000 == 0:
+        return f"{rows // 1_000}k"
+    return str(rows)
+
+
+def peak_rss_mb():
+    """このプロセスの最大 RSS（MB）。
+
+    ru_maxrss は exec 前の（fork 元の）RSS も引き継ぐので、親が大きなフィクスチャを作った直後だと
+    その値が出てしまう。Linux ではアドレス空間ごとの VmHWM を使う。
+    """
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class StageTimer:
+    def __init__(self):
+        self.stages = {}
+
+    def add(self, name, seconds):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def timed_iter(self, iterable, name):
+        """iterable の next() にかかった時間だけを name に積む"""
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.add(name, time.perf_counter() - start)
+                return
+            self.add(name, time.perf_counter() - start)
+            yield item
+
+
+class TimedWriter:
+    """write() の中にいた時間を timer の "write" に積むファイルラッパー"""
+
+    def __init__(self, f, timer):
+        self.f = f
+        self.timer = timer
+
+    def write(self, data):
+        start = time.perf_counter()
+        result = self.f.write(data)
+        self.timer.add("write", time.perf_counter() - start)
+        return result
+
+
+# ------------------------------------------------------------------
+# 各生成スクリプトの実行（子プロセス側）
+# ------------------------------------------------------------------
+
+def run_update_data_real(fixture, out_dir, timer):
+    import update_data_real as udr
+    from duration_store import DurationStore
+
+    with timer.stage("parse"):
+        records, index_by_course, curriculums, courses = udr.load_inputs(
+            fixture["content"], fixture["curriculum"], fixture["course"], cache_dir=None)
+    with timer.stage("durations"):
+        udr.resolve_durations(records, DurationStore(fixture["duration_cache"]))
+    tables = tuple(udr.TableBuild(name, None) for name in ("ALL_CONTENT", "ALL_CURRICULUMS", "ALL_COURSES"))
+    out_path = os.path.join(out_dir, "mock_elearning_data.ts")
+    start = time.perf_counter()
+    chunks = timer.timed_iter(udr.generate_ts(records, index_by_course, curriculums, courses, tables), "serialize")
+    udr.write_if_changed(out_path, chunks)
+    # write_if_changed の中で TS の組み立て以外にかかった時間（ハッシュと書き込み）
+    timer.add("write", time.perf_counter() - start - timer.stages["serialize"])
+    return out_path
+
+
+def run_convert_csv_to_ts(fixture, out_dir, timer):
+    import convert_csv_to_ts as cts
+    from update_data_real import make_paths
+
+    paths = make_paths(content_csv=fixture["content"], curriculum_csv=fixture["curriculum"],
+                       course_csv=fixture["course"])
+    with timer.stage("parse"):
+        for rows in (cts.iter_content(paths.content_csv), cts.iter_curriculums(paths.curriculum_csv),
+                     cts.iter_courses(paths.course_csv)):
+            deque(rows, maxlen=0)
+    out_path = os.path.join(out_dir, "mock_elearning_data.ts")
+    start = time.perf_counter()
+    with open(out_path, "w", encoding="utf-8") as f:
+        cts.write_ts(TimedWriter(f, timer), "nested", paths=paths)
+    timer.add("serialize", time.perf_counter() - start - timer.stages.get("write", 0.0))
+    return out_path
+
+
+def run_seed(fixture, out_dir, timer):
+    from generate_seed import SeedWriter
+    from seed_synthetic import SYNTHETIC_TABLES, SyntheticSource
+
+    rows = fixture["rows"]
+    params = {
+        "seed": 0, "premium_ratio": 0.2, "job_skew": 0.9,
+        "organizations": max(1, rows // 10), "jobs": rows,
+        "courses": 0, "curriculums": 0, "lessons": 0, "users": 0,
+    }
+    sources = [(table, SyntheticSource(name, params)) for name, table, _ in SYNTHETIC_TABLES if params[name]]
+    # 段階ごとの時間を分けて測るため、整形はこのプロセスで行う
+    writer = SeedWriter("copy", workers=1, scheme="uuid5")
+    out_path = os.path.join(out_dir, "seed.sql")
+    start = time.perf_counter()
+    try:
+        with open(out_path, "wb") as f:
+            writer.write_script(TimedWriter(f, timer), sources)
+    finally:
+        writer.close()
+    timer.add("serialize", time.perf_counter() - start - timer.stages.get("write", 0.0))
+    return out_path
+
+
+GENERATORS = {
+    "update_data_real": run_update_data_real,
+    "convert_csv_to_ts": run_convert_csv_to_ts,
+    "seed": run_seed,
+}
+
+
+def run_child(name, fixture_path, out_dir, profile_dir, use_tracemalloc):
+    with open(fixture_path, encoding="utf-8") as f:
+        fixture = json.load(f)
+    os.makedirs(out_dir, exist_ok=True)
+    tag = f"{name}-{scale_label(fixture['rows'])}"
+    timer = StageTimer()
+    profiler = None
+    if profile_dir:
+        import cProfile
+        profiler = cProfile.Profile()
+    if use_tracemalloc:
+        import tracemalloc
+        tracemalloc.start(10)
+
+    start = time.perf_counter()
+    if profiler:
+        profiler.enable()
+    out_path = GENERATORS[name](fixture, out_dir, timer)
+    if profiler:
+        profiler.disable()
+    wall = time.perf_counter() - start
+
+    result = {
+        "generator": name,
+        "rows": fixture["rows"],
+        "seconds": wall,
+        "stages": {name: timer.stages[name] for name in STAGE_ORDER if name in timer.stages},
+        "max_rss_mb": peak_rss_mb(),
+        "output_bytes": os.path.getsize(out_path),
+    }
+    if use_tracemalloc:
+        import tracemalloc
+        result["traced_peak_mb"] = tracemalloc.get_traced_memory()[1] / 2**20
+        if profile_dir:
+            os.makedirs(profile_dir, exist_ok=True)
+            stats = tracemalloc.take_snapshot().statistics("lineno")
+            path = os.path.join(profile_dir, f"{tag}.tracemalloc.txt")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("\n".join(str(stat) for stat in stats[:30]) + "\n")
+            result["tracemalloc_path"] = path
+        tracemalloc.stop()
+    if profiler:
+        os.makedirs(profile_dir, exist_ok=True)
+        path = os.path.join(profile_dir, f"{tag}.prof")
+        profiler.dump_stats(path)
+        result["profile_path"] = path
+    print(json.dumps(result))
+
+
+# ------------------------------------------------------------------
+# フィクスチャ・ベースライン（親プロセス側）
+# ------------------------------------------------------------------
+
+def prepare_fixture(fixtures_dir, rows, seed):
+    """行数ごとのフィクスチャを作り、その説明（JSON）のパスを返す。作成済みなら使い回す"""
+    directory = os.path.join(fixtures_dir, scale_label(rows))
+    fixture_path = os.path.join(directory, "fixture.json")
+    if os.path.exists(fixture_path):
+        return fixture_path
+    start = time.perf_counter()
+    paths = fixtures.write_catalog(directory, rows, max(1, rows // 20), seed=seed)
+    paths["duration_cache"] = os.path.join(directory, "duration_cache.json")
+    fixtures.write_duration_cache(paths["duration_cache"], rows, seed=seed)
+    paths["rows"] = rows
+    with open(fixture_path, "w", encoding="utf-8") as f:
+        json.dump(paths, f)
+    print(f"  fixtures for {scale_label(rows)} rows written in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+    return fixture_path
+
+
+def result_key(result):
+    return f"{result['generator']}@{scale_label(result['rows'])}"
+
+
+def compare(results, baseline, tolerance, rss_tolerance):
+    """ベースラインより遅い・重いものを [(キー, 説明)] で返す"""
+    regressions = []
+    for result in results:
+        key = result_key(result)
+        base = baseline.get("results", {}).get(key)
+        if base is None:
+            continue
+        slower = result["seconds"] - base["seconds"]
+        if slower > MIN_REGRESSION_SECONDS and result["seconds"] > base["seconds"] * (1 + tolerance):
+            regressions.append((key, f"time {base['seconds']:.2f}s -> {result['seconds']:.2f}s "
+                                     f"(+{result['seconds'] / base['seconds'] * 100 - 100:.0f}%)"))
+        if result["max_rss_mb"] > base["max_rss_mb"] * (1 + rss_tolerance):
+            regressions.append((key, f"peak RSS {base['max_rss_mb']:.0f} MB -> {result['max_rss_mb']:.0f} MB"))
+    return regressions
+
+
+def print_result(result, baseline):
+    stages = "  ".join(f"{name} {seconds:6.2f}s" for name, seconds in result["stages"].items())
+    line = (f"  {result['generator']:18s} {scale_label(result['rows']):>5s}  {result['seconds']:7.2f}s  "
+            f"max RSS {result['max_rss_mb']:7.1f} MB  [{stages}]")
+    if "traced_peak_mb" in result:
+        line += f"  traced peak {result['traced_peak_mb']:.1f} MB"
+    base = (baseline or {}).get("results", {}).get(result_key(result))
+    if base:
+        line += f"  (baseline {base['seconds']:.2f}s / {base['max_rss_mb']:.0f} MB)"
+    print(line)
+    for key in ("profile_path", "tracemalloc_path"):
+        if key in result:
+            print(f"      {key.split('_')[0]}: {result[key]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", default=DEFAULT_SCALES, help="行数のリスト（例: 1k,100k,1M）")
+    parser.add_argument("--generators", default=",".join(GENERATORS), help="計測する生成スクリプト（カンマ区切り）")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--fixtures-dir", help="フィクスチャの置き場所（指定すると次回も使い回す）")
+    parser.add_argument("--profile", metavar="DIR", help="cProfile の結果（.prof）を DIR に保存する")
+    parser.add_argument("--tracemalloc", action="store_true",
+                        help="tracemalloc で Python 側の確保量のピークを測る（--profile があれば上位の行も保存）")
+    parser.add_argument("--baseline", help="比較するベースライン（JSON）。回帰があれば exit 1")
+    parser.add_argument("--save-baseline", metavar="PATH", help="今回の結果をベースラインとして保存する")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="許容する実行時間の増加率")
+    parser.add_argument("--rss-tolerance", type=float, default=0.25, help="許容する最大 RSS の増加率")
+    parser.add_argument("--run", choices=sorted(GENERATORS), help=argparse.SUPPRESS)
+    parser.add_argument("--fixture", help=argparse.SUPPRESS)
+    parser.add_argument("--out-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run_child(args.run, args.fixture, args.out_dir, args.profile, args.tracemalloc)
+        return 0
+
+    scales = [parse_scale(text) for text in args.scales.split(",") if text.strip()]
+    names = [name.strip() for name in args.generators.split(",") if name.strip()]
+    unknown = [name for name in names if name not in GENERATORS]
+    if unknown:
+        parser.error(f"unknown generator(s): {', '.join(unknown)}")
+    baseline = None
+    instrumented = bool(args.profile or args.tracemalloc)
+    if instrumented and (args.baseline or args.save_baseline):
+        # cProfile / tracemalloc を有効にすると何倍も遅くなるので、ベースラインとは比べない
+        parser.error("--baseline / --save-baseline cannot be combined with --profile or --tracemalloc")
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        fixtures_dir = args.fixtures_dir or os.path.join(workdir, "fixtures")
+        results = []
+        print(f"python {platform.python_version()} on {platform.machine()}, {os.cpu_count()} CPUs")
+        for rows in scales:
+            fixture_path = prepare_fixture(fixtures_dir, rows, args.seed)
+            for name in names:
+                command = [sys.executable, os.path.abspath(__file__), "--run", name, "--fixture", fixture_path,
+                           "--out-dir", os.path.join(workdir, "out", f"{name}-{rows}")]
+                if args.profile:
+                    command += ["--profile", os.path.abspath(args.profile)]
+                if args.tracemalloc:
+                    command.append("--tracemalloc")
+                proc = subprocess.run(command, capture_output=True, text=True, cwd=workdir)
+                if proc.returncode != 0:
+                    print(f"  {name} failed at {scale_label(rows)} rows:\n{proc.stderr}", file=sys.stderr)
+                    return 2
+                result = json.loads(proc.stdout.strip().splitlines()[-1])
+                results.append(result)
+                print_result(result, baseline)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "cpus": os.cpu_count(),
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "results": {result_key(result): result for result in results},
+            }, f, ensure_ascii=False, indent=1)
+        print(f"Saved baseline to {args.save_baseline}")
+
+    if baseline:
+        regressions = compare(results, baseline, args.tolerance, args.rss_tolerance)
+        if regressions:
+            print(f"REGRESSION: {len(regressions)} measurement(s) exceeded the baseline", file=sys.stderr)
+            for key, detail in regressions:
+                print(f"  {key}: {detail}", file=sys.stderr)
+            return 1
+        print("No regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+"""scripts/create_invoice_pdf.py のバッチ生成のスループット計測。
+
+合成の取引 CSV（既定 1万件）から請求書 PDF を生成し、
+1回目（全件生成）と2回目（内容ハッシュが一致して全件スキップ）の
+処理時間と invoices/s を出す。全件を1つの PDF にまとめる --single-pdf 相当
+（固定部分を Form XObject で共有）の処理時間と合計サイズも並べる。--legacy を付けると、
+旧実装と同じく1件ごとにフォントを登録し直す逐次ループも測る。
+
+    python benchmarks/bench_invoice_batch.py --invoices 10000 --workers 8
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "scripts"))
+
+import fixtures  # noqa: E402
+
+
+def run_legacy(transactions, out_dir):
+    """旧実装の生成ループ（1件ごとに UnicodeCIDFont を登録し、逐次生成）"""
+    import create_invoice_pdf as invoice
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.cidfonts import UnicodeCIDFont
+
+    start = time.perf_counter()
+    for date_str, amount_str in transactions:
+        pdfmetrics.registerFont(UnicodeCIDFont("HeiseiKakuGo-W5"))
+        path = os.path.join(out_dir, invoice.invoice_filename(date_str, amount_str))
+        invoice.create_pdf_invoice(date_str, amount_str, path, verbose=False)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--invoices", type=int, default=10_000)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--legacy", action="store_true", help="旧実装の逐次ループも測る")
+    args = parser.parse_args()
+
+    import create_invoice_pdf as invoice
+
+    with tempfile.TemporaryDirectory() as workdir:
+        csv_path = fixtures.write_transactions(os.path.join(workdir, "transactions.csv"), args.invoices)
+        transactions = invoice.read_transactions(csv_path)
+        out_dir = os.path.join(workdir, "out")
+
+        print(f"invoices={len(transactions)} workers={args.workers or os.cpu_count()}")
+        for label in ("cold", "warm"):
+            stats = invoice.render_batch(transactions, out_dir, args.workers)
+            # warm は全件スキップなので、判定込みで1秒あたり何件さばけたかを出す
+            handled = stats['rendered'] + stats['skipped']
+            print(f"  {label:6s} rendered {stats['rendered']:6d}  skipped {stats['skipped']:6d}  "
+                  f"{stats['seconds']:7.2f}s  {handled / stats['seconds']:8.1f} invoices/s")
+
+        per_file_bytes = sum(entry.stat().st_size for entry in os.scandir(out_dir) if entry.name.endswith(".pdf"))
+        single_path = os.path.join(workdir, "single", "invoices.pdf")
+        stats = invoice.render_single_pdf(transactions, single_path)
+        print(f"  single rendered {stats['rendered']:6d}  {stats['seconds']:7.2f}s  "
+              f"{stats['per_second']:8.1f} invoices/s")
+        print(f"  size   per-file total {per_file_bytes / 2**20:.1f} MB, single PDF "
+              f"{os.path.getsize(single_path) / 2**20:.1f} MB")
+
+        if args.legacy:
+            legacy_dir = os.path.join(workdir, "legacy")
+            os.makedirs(legacy_dir)
+            seconds = run_legacy(transactions, legacy_dir)
+            print(f"  legacy rendered {len(transactions):6d}  {seconds:7.2f}s  "
+                  f"{len(transactions) / seconds:8.1f} invoices/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""請求書1件あたりの生成コスト（PDF + DOCX）の比較。
+
+旧実装: 形式ごとに日付を strptime / relativedelta で解析し直し、
+        DOCX は python-docx で毎回 Document を組み立てて保存する
+現実装: invoice_model.render_invoices（解析1回・レイアウト計算1回、
+        DOCX はテンプレートへの差し込み）
+
+    python benchmarks/bench_invoice_model.py --invoices 2000
+"""
+import argparse
+import datetime
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "scripts"))
+
+import fixtures  # noqa: E402
+
+
+def run_legacy(transactions, out_dir):
+    import invoice_model
+    from dateutil.relativedelta import relativedelta
+
+    def parse(date_str, amount_str):
+        # 旧実装は create_invoice.py と create_invoice_pdf.py のそれぞれで毎回解析していた
+        transfer_date = datetime.datetime.strptime(date_str, "%Y/%m/%d")
+        invoice_date = (transfer_date - relativedelta(months=1)).strftime("%Y年%m月%d日")
+        stem = f"請求書_{transfer_date.strftime('%Y%m%d')}_{amount_str.replace(',', '')}"
+        return invoice_model.Invoice(date_str, amount_str, invoice_date, stem)
+
+    pdf = invoice_model.PdfBackend()
+    for date_str, amount_str in transactions:
+        invoice = parse(date_str, amount_str)
+        invoice_model.build_docx(invoice).save(os.path.join(out_dir, f"{invoice.stem}.docx"))
+        invoice = parse(date_str, amount_str)
+        pdf.render(invoice, os.path.join(out_dir, f"{invoice.stem}.pdf"))
+
+
+def run_current(transactions, out_dir):
+    import invoice_model
+
+    invoice_model.render_invoices(transactions, out_dir, ("pdf", "docx"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--invoices", type=int, default=2_000)
+    args = parser.parse_args()
+
+    import create_invoice_pdf
+
+    with tempfile.TemporaryDirectory() as workdir:
+        csv_path = fixtures.write_transactions(os.path.join(workdir, "transactions.csv"), args.invoices)
+        transactions = create_invoice_pdf.read_transactions(csv_path)
+
+        print(f"invoices={len(transactions)} (PDF + DOCX each)")
+        results = {}
+        for name, run in (("legacy", run_legacy), ("current", run_current)):
+            out_dir = os.path.join(workdir, name)
+            os.makedirs(out_dir)
+            start = time.perf_counter()
+            run(transactions, out_dir)
+            results[name] = time.perf_counter() - start
+            per_invoice_ms = results[name] / len(transactions) * 1000
+            print(f"  {name:8s} {results[name]:7.2f}s  {per_invoice_ms:6.2f} ms/invoice")
+        print(f"  speedup  {results['legacy'] / results['current']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""mock_elearning_data.ts の nested / normalized レイアウトの比較。
+
+合成 CSV から update_data_real.py の生成処理で両レイアウトを出力し、
+ファイルサイズ（生 / gzip）と、Node.js がモジュールを読み込む時間
+（パース + 評価、および全カリキュラムの lessons 解決）を測る。
+node がなければサイズだけ出す。
+
+    python benchmarks/bench_output_layout.py --content 5000 --curriculums 300
+"""
+import argparse
+import gzip
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import fixtures  # noqa: E402
+
+# TS → JS の最小変換（生成コードで使っている型注釈だけを落とす）
+TS_STRIP_RULES = [
+    (re.compile(r"export interface \w+(?: extends [^{]+)? \{[^}]*\}\n", re.S), ""),
+    (re.compile(r"export (const|function) "), r"\1 "),
+    (re.compile(r"const (\w+): [\w\[\]<>, ]+ ="), r"const \1 ="),
+    (re.compile(r"new Map<[^>]+>\(\)"), "new Map()"),
+    (re.compile(r"\((\w+): [\w\[\]]+\): [\w\[\]]+ \{"), r"(\1) {"),
+]
+
+NODE_SCRIPT = r"""
+const fs = require('fs');
+const vm = require('vm');
+const [file, runs] = [process.argv[1], Number(process.argv[2])];
+const code = fs.readFileSync(file, 'utf8') + '\n;({ALL_CONTENT, ALL_CURRICULUMS});';
+const load = [], resolve = [];
+for (let i = 0; i < runs; i++) {
+    let t = process.hrtime.bigint();
+    const mod = new vm.Script(code).runInNewContext({});
+    load.push(Number(process.hrtime.bigint() - t) / 1e6);
+    t = process.hrtime.bigint();
+    let n = 0;
+    for (const c of mod.ALL_CURRICULUMS) n += c.lessons.length;
+    resolve.push(Number(process.hrtime.bigint() - t) / 1e6);
+}
+const median = xs => xs.sort((a, b) => a - b)[Math.floor(xs.length / 2)];
+console.log(JSON.stringify({load_ms: median(load), resolve_ms: median(resolve)}));
+"""
+
+
+def ts_to_js(text):
+    for pattern, repl in TS_STRIP_RULES:
+        text = pattern.sub(repl, text)
+    return text
+
+
+def generate(layout, paths, cache_path, out_path):
+    import update_data_real as udr
+    from duration_store import DurationStore
+
+    records, index_by_course, curriculums, courses = udr.load_inputs(
+        paths["content"], paths["curriculum"], paths["course"], cache_dir=None)
+    udr.resolve_durations(records, DurationStore(cache_path))
+    tables = tuple(udr.TableBuild(name, None) for name in ("ALL_CONTENT", "ALL_CURRICULUMS", "ALL_COURSES"))
+    udr.write_if_changed(out_path, udr.generate_ts(
+        records, index_by_course, curriculums, courses, tables, layout))
+
+
+def node_timings(js_path, runs):
+    out = subprocess.run(["node", "-e", NODE_SCRIPT, js_path, str(runs)],
+                         check=True, capture_output=True, text=True).stdout
+    return json.loads(out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--content", type=int, default=5_000)
+    parser.add_argument("--curriculums", type=int, default=300)
+    parser.add_argument("--runs", type=int, default=15)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    has_node = shutil.which("node") is not None
+    with tempfile.TemporaryDirectory() as workdir:
+        paths = fixtures.write_catalog(workdir, args.content, args.curriculums, seed=args.seed)
+        cache_path = os.path.join(workdir, "duration_cache.json")
+        fixtures.write_duration_cache(cache_path, args.content, seed=args.seed)
+
+        print(f"content={args.content} curriculums={args.curriculums}")
+        results = {}
+        for layout in ("nested", "normalized"):
+            ts_path = os.path.join(workdir, f"{layout}.ts")
+            generate(layout, paths, cache_path, ts_path)
+            with open(ts_path, "rb") as f:
+                data = f.read()
+            result = {"bytes": len(data), "gzip_bytes": len(gzip.compress(data, 6))}
+            if has_node:
+                js_path = os.path.join(workdir, f"{layout}.js")
+                with open(js_path, "w", encoding="utf-8") as f:
+                    f.write(ts_to_js(data.decode("utf-8")))
+                result.update(node_timings(js_path, args.runs))
+            results[layout] = result
+
+            line = f"  {layout:10s} {result['bytes'] / 1024:9.1f} KB  gzip {result['gzip_bytes'] / 1024:8.1f} KB"
+            if has_node:
+                line += f"  load {result['load_ms']:8.2f} ms  resolve lessons {result['resolve_ms']:7.2f} ms"
+            print(line)
+
+        nested, normalized = results["nested"], results["normalized"]
+        print(f"  size ratio {normalized['bytes'] / nested['bytes']:.2f}"
+              + (f", load ratio {normalized['load_ms'] / nested['load_ms']:.2f}" if has_node else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""検索インデックス（search_index.py）の構築時間と検索レイテンシのベンチマーク。
+
+合成したレッスンのタイトル・コース名・カリキュラムの説明からインデックスを作り、
+構築時間、TS に書き出したときのサイズ（gzip 後も）、クエリごとの検索時間を、
+今のフロントエンドと同じ ALL_CONTENT の線形走査（部分文字列一致）と比べる。
+
+n-gram の AND は部分文字列一致より広く拾うことがあるが、取りこぼしはないはずなので、
+線形走査でヒットしたレッスンがインデックスの結果に含まれない場合は終了コード 1 で終わる。
+
+    python benchmarks/bench_search_index.py --items 100000
+"""
+import argparse
+import gzip
+import os
+import random
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import fixtures  # noqa: E402
+
+WORDS = [
+    "入門", "基礎", "応用", "実践", "演習", "ChatGPT", "プロンプト", "生成AI", "画像生成", "議事録",
+    "Excel", "スプレッドシート", "関数", "マクロ", "Python", "データ分析", "可視化", "Instagram", "リール",
+    "TikTok", "撮影", "編集", "カット割り", "字幕", "サムネイル", "ネットワーク", "ストラテジ", "過去問",
+    "面接対策", "自己分析", "ポートフォリオ", "Webサイト", "ノーコード", "ＡＰＩ", "自動化", "業務効率化",
+]
+QUERIES = [
+    "AI", "生成", "プロンプト", "chatgpt", "ＡＩ活用", "データ分析", "動画 編集", "過去問 ストラテジ",
+    "サムネ", "基礎から", "講座", "第3回", "ライブ", "効", "アプリ開発 入門", "存在しない語句",
+]
+
+
+def make_catalog(n_items, n_curriculums, seed=0):
+    """(タイトル, コース名) のリストと (コース名, 説明) のリストを作る"""
+    rng = random.Random(seed)
+    curriculums = [fixtures.curriculum_title(n) for n in range(n_curriculums)]
+    contents = []
+    for i in range(n_items):
+        course = curriculums[min(int(rng.paretovariate(1.2)) - 1, n_curriculums - 1)]
+        words = " ".join(rng.sample(WORDS, rng.randint(1, 3)))
+        contents.append((f"{words} 第{i % 40 + 1}回 'ライブ' アーカイブ", course))
+    descriptions = [(course, f"{course}の概要です。{rng.choice(WORDS)}を基礎から学びます") for course in curriculums]
+    return contents, descriptions
+
+
+def linear_search(contents, descriptions, query):
+    """フロントエンドの今のやり方（全レッスンのタイトル・コース名・説明を部分文字列で照合）"""
+    from search_index import normalize
+
+    terms = normalize(query).split()
+    texts = {course: normalize(f"{course} {text}") for course, text in descriptions}
+    hits = []
+    for doc, (title, course) in enumerate(contents):
+        title = normalize(title)
+        group = texts.get(course) or normalize(course)
+        if all(term in title or term in group for term in terms):
+            hits.append(doc)
+    return hits
+
+
+def percentile(samples, p):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p))]
+
+
+def time_queries(search, repeat):
+    """クエリごとの (ヒット数, 検索時間のリスト) """
+    results = {}
+    for query in QUERIES:
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            hits = search(query)
+            samples.append(time.perf_counter() - start)
+        results[query] = (hits, samples)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=100_000, help="レッスン数")
+    parser.add_argument("--curriculums", type=int, default=500, help="カリキュラム（コース）数")
+    parser.add_argument("--repeat", type=int, default=20, help="クエリごとの試行回数")
+    parser.add_argument("--linear-repeat", type=int, default=3, help="線形走査の試行回数")
+    args = parser.parse_args()
+
+    from search_index import build_index
+
+    contents, descriptions = make_catalog(args.items, args.curriculums)
+    print(f"{len(contents)} items, {len(descriptions)} curriculums")
+
+    start = time.perf_counter()
+    index = build_index(contents, descriptions)
+    build_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    ts = "".join(index.iter_ts()).encode("utf-8")
+    render_seconds = time.perf_counter() - start
+    print(f"build {build_seconds:.2f}s, render {render_seconds:.2f}s: {len(index.grams)} grams, "
+          f"{len(index.title_postings)} title postings, {len(index.group_postings)} group postings")
+    print(f"TS size {len(ts) / 1e6:.1f} MB raw, {len(gzip.compress(ts)) / 1e6:.1f} MB gzip")
+
+    # 初回だけ作る補助データ（コースごとのレッスン一覧）を計測から外す
+    index.search(QUERIES[0])
+    indexed = time_queries(index.search, args.repeat)
+    linear = time_queries(lambda query: linear_search(contents, descriptions, query), args.linear_repeat)
+
+    print(f"{'query':<20} {'hits':>7} {'linear':>7}  {'index p50':>10} {'p95':>9}  {'linear p50':>10}")
+    missed = []
+    all_index, all_linear = [], []
+    for query in QUERIES:
+        hits, samples = indexed[query]
+        linear_hits, linear_samples = linear[query]
+        all_index += samples
+        all_linear += linear_samples
+        if not set(linear_hits) <= set(hits):
+            missed.append(query)
+        print(f"{query:<20} {len(hits):>7} {len(linear_hits):>7}  "
+              f"{percentile(samples, 0.5) * 1000:>8.2f}ms {percentile(samples, 0.95) * 1000:>7.2f}ms  "
+              f"{percentile(linear_samples, 0.5) * 1000:>8.1f}ms")
+    print(f"all queries: index p50 {percentile(all_index, 0.5) * 1000:.2f} ms, "
+          f"p95 {percentile(all_index, 0.95) * 1000:.2f} ms, mean {statistics.mean(all_index) * 1000:.2f} ms / "
+          f"linear p50 {percentile(all_linear, 0.5) * 1000:.1f} ms")
+
+    if missed:
+        print(f"FAILED: index missed linear-scan hits for {', '.join(missed)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+"""ベンチマーク用の合成 CSV（コンテンツ一覧/コース一覧/カリキュラム一覧）を作る。
+
+列構成は update_data_real.py が読む実データの CSV に合わせている。
+同じ seed なら同じ内容になる。
+"""
+import csv
+import json
+import os
+import random
+import time
+
+CONTENT_HEADER = ["ID", "コンテンツ名", "YOUTUBE_URL", "コース", "Created"]
+COURSE_HEADER = ["ID", "プログラム名", "カリキュラム説明"]
+CURRICULUM_HEADER = ["ID", "コース名", "コース概要"]
+
+TOPICS = ["AI活用", "動画制作", "ITパスポート", "SNSマーケティング", "アプリ開発", "キャリア", "GAS", "セキュリティ"]
+
+
+def video_id(n):
+    return f"v{n:010d}"
+
+
+def video_url(rng, n):
+    vid = video_id(n)
+    form = rng.random()
+    if form < 0.5:
+        return f"https://youtu.be/{vid}"
+    if form < 0.9:
+        return f"https://www.youtube.com/watch?v={vid}"
+    if form < 0.95:
+        return f"https://www.youtube.com/watch?v={vid}&t=42s"
+    return "https://docs.google.com/document/d/example"
+
+
+def curriculum_title(n):
+    return f"{TOPICS[n % len(TOPICS)]}講座{n:05d}"
+
+
+def write_catalog(directory, n_content, n_curriculums, n_courses=50, seed=0):
+    """directory に3つの CSV を書き、{名前: パス} を返す"""
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    paths = {
+        "content": os.path.join(directory, "コンテンツ一覧.csv"),
+        "course": os.path.join(directory, "コース一覧.csv"),
+        "curriculum": os.path.join(directory, "カリキュラム一覧.csv"),
+    }
+
+    with open(paths["content"], "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(CONTENT_HEADER)
+        for i in range(n_content):
+            # 人気カリキュラムにレッスンが偏るようにする
+            curr = min(int(rng.paretovariate(1.2)) - 1, n_curriculums - 1)
+            curr = (curr * 7919 + i % 3) % n_curriculums
+            # 1割は既存の動画を別レッスンから再利用する
+            vid = rng.randrange(max(1, i)) if i and rng.random() < 0.1 else i
+            writer.writerow([
+                str(100000 + i),
+                f"{curriculum_title(curr)} 第{i % 40 + 1}回 'ライブ' アーカイブ",
+                video_url(rng, vid),
+                curriculum_title(curr),
+                f"2024-10-{1 + i % 28:02d}T14:19:24.846Z",
+            ])
+
+    with open(paths["curriculum"], "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(CURRICULUM_HEADER)
+        for n in range(n_curriculums):
+            writer.writerow([str(n + 1), curriculum_title(n), f"{curriculum_title(n)}の概要です。\n基礎から学びます"])
+
+    with open(paths["course"], "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(COURSE_HEADER)
+        for n in range(n_courses):
+            writer.writerow([str(n + 1), f"{TOPICS[n % len(TOPICS)]}プログラム{n}", "プログラムの説明"])
+
+    return paths
+
+
+def full_width(text):
+    return "".join(chr(ord(c) + 0xFEE0) if "!" <= c <= "~" else c for c in text)
+
+
+def drift_courses(path):
+    """コンテンツ一覧の「コース」列に表記揺れ（末尾の空白・全角英数字）を入れ、揺らした行数を返す"""
+    with open(path, encoding="utf-8", newline="") as f:
+        rows = list(csv.reader(f))
+    drifted = 0
+    for n, row in enumerate(rows[1:]):
+        if n % 3 == 2:
+            continue
+        row[3] = row[3] + " " if n % 3 == 0 else full_width(row[3])
+        drifted += 1
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        csv.writer(f).writerows(rows)
+    return drifted
+
+
+def write_duration_cache(path, n_videos, seed=0):
+    """全動画の再生時間が入った duration_cache.json（DurationStore 形式）を書く"""
+    rng = random.Random(seed)
+    now = time.time()
+    entries = {}
+    for n in range(n_videos):
+        seconds = rng.randrange(60, 2 * 60 * 60)
+        m, s = divmod(seconds, 60)
+        h, m = divmod(m, 60)
+        duration = f"{h}:{m:02d}:{s:02d}" if h else f"{m:02d}:{s:02d}"
+        entries[video_id(n)] = {"status": "ok", "duration": duration, "fetched_at": now}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"version": 2, "entries": entries}, f)
+
+
+def write_transactions(path, n):
+    """請求書バッチ用の取引 CSV（date,amount）。日付と金額の組は重複しない"""
+    start = time.mktime((2020, 1, 1, 12, 0, 0, 0, 0, -1))
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["date", "amount"])
+        for i in range(n):
+            day = time.strftime("%Y/%m/%d", time.localtime(start + (i % 2000) * 86400))
+            writer.writerow([day, f"{100_000 + (i // 2000) * 1_000:,}"])
+    return path
@@ -0,0 +1,409 @@
+"""e-learning カタログのバイナリ形式（サーバー側で ID から1件だけ引く用途）。
+
+courses.json や mock_elearning_data.ts は1件を探すのにも全体を読み込んで解析する必要があるので、
+固定長レコードの表・文字列プール・ID のハッシュ索引からなるファイルを書き出し、
+mmap で開いて必要なレコードだけを読む。
+
+ファイルの構成（すべてリトルエンディアン、各セクションは 8 バイト境界から始まる）:
+    ヘッダ       HEADER（マジック・バージョン・表の数・リンク配列と文字列プールの位置）
+    表の目録     TABLE_ENTRY × 表の数（名前・レコード長・件数・レコードと索引の位置・索引のスロット数）
+    表           TABLES のフィールドを並べた固定長レコード
+    リンク配列   親から子への行番号の列（uint32）。range フィールドが (先頭, 件数) で指す
+    ID の索引    FNV-1a（32 bit）のオープンアドレス法。スロットは「行番号 + 1」（0 は空き）
+    文字列プール UTF-8 の文字列を重複なしで連結したもの。str / json フィールドが (位置, 長さ) で指す
+
+表の形は courses.json に合わせている（courses → curriculums → lessons）。
+
+    python catalog_binary.py build src/data/courses.json elearning_catalog.bin
+    python catalog_binary.py get elearning_catalog.bin lessons lesson_1075
+"""
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+from collections import namedtuple
+
+MAGIC = b"MQCATLG\0"
+FORMAT_VERSION = 1
+
+HEADER = struct.Struct("<8sHHIQQQ")  # マジック, バージョン, 表の数, 予約, リンク配列の位置, 文字列プールの位置, 長さ
+TABLE_ENTRY = struct.Struct("<16sIIQQII")  # 名前, レコード長, 件数, レコードの位置, 索引の位置, スロット数, 予約
+LINK = struct.Struct("<I")
+SLOT = struct.Struct("<I")
+
+# ref / str の「なし」と、int の「なし」
+NONE = 0xFFFFFFFF
+INT_NONE = -(1 << 31)
+
+FNV_OFFSET = 0x811C9DC5
+FNV_PRIME = 0x01000193
+
+# kind: str（プールの位置, 長さ） / json（JSON にした文字列） / int（int32） /
+#       ref（target の表の行番号） / range（target の表の行番号を並べたリンク配列の先頭, 件数）
+Field = namedtuple("Field", "name kind target")
+TableSchema = namedtuple("TableSchema", "name fields")
+
+KIND_FORMATS = {"str": "II", "json": "II", "int": "i", "ref": "I", "range": "II"}
+
+
+def _field(name, kind="str", target=None):
+    return Field(name, kind, target)
+
+
+# 先頭のフィールドは ID（索引のキー）
+TABLES = (
+    TableSchema("courses", (
+        _field("id"), _field("title"), _field("description"), _field("category"), _field("level"),
+        _field("duration"), _field("image"), _field("instructor", "json"),
+        _field("curriculums", "range", "curriculums"),
+    )),
+    TableSchema("curriculums", (
+        _field("id"), _field("course", "ref", "courses"), _field("title"), _field("description"),
+        _field("order", "int"), _field("total_duration_sec", "int"), _field("unresolved_duration_count", "int"),
+        _field("lessons", "range", "lessons"),
+    )),
+    TableSchema("lessons", (
+        _field("id"), _field("curriculum", "ref", "curriculums"), _field("title"), _field("description"),
+        _field("type"), _field("url"), _field("category"), _field("duration"), _field("duration_sec", "int"),
+        _field("quiz", "json"), _field("order", "int"), _field("created_at"),
+    )),
+)
+TABLES_BY_NAME = {table.name: table for table in TABLES}
+
+
+def record_struct(schema):
+    return struct.Struct("<" + "".join(KIND_FORMATS[field.kind] for field in schema.fields))
+
+
+def fnv1a(data):
+    value = FNV_OFFSET
+    for byte in data:
+        value = ((value ^ byte) * FNV_PRIME) & 0xFFFFFFFF
+    return value
+
+
+def slot_count(rows):
+    """負荷率が 1/2 以下になる 2 のべき"""
+    slots = 8
+    while slots < rows * 2:
+        slots *= 2
+    return slots
+
+
+def _align(buffer):
+    buffer.extend(b"\0" * (-len(buffer) % 8))
+
+
+class CatalogFormatError(ValueError):
+    """マジックやバージョンが合わないファイル"""
+
+
+# ------------------------------------------------------------------
+# 書き出し
+# ------------------------------------------------------------------
+
+class StringPool:
+    def __init__(self):
+        self.data = bytearray()
+        self.offsets = {}
+
+    def add(self, text):
+        if text is None:
+            return NONE, 0
+        ref = self.offsets.get(text)
+        if ref is None:
+            encoded = text.encode("utf-8")
+            ref = self.offsets[text] = (len(self.data), len(encoded))
+            self.data.extend(encoded)
+        return ref
+
+
+def encode_catalog(tables):
+    """tables: 表の名前 → 行（dict）のリスト。行のキーは TABLES のフィールド名で、
+    ref は参照先の行番号（なければ None）、range は参照先の行番号のリストで渡す。
+    """
+    pool = StringPool()
+    links = []
+    encoded = []
+    for schema in TABLES:
+        rows = tables.get(schema.name, ())
+        record = record_struct(schema)
+        data = bytearray(record.size * len(rows))
+        ids = []
+        for i, row in enumerate(rows):
+            values = []
+            for field in schema.fields:
+                value = row.get(field.name)
+                if field.kind == "str":
+                    values.extend(pool.add(value))
+                elif field.kind == "json":
+                    values.extend(pool.add(None if value is None else json.dumps(value, ensure_ascii=False)))
+                elif field.kind == "int":
+                    values.append(INT_NONE if value is None else value)
+                elif field.kind == "ref":
+                    values.append(NONE if value is None else value)
+                else:
+                    children = list(value or ())
+                    values.extend((len(links), len(children)))
+                    links.extend(children)
+            record.pack_into(data, i * record.size, *values)
+            ids.append(row["id"])
+        encoded.append((schema, record, data, len(rows), build_id_index(ids)))
+
+    out = bytearray(HEADER.size + TABLE_ENTRY.size * len(TABLES))
+    _align(out)
+    entries = []
+    for schema, record, data, count, slots in encoded:
+        records_offset = len(out)
+        out.extend(data)
+        _align(out)
+        entries.append((schema, record, records_offset, count, slots))
+    links_offset = len(out)
+    out.extend(struct.pack(f"<{len(links)}I", *links))
+    _align(out)
+    position = HEADER.size
+    for schema, record, records_offset, count, slots in entries:
+        index_offset = len(out)
+        out.extend(struct.pack(f"<{len(slots)}I", *slots))
+        _align(out)
+        TABLE_ENTRY.pack_into(out, position, schema.name.encode("ascii"), record.size, count,
+                              records_offset, index_offset, len(slots), 0)
+        position += TABLE_ENTRY.size
+    pool_offset = len(out)
+    out.extend(pool.data)
+    HEADER.pack_into(out, 0, MAGIC, FORMAT_VERSION, len(TABLES), 0, links_offset, pool_offset, len(pool.data))
+    return bytes(out)
+
+
+def build_id_index(ids):
+    slots = [0] * slot_count(len(ids))
+    mask = len(slots) - 1
+    seen = set()
+    for row, row_id in enumerate(ids):
+        # 同じ ID が重複していたら先の行を引けるようにする
+        if row_id in seen:
+            continue
+        seen.add(row_id)
+        slot = fnv1a(row_id.encode("utf-8")) & mask
+        while slots[slot]:
+            slot = (slot + 1) & mask
+        slots[slot] = row + 1
+    return slots
+
+
+def write_catalog(path, tables):
+    """tables を書き出す。内容が同じなら書き込まず False を返す"""
+    data = encode_catalog(tables)
+    if os.path.exists(path) and os.path.getsize(path) == len(data):
+        with open(path, "rb") as f:
+            if f.read() == data:
+                return False
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return True
+
+
+def tables_from_courses_json(courses):
+    """courses.json（コース → カリキュラム → レッスンの入れ子）を表にする"""
+    from duration_sources import parse_seconds
+
+    tables = {"courses": [], "curriculums": [], "lessons": []}
+    for course in courses:
+        course_row = len(tables["courses"])
+        curriculum_rows = []
+        for curr in course.get("curriculums") or ():
+            curr_row = len(tables["curriculums"])
+            curriculum_rows.append(curr_row)
+            lesson_rows = []
+            total = 0
+            for lesson in curr.get("lessons") or ():
+                lesson_rows.append(len(tables["lessons"]))
+                # courses.json には再生時間が取れたかの区別がないので、文字列をそのまま秒にする
+                seconds = parse_seconds(lesson.get("duration"))
+                total += seconds or 0
+                tables["lessons"].append({
+                    "id": lesson["id"], "curriculum": curr_row, "title": lesson.get("title"),
+                    "description": lesson.get("description"), "url": lesson.get("youtubeUrl"),
+                    "duration": lesson.get("duration"), "duration_sec": seconds, "quiz": lesson.get("quiz"),
+                    "order": lesson.get("order"),
+                })
+            tables["curriculums"].append({
+                "id": curr["id"], "course": course_row, "title": curr.get("title"),
+                "description": curr.get("description"), "order": curr.get("order"),
+                "total_duration_sec": total, "unresolved_duration_count": 0, "lessons": lesson_rows,
+            })
+        tables["courses"].append({
+            "id": course["id"], "title": course.get("title"), "description": course.get("description"),
+            "category": course.get("category"), "level": course.get("level"), "duration": course.get("duration"),
+            "image": course.get("image"), "instructor": course.get("instructor"), "curriculums": curriculum_rows,
+        })
+    return tables
+
+
+def tables_from_elearning(content, records, index_by_course, curriculums):
+    """update_data_real の入力（コンテンツ表・LessonRecord・カリキュラム一覧の行）を表にする。
+
+    seed_loader.catalog_sources と同じく、カリキュラム一覧の1行を1コースとその唯一のカリキュラムにする。
+    どのカリキュラムにも属さないレッスンも ID で引けるよう lessons には全行を入れる（curriculum は None）。
+    """
+    from duration_stats import EMPTY_TOTALS, UNRESOLVED, course_totals, seconds_column
+
+    seconds = seconds_column([record.duration for record in records], [record.resolved for record in records])
+    totals_by_course = course_totals([record.group for record in records], seconds)
+    parents = [None] * len(records)
+    orders = [None] * len(records)
+    tables = {"courses": [], "curriculums": [], "lessons": []}
+    for row, curr in enumerate(curriculums):
+        children = index_by_course.get(curr.title, ())
+        for order, i in enumerate(children, 1):
+            if parents[i] is None:
+                parents[i], orders[i] = row, order
+        totals = totals_by_course.get(curr.title, EMPTY_TOTALS)
+        tables["courses"].append({
+            "id": curr.id, "title": curr.title, "description": curr.description, "curriculums": [row],
+        })
+        tables["curriculums"].append({
+            "id": curr.id, "course": row, "title": curr.title, "description": curr.description, "order": 1,
+            "total_duration_sec": totals.seconds, "unresolved_duration_count": totals.unresolved,
+            "lessons": list(children),
+        })
+    # タイトルとコース名は escape_js する前の値を使う
+    for i, (record, title, category) in enumerate(zip(records, content["title"], content["category"])):
+        tables["lessons"].append({
+            "id": record.id, "curriculum": parents[i], "title": title, "type": record.type, "url": record.url,
+            "category": category, "duration": record.duration,
+            "duration_sec": None if seconds[i] == UNRESOLVED else seconds[i],
+            "order": orders[i], "created_at": record.created_at,
+        })
+    return tables
+
+
+# ------------------------------------------------------------------
+# 読み込み
+# ------------------------------------------------------------------
+
+TableInfo = namedtuple("TableInfo", "schema record count records_offset index_offset slots")
+
+
+class CatalogReader:
+    """mmap で開き、ID で1件ずつ引く。ファイル全体は解析しない"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, table_count, _, self.links_offset, self.pool_offset, _ = HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self.mm.close()
+            raise CatalogFormatError(f"{path}: not a catalog file of version {FORMAT_VERSION}")
+        self.tables = {}
+        for i in range(table_count):
+            name, size, count, records_offset, index_offset, slots, _ = TABLE_ENTRY.unpack_from(
+                self.mm, HEADER.size + i * TABLE_ENTRY.size)
+            schema = TABLES_BY_NAME[name.rstrip(b"\0").decode("ascii")]
+            record = record_struct(schema)
+            if record.size != size:
+                self.mm.close()
+                raise CatalogFormatError(f"{path}: record size of {schema.name} does not match")
+            self.tables[schema.name] = TableInfo(schema, record, count, records_offset, index_offset, slots)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.mm.close()
+
+    def count(self, table):
+        return self.tables[table].count
+
+    def _string(self, offset, length):
+        if offset == NONE:
+            return None
+        start = self.pool_offset + offset
+        return self.mm[start:start + length].decode("utf-8")
+
+    def _id_bytes(self, info, row):
+        offset, length = struct.unpack_from("<II", self.mm, info.records_offset + row * info.record.size)
+        start = self.pool_offset + offset
+        return self.mm[start:start + length]
+
+    def find(self, table, row_id):
+        """ID の行番号（なければ None）"""
+        info = self.tables[table]
+        key = row_id.encode("utf-8")
+        mask = info.slots - 1
+        slot = fnv1a(key) & mask
+        while True:
+            row = SLOT.unpack_from(self.mm, info.index_offset + slot * SLOT.size)[0]
+            if row == 0:
+                return None
+            if self._id_bytes(info, row - 1) == key:
+                return row - 1
+            slot = (slot + 1) & mask
+
+    def row(self, table, row):
+        """行番号の行を dict にする。ref は参照先の ID、range は参照先の ID のリストになる"""
+        info = self.tables[table]
+        values = iter(info.record.unpack_from(self.mm, info.records_offset + row * info.record.size))
+        result = {}
+        for field in info.schema.fields:
+            if field.kind in ("str", "json"):
+                text = self._string(next(values), next(values))
+                result[field.name] = json.loads(text) if field.kind == "json" and text is not None else text
+            elif field.kind == "int":
+                value = next(values)
+                result[field.name] = None if value == INT_NONE else value
+            elif field.kind == "ref":
+                value = next(values)
+                target = self.tables[field.target]
+                result[field.name] = None if value == NONE else self._id_bytes(target, value).decode("utf-8")
+            else:
+                first, count = next(values), next(values)
+                target = self.tables[field.target]
+                children = struct.unpack_from(f"<{count}I", self.mm, self.links_offset + first * LINK.size)
+                result[field.name] = [self._id_bytes(target, child).decode("utf-8") for child in children]
+        return result
+
+    def get(self, table, row_id):
+        """ID の行（なければ None）"""
+        row = self.find(table, row_id)
+        return None if row is None else self.row(table, row)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="e-learning カタログのバイナリ形式を書き出す・引く")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="courses.json からバイナリを書き出す")
+    build.add_argument("source", help="courses.json")
+    build.add_argument("output", help="出力するバイナリ")
+    get = commands.add_parser("get", help="ID で1件引いて JSON で表示する")
+    get.add_argument("catalog", help="バイナリのカタログ")
+    get.add_argument("table", choices=[table.name for table in TABLES])
+    get.add_argument("id")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        with open(args.source, "r", encoding="utf-8") as f:
+            tables = tables_from_courses_json(json.load(f))
+        written = write_catalog(args.output, tables)
+        counts = ", ".join(f"{len(rows)} {name}" for name, rows in tables.items())
+        print(f"{'Wrote' if written else 'Unchanged'} {args.output} ({counts}, {os.path.getsize(args.output)} bytes)")
+        return 0
+    with CatalogReader(args.catalog) as reader:
+        row = reader.get(args.table, args.id)
+    if row is None:
+        print(f"{args.id} not found in {args.table}", file=sys.stderr)
+        return 1
+    print(json.dumps(row, ensure_ascii=False, indent=4))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,229 @@
+"""コンテンツ一覧・カリキュラム一覧・コース一覧 CSV の共通読み込み層。
+
+update_data_real.py と convert_csv_to_ts.py はどちらもこのモジュール経由で CSV を読む。
+
+- 列は位置ではなくヘッダー名で引き、必須列が欠けていれば CatalogSchemaError を投げる
+- 各 CSV は1回だけ読み、列ごとのリスト（列指向のテーブル）に格納する
+- 動画 ID・コンテンツ種別・正規化したコース名などの派生列も読み込み時に1回だけ計算する
+- 解析結果は .catalog_cache/ に pickle で保存し、CSV の mtime とサイズが
+  変わっていなければ次回は CSV をデコードせずにそのまま読み込む
+
+ファイルと列の対応（update_data_real.py が実データで使ってきたもの）:
+    コンテンツ一覧.csv    ID, コンテンツ名, YOUTUBE_URL, コース, Created
+    カリキュラム一覧.csv  ID, コース名, コース概要        → ALL_CURRICULUMS
+    コース一覧.csv        ID, プログラム名, カリキュラム説明 → ALL_COURSES
+"""
+import csv
+import hashlib
+import os
+import pickle
+import re
+from collections import namedtuple
+
+CACHE_VERSION = 2
+DEFAULT_CACHE_DIR = ".catalog_cache"
+UNCATEGORIZED = "未分類"
+
+# 同じ動画の URL の書き方の違い（watch?v= / youtu.be / shorts / embed / live、&t= や ?si= の付加、
+# m. や youtube-nocookie.com のホスト）をすべて同じ11文字の動画 ID にまとめる。ホスト部分だけ大文字小文字を区別しない
+VIDEO_ID_RE = re.compile(
+    r"(?i:youtu\.be/|youtube(?:-nocookie)?\.com/(?:embed/|shorts/|live/|v/|e/|watch/|watch\?(?:[^#]*?&)?v=|\?(?:[^#]*?&)?v=))"
+    r"([\w-]{11})(?![\w-])"
+)
+
+
+class CatalogSchemaError(ValueError):
+    pass
+
+
+def extract_video_id(url):
+    """URL から正規化した動画 ID を取り出す。YouTube の動画 URL でなければ None"""
+    if not url or "youtu" not in url.lower():
+        return None
+    match = VIDEO_ID_RE.search(url)
+    return match.group(1) if match else None
+
+
+def content_type(title, url):
+    if 'quiz' in title.lower():
+        return 'quiz'
+    return 'video' if 'youtu' in url else 'document'
+
+
+# ------------------------------------------------------------------
+# スキーマ
+# ------------------------------------------------------------------
+
+# header: CSV のヘッダー名 / required: 欠けていたらエラー / default: 列がないときの値
+Field = namedtuple("Field", "name header required default")
+
+
+class Schema:
+    """CSV 1種類分の列定義。
+
+    derive(values) には fields の順に並んだ値のリストが渡され、派生列の値をタプルで返す。
+    各行には元の行を "\\x1f" で連結した row_key も付く（差分ビルドのハッシュ用）。
+    """
+
+    def __init__(self, name, fields, derived=(), derive=None):
+        self.name = name
+        self.fields = fields
+        self.derived = derived
+        self.derive = derive
+        self.columns = tuple(field.name for field in fields) + tuple(derived) + ("row_key",)
+        self.row_type = namedtuple(f"{name.title()}Row", self.columns)
+
+    def bind(self, header, path):
+        """ヘッダーを検証し、各フィールドの列位置（なければ None）を返す"""
+        position = {name: i for i, name in enumerate(header)}
+        missing = [field.header for field in self.fields if field.required and field.header not in position]
+        if missing:
+            raise CatalogSchemaError(
+                f"{path}: missing column(s) {', '.join(missing)} for {self.name} "
+                f"(found: {', '.join(header) or 'no header'})")
+        return [position.get(field.header) for field in self.fields]
+
+
+def _derive_content(values):
+    _, title, url, category, _ = values
+    return (extract_video_id(url), content_type(title, url), category.strip() or UNCATEGORIZED)
+
+
+CONTENT_SCHEMA = Schema("content", (
+    Field("id", "ID", True, ""),
+    Field("title", "コンテンツ名", True, ""),
+    Field("url", "YOUTUBE_URL", False, ""),
+    Field("category", "コース", False, UNCATEGORIZED),
+    Field("created_at", "Created", False, ""),
+), derived=("video_id", "type", "course"), derive=_derive_content)
+
+CURRICULUM_SCHEMA = Schema("curriculum", (
+    Field("id", "ID", True, ""),
+    Field("title", "コース名", True, ""),
+    Field("description", "コース概要", False, ""),
+))
+
+COURSE_SCHEMA = Schema("course", (
+    Field("id", "ID", True, ""),
+    Field("title", "プログラム名", True, ""),
+    Field("description", "カリキュラム説明", False, ""),
+))
+
+
+# ------------------------------------------------------------------
+# 読み込み
+# ------------------------------------------------------------------
+
+def iter_rows(path, schema):
+    """CSV を1行ずつ読み、schema.row_type のタプルを返す（全件をメモリに溜めない）"""
+    with open(path, 'r', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        header = [name.strip() for name in next(reader, [])]
+        if header:
+            header[0] = header[0].lstrip("\ufeff")
+        positions = schema.bind(header, path)
+        defaults = [field.default for field in schema.fields]
+        derive = schema.derive
+        make_row = schema.row_type._make
+        for row in reader:
+            if not any(row):
+                continue  # 空行
+            width = len(row)
+            values = [
+                row[i] if i is not None and i < width else default
+                for i, default in zip(positions, defaults)
+            ]
+            if derive is not None:
+                values.extend(derive(values))
+            values.append("\x1f".join(row))
+            yield make_row(values)
+
+
+class Table:
+    """列名 → 値のリストで持つテーブル。行は rows() で schema.row_type として取り出す"""
+
+    def __init__(self, schema, columns, from_cache=False):
+        self.schema = schema
+        self.columns = columns
+        self.from_cache = from_cache
+
+    def __len__(self):
+        return len(self.columns["row_key"])
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def rows(self):
+        return map(self.schema.row_type._make, zip(*(self.columns[name] for name in self.schema.columns)))
+
+    def group_by(self, name):
+        """列の値 → 行インデックスのリスト"""
+        groups = {}
+        for i, value in enumerate(self.columns[name]):
+            groups.setdefault(value, []).append(i)
+        return groups
+
+
+def _cache_path(cache_dir, schema, path):
+    key = hashlib.sha1(os.path.abspath(path).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(cache_dir, f"{schema.name}-{key}.pickle")
+
+
+def _load_cached(cache_path, schema, stat):
+    try:
+        with open(cache_path, 'rb') as f:
+            data = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+        return None
+    if (data.get("version") != CACHE_VERSION or data.get("columns_spec") != schema.columns
+            or data.get("mtime_ns") != stat.st_mtime_ns or data.get("size") != stat.st_size):
+        return None
+    return data["columns"]
+
+
+def _store_cached(cache_path, schema, stat, columns):
+    os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+    tmp_path = f"{cache_path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        pickle.dump({
+            "version": CACHE_VERSION,
+            "columns_spec": schema.columns,
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "columns": columns,
+        }, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, cache_path)
+
+
+def load_table(path, schema, cache_dir=DEFAULT_CACHE_DIR):
+    """CSV を列指向の Table として読む。cache_dir=None ならキャッシュを使わない"""
+    stat = os.stat(path)
+    cache_path = _cache_path(cache_dir, schema, path) if cache_dir else None
+    if cache_path:
+        columns = _load_cached(cache_path, schema, stat)
+        if columns is not None:
+            return Table(schema, columns, from_cache=True)
+
+    columns = {name: [] for name in schema.columns}
+    appends = [columns[name].append for name in schema.columns]
+    for row in iter_rows(path, schema):
+        for append, value in zip(appends, row):
+            append(value)
+
+    if cache_path:
+        try:
+            _store_cached(cache_path, schema, stat, columns)
+        except OSError as e:
+            print(f"Warning: could not write catalog cache {cache_path}: {e}")
+    return Table(schema, columns)
+
+
+Catalog = namedtuple("Catalog", "content curriculums courses")
+
+
+def load_catalog(content_path, curriculum_path, course_path, cache_dir=DEFAULT_CACHE_DIR):
+    return Catalog(
+        load_table(content_path, CONTENT_SCHEMA, cache_dir),
+        load_table(curriculum_path, CURRICULUM_SCHEMA, cache_dir),
+        load_table(course_path, COURSE_SCHEMA, cache_dir),
+    )
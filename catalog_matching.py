@@ -0,0 +1,242 @@
+"""レッスン（コンテンツ一覧の「コース」列）とカリキュラム（カリキュラム一覧のタイトル）の突き合わせ。
+
+これまでは文字列の完全一致で結び付けていたので、空白・全角/半角・句読点が少し違うだけで
+レッスンがどのカリキュラムにも入らなかった。ここでは次の順に照合する。
+
+    exact       そのままのタイトルが一致
+    normalized  NFKC・大文字小文字の同一視・空白と句読点の除去をしたタイトルが一致
+    fuzzy       正規化したタイトルの文字 bigram（重複も数える）の Dice 係数が CONFIDENT_SCORE 以上の最良の候補
+
+fuzzy の候補は trigram → カリキュラムの転置インデックスから集める（全カリキュラムとは比べない）。
+多くのタイトルに出てくる trigram（「活用講」など）は候補集めに使わず、出現の少ない trigram だけを引くので、
+照合はコース名の種類数にほぼ比例する時間で終わる。コース名は種類ごとに1回だけ照合する。
+
+ただし数字の並び（第1期 / 第2期、00000 / 00099）やレベル・編の語（初級 / 中級、基礎編 / 応用編）が
+違うタイトルは、似ていても別のカリキュラムなので fuzzy では結び付けない。
+
+信頼度の低い候補（score が MIN_SCORE 以上 CONFIDENT_SCORE 未満、同点の候補が複数、数字やレベルの違い）は
+結び付けずに low_confidence としてレポートにだけ載せる。間違ったカリキュラムにレッスンを入れるより、
+どこにも入らないほうが気付きやすい。どのカリキュラムにも入らないコース名は
+MatchResult.report() / to_json() で確認できる。
+"""
+import json
+import re
+import unicodedata
+from collections import Counter, namedtuple
+
+# MIN_SCORE 以上の候補はレポートに載せ、CONFIDENT_SCORE 以上で同点の候補がなければ結び付ける
+MIN_SCORE = 0.6
+CONFIDENT_SCORE = 0.85
+# 候補集めに使う trigram の数の上限（出現の少ない順）と、それより多く出てくる trigram を捨てる目安
+CANDIDATE_GRAMS = 8
+COMMON_GRAM_RATIO = 0.1
+# Dice 係数を計算する候補の上限（共有する bigram の多い順）
+MAX_CANDIDATES = 20
+
+# curriculum: カリキュラム番号（結び付けなければ None） / method: exact・normalized・fuzzy・None / score: 0〜1 /
+# ambiguous: 同点の候補が複数 / candidate: 結び付けなくても一番近かったカリキュラム番号 /
+# reason: 候補があるのに結び付けなかった理由（REJECT_*。MIN_SCORE に届かない候補なら None）
+Match = namedtuple("Match", "curriculum method score ambiguous candidate reason")
+NO_MATCH = Match(None, None, 0.0, False, None, None)
+
+REJECT_LOW_SCORE = "low score"
+REJECT_AMBIGUOUS = "ambiguous"
+REJECT_MARKERS = "numbers or level differ"
+
+# 空白（Z*）・句読点（P*）・制御文字など（C*）は照合に使わない
+IGNORED_CATEGORIES = ("Z", "P", "C")
+
+
+# これが違うタイトルは別のカリキュラム（第N期・第N回などは数字の並びで区別する）
+LEVEL_WORDS = ("入門", "初級", "中級", "上級", "基礎", "応用", "発展", "前編", "中編", "後編")
+DIGITS_RE = re.compile(r"\d+")
+
+
+def normalize_title(text):
+    text = unicodedata.normalize("NFKC", text).casefold()
+    return "".join(ch for ch in text if unicodedata.category(ch)[0] not in IGNORED_CATEGORIES)
+
+
+def bigrams(text):
+    """bigram → 出現回数（"00000" と "0000" を区別できるよう重複も数える）"""
+    if len(text) < 2:
+        return Counter([text] if text else ())
+    return Counter(text[i:i + 2] for i in range(len(text) - 1))
+
+
+def trigrams(text):
+    """候補集めに使うキー（3文字未満のタイトルはタイトルそのもの）"""
+    if len(text) < 3:
+        return {text} if text else set()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def markers(key):
+    """正規化したタイトルの数字の並びとレベルの語。fuzzy で結び付けるには両方が一致している必要がある"""
+    return tuple(int(run) for run in DIGITS_RE.findall(key)), frozenset(word for word in LEVEL_WORDS if word in key)
+
+
+def dice(a, b):
+    if not a or not b:
+        return 0.0
+    return 2 * sum((a & b).values()) / (sum(a.values()) + sum(b.values()))
+
+
+class CurriculumMatcher:
+    """カリキュラムのタイトルの一覧から照合用の索引を作り、コース名をカリキュラム番号に対応付ける"""
+
+    def __init__(self, titles, min_score=MIN_SCORE):
+        self.titles = list(titles)
+        self.min_score = min_score
+        self.exact = {}
+        self.normalized = {}
+        self.grams = []
+        self.markers = []
+        self.postings = {}
+        # 同じタイトルのカリキュラムが複数あれば先のものに寄せる（完全一致のときと同じ）
+        for i, title in enumerate(self.titles):
+            self.exact.setdefault(title, i)
+            key = normalize_title(title)
+            self.normalized.setdefault(key, i)
+            self.grams.append(bigrams(key))
+            self.markers.append(markers(key))
+            for gram in trigrams(key):
+                self.postings.setdefault(gram, []).append(i)
+        self.common = max(1, int(len(self.titles) * COMMON_GRAM_RATIO))
+        self.cache = {}
+
+    def match(self, name):
+        result = self.cache.get(name)
+        if result is None:
+            result = self.cache[name] = self._match(name)
+        return result
+
+    def _match(self, name):
+        if name in self.exact:
+            return Match(self.exact[name], "exact", 1.0, False, self.exact[name], None)
+        key = normalize_title(name)
+        if key in self.normalized:
+            return Match(self.normalized[key], "normalized", 1.0, False, self.normalized[key], None)
+        grams = bigrams(key)
+        if not grams:
+            return NO_MATCH
+        # 出現の少ない trigram から候補を集める（ありふれた trigram しかなければ一番少ないものを使う）
+        ranked = sorted((len(self.postings[gram]), gram) for gram in trigrams(key) if gram in self.postings)
+        selected = [gram for count, gram in ranked if count <= self.common][:CANDIDATE_GRAMS] \
+            or [gram for _, gram in ranked[:1]]
+        candidates = Counter()
+        for gram in selected:
+            candidates.update(self.postings[gram])
+        # 数字の並びとレベルの語が一致する候補の中の最良のものと、レポート用に全候補の中の最良のもの
+        own = markers(key)
+        best, best_score, ambiguous = None, 0.0, False
+        nearest, nearest_score = None, 0.0
+        for i, _ in candidates.most_common(MAX_CANDIDATES):
+            score = dice(grams, self.grams[i])
+            if score > nearest_score:
+                nearest, nearest_score = i, score
+            if self.markers[i] != own:
+                continue
+            if score > best_score:
+                best, best_score, ambiguous = i, score, False
+            elif score == best_score and score > 0 and self.titles[i] != self.titles[best]:
+                ambiguous = True
+        if best is not None and best_score >= self.min_score:
+            if ambiguous:
+                return Match(None, None, best_score, True, best, REJECT_AMBIGUOUS)
+            if best_score < CONFIDENT_SCORE:
+                return Match(None, None, best_score, False, best, REJECT_LOW_SCORE)
+            return Match(best, "fuzzy", best_score, False, best, None)
+        if nearest is not None and nearest_score >= self.min_score:
+            return Match(None, None, nearest_score, False, nearest, REJECT_MARKERS)
+        return Match(None, None, nearest_score, False, nearest, None)
+
+
+SUMMARY_KEYS = ("exact", "normalized", "fuzzy", "low_confidence", "orphan")
+
+
+class MatchResult:
+    """コース名ごとの照合結果と、それぞれのレッスン数"""
+
+    def __init__(self, matcher):
+        self.matcher = matcher
+        self.counts = Counter()  # コース名 → レッスン数（出てきた順）
+
+    def add(self, name):
+        """レッスン1件分のコース名を数え、対応するカリキュラムのタイトルを返す（title_for と同じ）"""
+        self.counts[name] += 1
+        return self.title_for(name)
+
+    def title_for(self, name):
+        """コース名に対応するカリキュラムのタイトル。見つからなければコース名のまま"""
+        match = self.matcher.match(name)
+        return name if match.curriculum is None else self.matcher.titles[match.curriculum]
+
+    def low_confidence(self):
+        """近い候補はあるが結び付けなかったコース名（レポートにだけ載せる）"""
+        return [(name, match) for name, match in self.items() if match.curriculum is None and match.reason]
+
+    def orphans(self):
+        """近い候補もなく、どのカリキュラムにも入らないコース名"""
+        return [(name, match) for name, match in self.items() if match.curriculum is None and not match.reason]
+
+    def items(self):
+        return [(name, self.matcher.match(name)) for name in self.counts]
+
+    def summary(self):
+        """(区分 → コース名の数, 区分 → レッスン数)。区分は SUMMARY_KEYS のどれか"""
+        methods, lessons = Counter(), Counter()
+        for name, match in self.items():
+            key = match.method or ("low_confidence" if match.reason else "orphan")
+            methods[key] += 1
+            lessons[key] += self.counts[name]
+        return methods, lessons
+
+    def report(self, out=None, limit=20):
+        methods, lessons = self.summary()
+        parts = [f"{methods[m]} {m} ({lessons[m]} lessons)" for m in ("exact", "normalized", "fuzzy") if methods[m]]
+        print(f"Curriculum matching: {len(self.counts)} course names -> {', '.join(parts) or 'none matched'}; "
+              f"{methods['low_confidence'] + methods['orphan']} not attached "
+              f"({lessons['low_confidence'] + lessons['orphan']} lessons, "
+              f"{methods['low_confidence']} with a low-confidence candidate)", file=out)
+        for label, rows in (("low confidence, not attached", self.low_confidence()), ("orphan", self.orphans())):
+            for name, match in rows[:limit]:
+                target = "-" if match.candidate is None else self.matcher.titles[match.candidate]
+                reason = f", {match.reason}" if match.reason else ""
+                print(f"  {label}: {name!r} -> {target!r} "
+                      f"(score {match.score:.2f}{reason}, {self.counts[name]} lessons)", file=out)
+            if len(rows) > limit:
+                print(f"  ... {len(rows) - limit} more {label} course names", file=out)
+
+    def to_json(self):
+        def entry(name, match):
+            return {
+                "course": name,
+                "curriculum": None if match.curriculum is None else self.matcher.titles[match.curriculum],
+                "candidate": None if match.candidate is None else self.matcher.titles[match.candidate],
+                "score": round(match.score, 3),
+                "ambiguous": match.ambiguous,
+                "reason": match.reason,
+                "lessons": self.counts[name],
+            }
+        methods, lessons = self.summary()
+        return {
+            "summary": {
+                key: {"courses": methods[key], "lessons": lessons[key]} for key in SUMMARY_KEYS
+            },
+            "low_confidence": [entry(name, match) for name, match in self.low_confidence()],
+            "orphans": [entry(name, match) for name, match in self.orphans()],
+        }
+
+    def write_json(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_json(), f, ensure_ascii=False, indent=4)
+            f.write("\n")
+
+
+def match_courses(names, titles, min_score=MIN_SCORE):
+    """レッスンごとのコース名の列とカリキュラムのタイトルの一覧を照合する"""
+    result = MatchResult(CurriculumMatcher(titles, min_score))
+    for name in names:
+        result.add(name)
+    return result
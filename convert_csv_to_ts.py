@@ -1,120 +1,187 @@
-import csv
+import argparse
 import json
 import os
+import shutil
 import sys
+import tempfile
+from collections import OrderedDict
 
-# Paths
-BASE_DIR = "/Users/yuyu24/2ndBrain/Ehime Base app"
-CONTENT_CSV = os.path.join(BASE_DIR, "元データ/コンテンツ一覧.csv")
-COURSE_CSV = os.path.join(BASE_DIR, "元データ/コース一覧.csv") 
-CURRICULUM_CSV = os.path.join(BASE_DIR, "元データ/カリキュラム一覧.csv")
+from catalog_ingest import (
+    CONTENT_SCHEMA, COURSE_SCHEMA, CURRICULUM_SCHEMA, iter_rows,
+)
+from catalog_matching import CurriculumMatcher, MatchResult
+from duration_fetcher import FALLBACK_DURATION
+from elearning_ts import LAYOUTS, NORMALIZED_ACCESSOR_TS, NORMALIZED_CURRICULUMS_TS
+from search_index import SearchIndexBuilder
+# 入力 CSV のパスは update_data_real.py と同じ既定値・設定ファイルの形式を使う
+from update_data_real import DEFAULT_PATHS, load_config, make_paths
+
+# 同時に開いておくスプールファイルの上限（カテゴリ数がこれを超えたら古いものから閉じる）
+MAX_OPEN_SPOOLS = 64
 
 def clean_url(url):
     if not url: return None
     return url.strip()
 
-def parse_content():
-    items = []
-    with open(CONTENT_CSV, 'r', encoding='utf-8') as f:
-        reader = csv.reader(f)
-        header = next(reader) # Skip header
-        for row in reader:
-            if not row or len(row) < 3: continue
-            
-            # ID(0), Title(1), URL(2), Category (Course Name)(3)
-            c_id = row[0]
-            title = row[1]
-            url = row[2]
-            category = row[3] if len(row) > 3 else "Uncategorized"
-            created_at = row[-2] if len(row) > 2 else ""
-
-            if not title: continue
-            
-            c_type = 'video' if 'youtu' in url else 'document'
-            if 'quiz' in title.lower(): c_type = 'quiz'
-
-            items.append({
-                'id': c_id,
-                'title': title,
-                'type': c_type,
-                'url': clean_url(url),
-                'thumbnail': None, # Let frontend generate from URL
-                'duration': '10:00',
-                'category': category,
-                'createdAt': created_at
-            })
-    return items
-
-def parse_curriculums(all_content):
-    # From コース一覧.csv (Now mapped to Curriculums/Subjects)
-    items = []
-    
-    # Group content by category (Curriculum Title)
-    content_by_cat = {}
-    for c in all_content:
-        cat = c['category']
-        if cat not in content_by_cat: content_by_cat[cat] = []
-        content_by_cat[cat].append(c)
-
-    with open(COURSE_CSV, 'r', encoding='utf-8') as f:
-        reader = csv.reader(f)
-        header = next(reader)
-        for row in reader:
-            if not row or len(row) < 3: continue
-            
-            c_id = row[0]
-            title = row[1]
-            desc = row[2]
-            
-            if not title: continue
+# CSV の解析は catalog_ingest に任せ、ここでは1行ずつ受け取って出力用の dict にする
+# （ストリーミング出力なので列指向テーブルには溜めない）
 
-            # Find matching lessons
-            lessons = content_by_cat.get(title, [])
-
-            items.append({
-                'id': c_id,
-                'title': title,
-                'description': desc,
-                'courseCount': len(lessons), # Actually lesson count
-                'lessons': lessons 
-            })
-    return items
-
-def parse_courses():
-    # From カリキュラム一覧.csv (Now mapped to Courses/Tracks)
-    items = []
-    with open(CURRICULUM_CSV, 'r', encoding='utf-8') as f:
-        reader = csv.reader(f)
-        header = next(reader)
-        for row in reader:
-            if not row or len(row) < 5: continue
-            
-            c_id = row[0]
-            title = row[1]
-            desc = row[4]
-            category = "General"
-
-            if not title: continue
-
-            items.append({
-                'id': c_id,
-                'title': title,
-                'description': desc,
-                'category': category,
-                'lessonCount': 0 # Placeholder as we don't know relationship yet
-            })
-    return items
-
-def main():
-    content = parse_content()
-    curriculums = parse_curriculums(content) # Nest content
-    courses = parse_courses()
-
-    ts_output = """// This file contains mock data imported from CSV files.
-// Generated via script.
+def iter_content(path):
+    for row in iter_rows(path, CONTENT_SCHEMA):
+        yield {
+            'id': row.id,
+            'title': row.title,
+            'type': row.type,
+            'url': clean_url(row.url),
+            'thumbnail': None, # Let frontend generate from URL
+            'duration': FALLBACK_DURATION,
+            # 再生時間は取得しないので、すべて仮の値であることを明示する
+            'durationSec': None,
+            'durationFallback': True,
+            'category': row.course,
+            'createdAt': row.created_at
+        }
+
+def iter_curriculums(path):
+    # From カリキュラム一覧.csv (ALL_CURRICULUMS, same mapping as update_data_real.py)
+    for row in iter_rows(path, CURRICULUM_SCHEMA):
+        yield {'id': row.id, 'title': row.title, 'description': row.description}
+
+def iter_courses(path):
+    # From コース一覧.csv (Courses/Tracks)
+    for row in iter_rows(path, COURSE_SCHEMA):
+        yield {
+            'id': row.id,
+            'title': row.title,
+            'description': row.description,
+            'category': "General",
+            'lessonCount': 0 # Placeholder as we don't know relationship yet
+        }
+
+# ------------------------------------------------------------------
+# ストリーミング出力
+# ------------------------------------------------------------------
+
+# indent なしのエンコーダは C 実装が使われるので、値のエンコードはこちらに任せる
+encode_value = json.JSONEncoder(ensure_ascii=False).encode
+
+def dump_item(item, level):
+    """json.dumps(indent=4) で配列の要素として出したときと同じ字下げの文字列"""
+    pad = "    " * level
+    if isinstance(item, dict) and not any(isinstance(v, (dict, list)) for v in item.values()):
+        # フラットな dict は indent=4 の整形を自前で組み立てる（純 Python の整形処理を避ける）
+        if not item:
+            return pad + "{}"
+        inner = pad + "    "
+        fields = [f"{inner}{encode_value(k)}: {encode_value(v)}" for k, v in item.items()]
+        return pad + "{\n" + ",\n".join(fields) + "\n" + pad + "}"
+    return pad + json.dumps(item, ensure_ascii=False, indent=4).replace("\n", "\n" + pad)
+
+def write_json_array(out, items, level=0):
+    """items を1件ずつ書き出す。出力は json.dumps(list(items), indent=4) と同じ"""
+    write_rendered_array(out, (dump_item(item, level + 1) for item in items), level)
+
+def write_rendered_array(out, texts, level=0):
+    """dump_item 済みの要素を配列として書き出す"""
+    pad = "    " * level
+    first = True
+    for text in texts:
+        out.write(("[\n" if first else ",\n") + text)
+        first = False
+    out.write("[]" if first else "\n" + pad + "]")
+
+def reindent(text, levels):
+    pad = "    " * levels
+    return pad + text.replace("\n", "\n" + pad)
+
+class LessonSpool:
+    """カテゴリごとのレッスンを一時ファイル（JSON Lines）に逃がしておく。
+
+    ALL_CONTENT を書きながらカテゴリ別に振り分けておけば、
+    カリキュラムの出力時にコンテンツ CSV を読み直さずに済み、
+    メモリに残るのはカテゴリ名と件数だけになる。
+    """
+
+    def __init__(self):
+        self.dir = tempfile.mkdtemp(prefix="lesson_spool_")
+        self.paths = {}
+        self.counts = {}
+        self.handles = OrderedDict()
+
+    def add(self, category, item_id, text):
+        path = self.paths.get(category)
+        if path is None:
+            path = self.paths[category] = os.path.join(self.dir, f"{len(self.paths)}.jsonl")
+        f = self.handles.pop(category, None)
+        if f is None:
+            if len(self.handles) >= MAX_OPEN_SPOOLS:
+                _, oldest = self.handles.popitem(last=False)
+                oldest.close()
+            f = open(path, 'a', encoding='utf-8')
+        self.handles[category] = f
+        # 整形済みの文字列をそのまま保存し、出力時に dumps し直さない
+        f.write(json.dumps([item_id, text], ensure_ascii=False) + "\n")
+        self.counts[category] = self.counts.get(category, 0) + 1
+
+    def flush(self):
+        for f in self.handles.values():
+            f.close()
+        self.handles.clear()
+
+    def count(self, category):
+        return self.counts.get(category, 0)
 
-import { ContentItem } from './mock_elearning_data'; // Self-reference hack or redefine? Better redefine or export properly. 
-// Actually we will output everything in one file.
+    def iter(self, category):
+        """(レッスン ID, 配列要素として整形済みの JSON) を順に返す"""
+        path = self.paths.get(category)
+        if path is None:
+            return
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                yield json.loads(line)
+
+    def close(self):
+        self.flush()
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+def write_curriculum(out, curr, lessons, count, layout):
+    # lessons 以外の項目は通常どおり dumps し、最後の "}" の手前にレッスン配列を流し込む
+    # 再生時間はすべて FALLBACK_DURATION なので、合計は 0 で全レッスンが未解決
+    head = dict(curr, courseCount=count, lessonCount=count, totalDurationSec=0, unresolvedDurationCount=count)
+    text = dump_item(head, 1)
+    out.write(text[:-len("\n    }")] + ",\n")
+    if layout == "normalized":
+        out.write('        "lessonIds": ')
+        write_json_array(out, (lesson_id for lesson_id, _ in lessons), level=2)
+    else:
+        out.write('        "lessons": ')
+        write_rendered_array(out, (reindent(text, 2) for _, text in lessons), level=2)
+    out.write("\n    }")
+
+def write_shard(shard_dir, position, curr, spool):
+    # カリキュラム1件分のレッスンだけを持つチャンク（フロントエンドから遅延読み込みする）
+    # ファイル名は CSV の ID ではなく出力順の番号にする（"../x" のような ID や ID の重複で
+    # shard_dir の外に書いたり、別のカリキュラムのチャンクを上書きしたりしないため）。ID は index.json に残す
+    file_name = f"{position}.json"
+    with open(os.path.join(shard_dir, file_name), 'w', encoding='utf-8') as f:
+        write_rendered_array(f, (text for _, text in spool.iter(curr['title'])))
+        f.write("\n")
+    return {'id': curr['id'], 'title': curr['title'], 'lessonCount': spool.count(curr['title']), 'file': file_name}
+
+def write_ts(out, layout, shard_dir=None, search_index=None, paths=DEFAULT_PATHS):
+    """paths（update_data_real.Paths）の3つの CSV を読んで TS を書き出す。
+
+    search_index に SearchIndexBuilder を渡すと、出力しながらレッスンとカリキュラムの説明を索引に加える。
+
+    レッスンの「コース」列は catalog_matching でカリキュラムのタイトルに照合し、その MatchResult を返す。
+    """
+    # 照合の索引を作るため、カリキュラム一覧（小さい）だけは先に読んでおく
+    curriculums = list(iter_curriculums(paths.curriculum_csv))
+    matches = MatchResult(CurriculumMatcher(curr['title'] for curr in curriculums))
+    spool = LessonSpool()
+    try:
+        out.write("""// This file contains mock data imported from CSV files.
+// Generated via script.
 
 export interface ContentItem {
     id: string;
@@ -123,6 +190,9 @@ export interface ContentItem {
     url?: string;
     thumbnail?: string;
     duration?: string;
+    // 再生時間（秒）。取得できずに duration が仮の値のときは null で、durationFallback が true
+    durationSec?: number | null;
+    durationFallback?: boolean;
     category: string;
     createdAt: string;
 }
@@ -134,6 +204,10 @@ export interface CurriculumDef {
     thumbnail_url?: string;
     courseCount: number; // This is now effectively lesson count
     lessons: ContentItem[];
+    // ビルド時の集計（totalDurationSec は再生時間が取れたレッスンだけの合計）
+    lessonCount?: number;
+    totalDurationSec?: number;
+    unresolvedDurationCount?: number;
 }
 
 export interface CourseDef {
@@ -147,20 +221,114 @@ export interface CourseDef {
 // ------------------------------------------------------------------
 // 1. Content Data (FULL LIST)
 // ------------------------------------------------------------------
-export const ALL_CONTENT: ContentItem[] = """ + json.dumps(content, ensure_ascii=False, indent=4) + """;
+export const ALL_CONTENT: ContentItem[] = """)
+
+        def content_with_spool():
+            for item in iter_content(paths.content_csv):
+                text = dump_item(item, 1)
+                group = matches.add(item['category'])
+                # カリキュラムに入れるレッスンの category は照合したカリキュラムのタイトルにする
+                nested = text if group == item['category'] else dump_item(dict(item, category=group), 1)
+                spool.add(group, item['id'], nested)
+                if search_index is not None:
+                    search_index.add_document(item['title'], group)
+                yield text
+
+        write_rendered_array(out, content_with_spool())
+        spool.flush()
+        out.write(";\n")
 
+        if layout == "normalized":
+            out.write(NORMALIZED_ACCESSOR_TS + """
+// ------------------------------------------------------------------
+// 2. Curriculum Data (lesson IDs only)
+// ------------------------------------------------------------------
+export const CURRICULUM_ROWS: CurriculumRow[] = """)
+        else:
+            out.write("""
 // ------------------------------------------------------------------
 // 2. Curriculum Data (with Nested Lessons)
 // ------------------------------------------------------------------
-export const ALL_CURRICULUMS: CurriculumDef[] = """ + json.dumps(curriculums, ensure_ascii=False, indent=4) + """;
+export const ALL_CURRICULUMS: CurriculumDef[] = """)
+
+        shard_index = []
+        first = True
+        for curr in curriculums:
+            out.write("[\n" if first else ",\n")
+            first = False
+            # Find matching lessons
+            write_curriculum(out, curr, spool.iter(curr['title']), spool.count(curr['title']), layout)
+            if search_index is not None:
+                search_index.add_group_text(curr['title'], curr['description'])
+            if shard_dir:
+                shard_index.append(write_shard(shard_dir, len(shard_index), curr, spool))
+        out.write("[]" if first else "\n]")
+        out.write(";\n")
+        if layout == "normalized":
+            out.write("\n" + NORMALIZED_CURRICULUMS_TS)
 
+        out.write("""
 // ------------------------------------------------------------------
 // 3. Course Data
 // ------------------------------------------------------------------
-export const ALL_COURSES: CourseDef[] = """ + json.dumps(courses, ensure_ascii=False, indent=4) + """;
-"""
-    
-    print(ts_output)
+export const ALL_COURSES: CourseDef[] = """)
+        write_json_array(out, iter_courses(paths.course_csv))
+        out.write(";\n\n")
+
+        if shard_dir:
+            with open(os.path.join(shard_dir, "index.json"), 'w', encoding='utf-8') as f:
+                json.dump(shard_index, f, ensure_ascii=False, indent=4)
+                f.write("\n")
+    finally:
+        spool.close()
+    return matches
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="CSV から mock_elearning_data.ts 相当の TS を書き出す")
+    parser.add_argument("--layout", choices=LAYOUTS, default="nested",
+                        help="nested: レッスンをカリキュラムに埋め込む / normalized: レッスン ID の配列で参照する")
+    parser.add_argument("--out", default="-", help="出力先（既定: 標準出力）")
+    parser.add_argument("--shard-dir", help="カリキュラムごとのレッスンチャンク（<番号>.json と index.json）の出力先")
+    parser.add_argument("--search-index", metavar="PATH",
+                        help="タイトル・コース名・カリキュラムの説明の検索インデックス（TS）の出力先")
+    parser.add_argument("--match-report", metavar="PATH", help="レッスンとカリキュラムの照合結果（JSON）の出力先")
+    inputs = parser.add_argument_group("入力 CSV のパス（--config より優先）")
+    inputs.add_argument("--config", metavar="JSON",
+                        help="パスの設定ファイル（update_data_real.py --config と同じ形式。CSV のパスだけを使う）")
+    inputs.add_argument("--content-csv", help="コンテンツ一覧.csv")
+    inputs.add_argument("--curriculum-csv", help="カリキュラム一覧.csv")
+    inputs.add_argument("--course-csv", help="コース一覧.csv")
+    args = parser.parse_args(argv)
+
+    overrides = {}
+    if args.config:
+        try:
+            overrides.update(load_config(args.config))
+        except (OSError, ValueError) as e:
+            parser.error(f"could not read config: {e}")
+    for field in ("content_csv", "curriculum_csv", "course_csv"):
+        if getattr(args, field) is not None:
+            overrides[field] = getattr(args, field)
+    paths = make_paths(**overrides)
+    for field in ("content_csv", "curriculum_csv", "course_csv"):
+        if not os.path.exists(getattr(paths, field)):
+            parser.error(f"{getattr(paths, field)} not found (pass --{field.replace('_', '-')} or --config)")
+
+    if args.shard_dir:
+        os.makedirs(args.shard_dir, exist_ok=True)
+    search_index = SearchIndexBuilder() if args.search_index else None
+    if args.out == "-":
+        matches = write_ts(sys.stdout, args.layout, args.shard_dir, search_index, paths)
+    else:
+        with open(args.out, 'w', encoding='utf-8') as out:
+            matches = write_ts(out, args.layout, args.shard_dir, search_index, paths)
+    # 標準出力には TS を書くことがあるので、レポートは標準エラーに出す
+    matches.report(sys.stderr)
+    if args.match_report:
+        matches.write_json(args.match_report)
+    if search_index is not None:
+        with open(args.search_index, 'w', encoding='utf-8') as f:
+            f.writelines(search_index.build().iter_ts())
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,277 @@
+"""YouTube の視聴ページから再生時間をまとめて取得する非同期フェッチャー。
+
+- ホストごとに keep-alive の HTTP 接続をプールして使い回す
+- トークンバケットでリクエストレートを、セマフォで同時実行数を制限する
+- ソケットのタイムアウト（接続と1回ごとの読み込み）と、429/5xx に対する指数バックオフ（ジッター付き）
+- 失敗は FetchResult として呼び出し側に返し、次回の再取得に回せるようにする
+- 同じ動画 ID の取得が実行中なら新しく取りに行かず、その結果を共有する（SingleFlight）
+- 視聴ページは少しずつ読み、approxDurationMs（または非公開・削除の印）が
+  見つかった時点で読むのをやめる（1MB 超のページを最後まで受け取らない）
+
+base_url を差し替えればローカルのスタブサーバー
+（scripts/stub_youtube_server.py）に向けて動作確認できる。
+"""
+import asyncio
+import http.client
+import random
+import re
+import time
+import urllib.parse
+from collections import namedtuple
+
+DEFAULT_BASE_URL = "https://www.youtube.com"
+FALLBACK_DURATION = "10:00"
+
+DURATION_RE = re.compile(rb'"approxDurationMs":"(\d+)"')
+# 削除済み・非公開動画の視聴ページに出る playabilityStatus
+UNAVAILABLE_RE = re.compile(rb'"playabilityStatus":\{"status":"(ERROR|LOGIN_REQUIRED|UNPLAYABLE)"')
+
+# 視聴ページを読む単位と、チャンクの境目をまたぐ一致を拾うために重ねて検索する長さ
+READ_CHUNK = 64 * 1024
+SEARCH_OVERLAP = 128
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+NOT_FOUND_STATUSES = {404, 410}
+
+# status: "ok"（取得成功） / "unavailable"（削除・非公開） / "error"（リトライ上限到達など）
+FetchResult = namedtuple("FetchResult", "video_id status duration error attempts")
+
+
+def format_duration(ms):
+    seconds = ms // 1000
+    m, s = divmod(seconds, 60)
+    h, m = divmod(m, 60)
+    if h > 0:
+        return f"{h}:{m:02d}:{s:02d}"
+    return f"{m:02d}:{s:02d}"
+
+
+class TokenBucket:
+    """rate 回/秒で補充され、最大 capacity 回までバーストを許すレートリミッター"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class RetryableError(Exception):
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class ConnectionPool:
+    """1ホストに対する keep-alive 接続のプール。
+
+    http.client はブロッキングなので、実際の送受信はスレッドに逃がす。
+    接続は使い終わったらプールへ戻し、次のリクエストで再利用する。
+    タイムアウトは http.client のソケットのタイムアウトに任せる（スレッドは外から止められないので、
+    asyncio 側で先に諦めると、まだ読んでいる接続を閉じたり再利用したりすることになる）。
+    """
+
+    def __init__(self, base_url, size, timeout, stop_early=True):
+        parsed = urllib.parse.urlsplit(base_url)
+        self.scheme = parsed.scheme or "https"
+        self.host = parsed.hostname
+        self.port = parsed.port
+        self.prefix = parsed.path.rstrip("/")
+        self.timeout = timeout
+        self.stop_early = stop_early
+        self.idle = []
+        self.slots = asyncio.Semaphore(size)
+        self.connections_opened = 0
+        self.bytes_read = 0
+
+    def _connect(self):
+        self.connections_opened += 1
+        if self.scheme == "https":
+            return http.client.HTTPSConnection(self.host, self.port, timeout=self.timeout)
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def _do_request(self, conn, path):
+        conn.request("GET", self.prefix + path, headers={
+            "User-Agent": "Mozilla/5.0 (compatible; ehime-base-duration-fetcher)",
+            "Accept-Language": "ja,en;q=0.8",
+            "Connection": "keep-alive",
+        })
+        response = conn.getresponse()
+        if self.stop_early and response.status == 200:
+            body, complete = read_until_match(response, (DURATION_RE, UNAVAILABLE_RE))
+        else:
+            body, complete = response.read(), True
+        self.bytes_read += len(body)
+        # 途中で読むのをやめた接続には残りのレスポンスが溜まっているので、再利用せずに閉じる
+        return response.status, response.getheader("Retry-After"), body, response.will_close or not complete
+
+    async def get(self, path):
+        async with self.slots:
+            conn = self.idle.pop() if self.idle else self._connect()
+            request = asyncio.ensure_future(asyncio.to_thread(self._do_request, conn, path))
+            try:
+                status, retry_after, body, will_close = await asyncio.shield(request)
+            except asyncio.CancelledError:
+                # 呼び出し側がキャンセルされてもスレッドは読み続けるので、終わってから接続を閉じる
+                request.add_done_callback(lambda _: _discard(request, conn))
+                raise
+            except BaseException:
+                # タイムアウトや切断時は接続を捨てる（読みかけのレスポンスが残るため）
+                conn.close()
+                raise
+            if will_close:
+                conn.close()
+            else:
+                self.idle.append(conn)
+            return status, retry_after, body
+
+    def close(self):
+        for conn in self.idle:
+            conn.close()
+        self.idle.clear()
+
+
+def _discard(request, conn):
+    conn.close()
+    # 誰も待っていないタスクの例外を取り出しておく（"exception was never retrieved" を出さない）
+    if not request.cancelled():
+        request.exception()
+
+
+def read_until_match(response, patterns):
+    """patterns のどれかが見つかるまでレスポンスを読み、(読んだ分, 最後まで読んだか) を返す"""
+    buffer = bytearray()
+    while True:
+        chunk = response.read(READ_CHUNK)
+        if not chunk:
+            return bytes(buffer), True
+        start = max(0, len(buffer) - SEARCH_OVERLAP)
+        buffer += chunk
+        if any(pattern.search(buffer, start) for pattern in patterns):
+            # 小さなページなら一致した時点で読み終わっていることもある（その接続は再利用できる）
+            return bytes(buffer), response.isclosed()
+
+
+class SingleFlight:
+    """同じキーの処理が実行中なら、新しく始めずにその結果を待つ（Go の singleflight と同じ考え方）。
+
+    同じイベントループの中で共有すれば、別々の fetch_durations_async 呼び出しの間でもまとまる。
+    実行中のタスクはそのループのものなので、別のループ（asyncio.run ごと）で使い回すことはできない。
+    """
+
+    def __init__(self):
+        self.inflight = {}
+        self.loop = None
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key, make_coro):
+        loop = asyncio.get_running_loop()
+        if self.loop is None:
+            self.loop = loop
+        elif self.loop is not loop:
+            raise RuntimeError("SingleFlight is bound to another event loop; create one per asyncio.run")
+        self.calls += 1
+        task = self.inflight.get(key)
+        if task is None:
+            task = self.inflight[key] = asyncio.ensure_future(make_coro())
+            task.add_done_callback(lambda _: self.inflight.pop(key, None))
+        else:
+            self.coalesced += 1
+        # 待っている側の1つがキャンセルされても、共有しているタスクは止めない
+        return await asyncio.shield(task)
+
+
+def backoff_delay(attempt, base, cap, retry_after=None):
+    """指数バックオフ（フルジッター）。Retry-After があればそれを下限にする"""
+    delay = random.uniform(0, min(cap, base * (2 ** attempt)))
+    if retry_after:
+        try:
+            delay = max(delay, float(retry_after))
+        except ValueError:
+            pass
+    return delay
+
+
+async def fetch_one(pool, bucket, video_id, *, max_retries, backoff_base, backoff_max):
+    path = "/watch?" + urllib.parse.urlencode({"v": video_id})
+    last_error = None
+    for attempt in range(max_retries + 1):
+        if attempt:
+            await asyncio.sleep(backoff_delay(attempt - 1, backoff_base, backoff_max,
+                                              getattr(last_error, "retry_after", None)))
+        await bucket.acquire()
+        try:
+            status, retry_after, body = await pool.get(path)
+        except (OSError, http.client.HTTPException) as e:
+            last_error = RetryableError(f"{type(e).__name__}: {e}" if str(e) else type(e).__name__)
+            continue
+
+        if status in RETRY_STATUSES:
+            last_error = RetryableError(f"HTTP {status}", retry_after)
+            continue
+        if status in NOT_FOUND_STATUSES:
+            return FetchResult(video_id, "unavailable", None, f"HTTP {status}", attempt + 1)
+        if status != 200:
+            return FetchResult(video_id, "error", None, f"HTTP {status}", attempt + 1)
+
+        match = DURATION_RE.search(body)
+        if match:
+            return FetchResult(video_id, "ok", format_duration(int(match.group(1))), None, attempt + 1)
+        unavailable = UNAVAILABLE_RE.search(body)
+        if unavailable:
+            return FetchResult(video_id, "unavailable", None, unavailable.group(1).decode(), attempt + 1)
+        return FetchResult(video_id, "error", None, "approxDurationMs not found", attempt + 1)
+
+    return FetchResult(video_id, "error", None, str(last_error), max_retries + 1)
+
+
+async def fetch_durations_async(video_ids, *, base_url=DEFAULT_BASE_URL, rate=2.0, burst=None,
+                                concurrency=5, timeout=15.0, max_retries=4,
+                                backoff_base=1.0, backoff_max=30.0, on_result=None, stop_early=True,
+                                flight=None):
+    """video_ids の再生時間を取得し、{video_id: FetchResult} を返す。
+
+    on_result を渡すと、1件取得するごとに FetchResult を引数に呼び出す
+    （キャッシュへの逐次書き込みなどに使う）。同じ ID は何回渡されても1回しか取得せず、
+    on_result も1回だけ呼ぶ。flight（SingleFlight）を渡すと、同じイベントループの中の
+    ほかの呼び出しとその取得状況を共有する（fetch_durations では呼び出しごとに新しく作って渡す）。
+    stop_early=False ならページを最後まで読む（比較・調査用）。
+    """
+    pool = ConnectionPool(base_url, concurrency, timeout, stop_early)
+    bucket = TokenBucket(rate, burst)
+    flight = flight if flight is not None else SingleFlight()
+    results = {}
+
+    async def fetch(video_id):
+        result = await fetch_one(pool, bucket, video_id, max_retries=max_retries,
+                                 backoff_base=backoff_base, backoff_max=backoff_max)
+        if on_result:
+            on_result(result)
+        return result
+
+    async def worker(video_id):
+        results[video_id] = await flight.do(video_id, lambda: fetch(video_id))
+
+    try:
+        await asyncio.gather(*(worker(video_id) for video_id in video_ids))
+    finally:
+        pool.close()
+    return results
+
+
+def fetch_durations(video_ids, **kwargs):
+    """fetch_durations_async の同期版"""
+    return asyncio.run(fetch_durations_async(video_ids, **kwargs))
@@ -0,0 +1,181 @@
+"""動画の再生時間の取得元（DurationSource）。
+
+update_data_real.py はキャッシュにない動画 ID を、登録された取得元に順番に問い合わせる。
+前の取得元で解決できなかった ID だけが次に回る。
+
+- MetadataIndexSource: 手元のメタデータ（一括エクスポートした CSV / JSON / JSON Lines、
+  または yt-dlp の *.info.json などを置いたディレクトリ）を1回だけ読み込み、
+  すべての ID をネットワークなしで一度に解決する
+- ScraperSource: 視聴ページから approxDurationMs を取り出す（duration_fetcher）
+
+メタデータで受け付ける形式:
+    CSV / JSON のオブジェクト  video_id・videoId・id のいずれかと、
+                               duration_ms・approxDurationMs・lengthMs（ミリ秒）または
+                               duration・lengthSeconds（秒、"PT4M13S"、"4:13"）
+    YouTube Data API の videos.list  {"items": [{"id": ..., "contentDetails": {"duration": "PT4M13S"}}]}
+    ID → 再生時間の dict             {"dQw4w9WgXcQ": "3:33", ...}
+"""
+import csv
+import json
+import os
+import re
+
+from duration_fetcher import FetchResult, SingleFlight, fetch_durations, format_duration
+
+ID_KEYS = ("video_id", "videoId", "id")
+MS_KEYS = ("duration_ms", "approxDurationMs", "lengthMs")
+SECONDS_KEYS = ("duration", "lengthSeconds", "length_seconds")
+METADATA_SUFFIXES = (".json", ".jsonl", ".ndjson", ".csv")
+
+ISO_DURATION_RE = re.compile(r"^P(?:(\d+)D)?T?(?:(\d+)H)?(?:(\d+)M)?(?:(\d+(?:\.\d+)?)S)?$")
+CLOCK_RE = re.compile(r"^(?:(\d+):)?(\d{1,2}):(\d{2})$")
+
+
+def parse_seconds(value):
+    """秒数・"PT1H2M3S"・"1:02:03" / "02:03" を秒（int）にする。解釈できなければ None"""
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return int(value) if value >= 0 else None
+    text = str(value).strip()
+    if text.isdigit():
+        return int(text)
+    match = ISO_DURATION_RE.match(text)
+    if match and any(match.groups()):
+        days, hours, minutes, seconds = (float(g) if g else 0 for g in match.groups())
+        return int(((days * 24 + hours) * 60 + minutes) * 60 + seconds)
+    match = CLOCK_RE.match(text)
+    if match:
+        hours, minutes, seconds = (int(g) if g else 0 for g in match.groups())
+        return (hours * 60 + minutes) * 60 + seconds
+    return None
+
+
+def entry_from_object(obj):
+    """メタデータ1件から (動画 ID, "mm:ss") を取り出す。足りなければ None"""
+    video_id = next((obj[key] for key in ID_KEYS if obj.get(key)), None)
+    if isinstance(video_id, dict):
+        video_id = video_id.get("videoId")  # search.list の {"kind": ..., "videoId": ...}
+    if not video_id:
+        return None
+    for key in MS_KEYS:
+        if obj.get(key) not in (None, ""):
+            ms = parse_seconds(obj[key])
+            return (str(video_id), format_duration(ms)) if ms is not None else None
+    details = obj.get("contentDetails")
+    candidates = [obj.get(key) for key in SECONDS_KEYS]
+    if isinstance(details, dict):
+        candidates.append(details.get("duration"))
+    for value in candidates:
+        seconds = parse_seconds(value)
+        if seconds is not None:
+            return str(video_id), format_duration(seconds * 1000)
+    return None
+
+
+def iter_json_entries(data):
+    if isinstance(data, list):
+        for item in data:
+            yield from iter_json_entries(item)
+    elif isinstance(data, dict):
+        if isinstance(data.get("items"), list):
+            yield from iter_json_entries(data["items"])
+        elif any(key in data for key in ID_KEYS):
+            entry = entry_from_object(data)
+            if entry:
+                yield entry
+        else:
+            # {video_id: duration} の形
+            for video_id, value in data.items():
+                seconds = parse_seconds(value)
+                if seconds is not None:
+                    yield video_id, format_duration(seconds * 1000)
+
+
+def iter_metadata_file(path):
+    with open(path, "r", encoding="utf-8-sig") as f:
+        if path.endswith(".csv"):
+            for row in csv.DictReader(f):
+                entry = entry_from_object(row)
+                if entry:
+                    yield entry
+        elif path.endswith((".jsonl", ".ndjson")):
+            for line in f:
+                if line.strip():
+                    yield from iter_json_entries(json.loads(line))
+        else:
+            yield from iter_json_entries(json.load(f))
+
+
+def iter_metadata_paths(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                for name in sorted(names):
+                    if name.endswith(METADATA_SUFFIXES):
+                        yield os.path.join(root, name)
+        else:
+            yield path
+
+
+class DurationSource:
+    """動画 ID のリストを受け取り、解決できたものの FetchResult を返す取得元"""
+
+    name = "source"
+    # True なら結果が1件ずつ時間をかけて届くので、on_result で逐次記録させる
+    incremental = False
+
+    def resolve(self, video_ids, on_result=None):
+        """{video_id: FetchResult} を返す。解決できなかった ID は含めなくてよい"""
+        raise NotImplementedError
+
+
+class MetadataIndexSource(DurationSource):
+    name = "metadata"
+
+    def __init__(self, paths):
+        self.paths = list(paths)
+        self.index = None
+
+    def load(self):
+        """全ファイルを1回だけ読み、動画 ID → 再生時間の索引を作る（後に読んだファイルが優先）"""
+        if self.index is None:
+            index = {}
+            for path in iter_metadata_paths(self.paths):
+                try:
+                    index.update(iter_metadata_file(path))
+                except (OSError, ValueError) as e:
+                    print(f"Warning: skipped metadata file {path}: {e}")
+            self.index = index
+        return self.index
+
+    def resolve(self, video_ids, on_result=None):
+        index = self.load()
+        results = {}
+        for video_id in video_ids:
+            duration = index.get(video_id)
+            if duration is None:
+                continue
+            result = results[video_id] = FetchResult(video_id, "ok", duration, None, 0)
+            if on_result:
+                on_result(result)
+        return results
+
+
+class ScraperSource(DurationSource):
+    name = "scraper"
+    incremental = True
+
+    def __init__(self, **fetch_options):
+        # fetch_options は fetch_durations のキーワード引数（base_url, rate, concurrency など）
+        self.fetch_options = fetch_options
+        # これまでの resolve で SingleFlight がまとめた（取得を省いた）回数
+        self.coalesced = 0
+
+    def resolve(self, video_ids, on_result=None):
+        # fetch_durations は呼び出しごとに asyncio.run するので、SingleFlight もその中だけで使う
+        # （別のイベントループの Future は待てない）。同じ ID が重ねて渡されたら取得を1回にまとめる
+        flight = SingleFlight()
+        results = fetch_durations(video_ids, on_result=on_result, flight=flight, **self.fetch_options)
+        self.coalesced += flight.coalesced
+        return results
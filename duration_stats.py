@@ -0,0 +1,76 @@
+"""レッスンの再生時間の数値化と、カリキュラム（コース）ごとの集計。
+
+duration は "1:02:45" / "05:06" のような表示用の文字列なので、ビルド時に一度だけ秒にして
+ContentItem.durationSec として出力し、コースごとの合計時間・レッスン数・再生時間が取れなかった
+（FALLBACK_DURATION のままの）レッスン数もここでまとめて計算しておく。
+
+どちらも行ごとの処理ではなく、全レッスンの列（再生時間の文字列・取得できたかどうか・コース名）に対する
+一括処理で行う。文字列は dict で種類番号に置き換え、番号と秒の列の計算は numpy があれば
+配列演算と bincount で、なければ array モジュールの列を1回なめて同じ結果を出す。
+"""
+from array import array
+from collections import namedtuple
+
+from duration_sources import parse_seconds
+
+try:
+    import numpy as np
+except ImportError:  # numpy は任意（なくても結果は同じ）
+    np = None
+
+# 再生時間が取れなかったレッスンの、秒の列での値
+UNRESOLVED = -1
+
+# seconds: 再生時間が取れたレッスンの合計秒数 / lessons: レッスン数 / unresolved: 取れなかったレッスン数
+DurationTotals = namedtuple("DurationTotals", "seconds lessons unresolved")
+EMPTY_TOTALS = DurationTotals(0, 0, 0)
+
+
+def _parse(text):
+    seconds = parse_seconds(text)
+    return UNRESOLVED if seconds is None else seconds
+
+
+def factorize(values):
+    """値の列 → (値の種類のリスト, 各行の種類番号の列)。文字列の比較は dict に任せる"""
+    codes_by_value = {}
+    codes = array("l", [codes_by_value.setdefault(value, len(codes_by_value)) for value in values])
+    return list(codes_by_value), codes
+
+
+def seconds_column(durations, resolved):
+    """再生時間の文字列の列 → 秒の列（array('q')）。resolved が偽の行と解釈できない値は UNRESOLVED。
+
+    文字列の種類はレッスン数よりずっと少ないので、種類ごとに1回だけ解釈する。
+    """
+    uniques, codes = factorize(durations)
+    table = array("q", [_parse(text) for text in uniques])
+    if np is not None and codes:
+        column = np.where(np.asarray(resolved, dtype=bool), np.frombuffer(table, dtype=np.int64)[np.asarray(codes)], UNRESOLVED)
+        return array("q", column.astype(np.int64).tobytes())
+    return array("q", [table[code] if ok else UNRESOLVED for code, ok in zip(codes, resolved)])
+
+
+def course_totals(courses, seconds):
+    """レッスンごとのコース名と秒の列から、コース名 → DurationTotals を作る"""
+    names, codes = factorize(courses)
+    size = len(names)
+    if np is not None and codes:
+        codes = np.asarray(codes)
+        values = np.frombuffer(seconds, dtype=np.int64)
+        unresolved = values == UNRESOLVED
+        totals = np.bincount(codes, weights=np.where(unresolved, 0, values), minlength=size).tolist()
+        lessons = np.bincount(codes, minlength=size).tolist()
+        missing = np.bincount(codes, weights=unresolved, minlength=size).tolist()
+    else:
+        totals, lessons, missing = [0] * size, [0] * size, [0] * size
+        for code, value in zip(codes, seconds):
+            lessons[code] += 1
+            if value == UNRESOLVED:
+                missing[code] += 1
+            else:
+                totals[code] += value
+    return {
+        name: DurationTotals(int(totals[code]), lessons[code], int(missing[code]))
+        for code, name in enumerate(names)
+    }
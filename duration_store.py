@@ -0,0 +1,165 @@
+"""動画 ID → 再生時間のキャッシュ層。
+
+duration_cache.json（スナップショット）と追記専用のジャーナル
+（duration_cache.json.journal, JSON Lines）の2ファイルで構成する。
+
+- put() のたびにジャーナルへ1行追記して fsync するので、
+  途中でクラッシュ・Ctrl-C しても取得済みの結果は失われない
+- エントリごとに取得時刻を持ち、TTL を過ぎたものは再取得の対象になる
+- 削除済み・非公開動画は "unavailable" として記録し（ネガティブキャッシュ）、
+  negative_ttl の間は再取得しない
+- compact() でスナップショットをアトミックに書き直し、ジャーナルを空にする
+
+旧形式の duration_cache.json（{video_id: "mm:ss"}）もそのまま読み込める（読み込んだ時点で取得したものとして扱う）。
+"""
+import json
+import os
+import threading
+import time
+
+SNAPSHOT_VERSION = 2
+DAY = 24 * 60 * 60
+
+
+class DurationStore:
+    def __init__(self, path, ttl=90 * DAY, negative_ttl=14 * DAY):
+        self.path = path
+        self.journal_path = f"{path}.journal"
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.journal = None
+        self._load()
+
+    # --- 読み込み ---
+
+    def _load(self):
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Warning: could not read {self.path}: {e}")
+                data = {}
+            if not isinstance(data, dict):
+                print(f"Warning: ignoring {self.path} (expected a JSON object)")
+                data = {}
+            if data.get("version") == SNAPSHOT_VERSION:
+                entries = data.get("entries", {})
+                self.entries = entries if isinstance(entries, dict) else {}
+            else:
+                # 旧形式: 取得時刻がないので、移行した時点で取得したものとみなす
+                # （ファイルの更新時刻を使うと、3か月より古いキャッシュが一度に TTL 切れになり全件を取り直す）
+                fetched_at = time.time()
+                self.entries = {
+                    video_id: {"status": "ok", "duration": duration, "fetched_at": fetched_at}
+                    for video_id, duration in data.items() if isinstance(duration, str)
+                }
+
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # 書き込み途中で落ちた最終行は捨てる
+                        continue
+                    self._apply(record)
+
+    def _apply(self, record):
+        video_id = record.pop("id")
+        current = self.entries.get(video_id)
+        # 再検証の失敗で、取得済みの再生時間を消さない
+        if record["status"] == "error" and current and current["status"] == "ok":
+            current["last_error"] = record.get("error")
+            return
+        self.entries[video_id] = record
+
+    # --- 参照 ---
+
+    def get(self, video_id):
+        with self.lock:
+            return self.entries.get(video_id)
+
+    def duration(self, video_id):
+        """取得済みの再生時間（TTL 切れでも返す）。なければ None"""
+        entry = self.get(video_id)
+        if entry and entry["status"] == "ok":
+            return entry["duration"]
+        return None
+
+    def is_fresh(self, entry, now=None):
+        if entry is None or entry["status"] == "error":
+            return False
+        now = time.time() if now is None else now
+        ttl = self.ttl if entry["status"] == "ok" else self.negative_ttl
+        return now - entry["fetched_at"] < ttl
+
+    def needs_fetch(self, video_id, now=None):
+        return not self.is_fresh(self.get(video_id), now)
+
+    def failures(self):
+        with self.lock:
+            return {
+                video_id: entry for video_id, entry in self.entries.items()
+                if entry["status"] != "ok"
+            }
+
+    # --- 書き込み ---
+
+    def put(self, video_id, status, duration=None, error=None, fetched_at=None):
+        """1件を記録し、ジャーナルに追記して fsync するまで戻らない"""
+        self.put_many([(video_id, status, duration, error)], fetched_at)
+
+    def put_many(self, items, fetched_at=None):
+        """(video_id, status, duration, error) をまとめて記録する（fsync は1回だけ）"""
+        now = time.time() if fetched_at is None else fetched_at
+        records = []
+        for video_id, status, duration, error in items:
+            record = {"id": video_id, "status": status, "fetched_at": now}
+            if duration is not None:
+                record["duration"] = duration
+            if error is not None:
+                record["error"] = error
+            records.append(record)
+        if not records:
+            return
+        text = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+        with self.lock:
+            if self.journal is None:
+                self.journal = open(self.journal_path, 'a', encoding='utf-8')
+            self.journal.write(text)
+            self.journal.flush()
+            os.fsync(self.journal.fileno())
+            for record in records:
+                self._apply(record)
+
+    def record(self, result):
+        """duration_fetcher.FetchResult をそのまま記録する"""
+        self.put(result.video_id, result.status, result.duration, result.error)
+
+    def record_many(self, results):
+        self.put_many((r.video_id, r.status, r.duration, r.error) for r in results)
+
+    def compact(self):
+        """スナップショットをアトミックに書き直し、ジャーナルを空にする"""
+        with self.lock:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"version": SNAPSHOT_VERSION, "entries": self.entries},
+                          f, ensure_ascii=False, sort_keys=True)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+            if self.journal is not None:
+                self.journal.close()
+                self.journal = None
+            if os.path.exists(self.journal_path):
+                os.remove(self.journal_path)
+
+    def close(self):
+        with self.lock:
+            if self.journal is not None:
+                self.journal.close()
+                self.journal = None
@@ -0,0 +1,43 @@
+"""mock_elearning_data.ts を生成するスクリプト間で共有する TS スニペット。
+
+出力レイアウト:
+    nested      カリキュラムごとにレッスンの中身を丸ごと埋め込む（従来形式）
+    normalized  カリキュラムはレッスン ID の配列だけを持ち、
+                ALL_CONTENT を引くアクセサで lessons を解決する
+"""
+
+LAYOUTS = ("nested", "normalized")
+
+# normalized レイアウトで ALL_CONTENT の後ろに出力する。
+# ALL_CURRICULUMS は CurriculumDef[] のままなので、利用側のコードは変更不要。
+NORMALIZED_ACCESSOR_TS = """
+export interface CurriculumRow extends Omit<CurriculumDef, 'lessons'> {
+    lessonIds: string[];
+}
+
+const CONTENT_BY_ID = new Map<string, ContentItem>();
+for (const item of ALL_CONTENT) {
+    if (!CONTENT_BY_ID.has(item.id)) CONTENT_BY_ID.set(item.id, item);
+}
+
+export function getLessonsByIds(ids: string[]): ContentItem[] {
+    const lessons: ContentItem[] = [];
+    for (const id of ids) {
+        const item = CONTENT_BY_ID.get(id);
+        if (item) lessons.push(item);
+    }
+    return lessons;
+}
+
+function withLessons(row: CurriculumRow): CurriculumDef {
+    // lessons は参照されたときに ALL_CONTENT から解決する
+    return {
+        ...row,
+        get lessons() {
+            return getLessonsByIds(row.lessonIds);
+        },
+    };
+}
+"""
+
+NORMALIZED_CURRICULUMS_TS = "export const ALL_CURRICULUMS: CurriculumDef[] = CURRICULUM_ROWS.map(withLessons);\n"
@@ -1,7 +1,58 @@
+"""organizations / jobs のシード SQL を生成する。
 
-import re
+出力形式:
+    insert   バッチごとの INSERT 文（--batch-size 行ずつ）
+    copy     PostgreSQL の COPY テキスト形式（TSV）
+    binary   PostgreSQL の COPY バイナリ形式（--out-dir 必須）
+
+--out を指定しなければ psql にそのまま流せる SQL を標準出力に書く。
+--out-dir を指定するとテーブルごとのファイルと、FK の順に読み込む load.sql を書く。
+
+--delta SNAPSHOT を付けると、前回出力した行のハッシュ（UUID ごと）と比べて、
+変わった行の INSERT ... ON CONFLICT DO UPDATE と、なくなった行の DELETE だけを書く。
+何度流しても同じ結果になるので、ステージング環境を reset.sql なしで更新できる。
+新しいスナップショットは SNAPSHOT.pending に書くだけで、差分を DB に流し終えてから
+--commit-snapshot SNAPSHOT で昇格させる（流さなかった・失敗した差分は、次の --delta でも
+前回の確定済みスナップショットとの差分としてもう一度出る）。連番方式の UUID はデータの並びが変わると
+振り直されるので、差分を小さく保つには --uuid-scheme uuid5 を使う。
+
+DELETE は参照する側から（jobs → organizations）流す。jobs.organization_id は ON DELETE CASCADE なので、
+まだ残っている求人が参照している組織を消すと、その求人も DB から消えてスナップショットとずれる。
+そのため、残っている行が参照している行を消す差分は書かずにエラーにする（先に求人を消すか付け替える）。
+
+行の整形はプロセスプールで並列に行う（PARALLEL_MIN_ROWS 行未満のテーブルはプールを起動せずに整形する）。
+チャンクの切り方は --workers に依存しないので、同じ入力・同じオプションなら出力はバイト単位で同じになる。
+
+    python generate_seed.py > seed_jobs.sql
+    python generate_seed.py --format copy --uuid-scheme uuid5 --out-dir seed_out
+    python generate_seed.py --uuid-scheme uuid5 --delta seed_snapshot.json --out seed_delta.sql
+    psql -v ON_ERROR_STOP=1 -f seed_delta.sql && python generate_seed.py --commit-snapshot seed_snapshot.json
+"""
+import argparse
+import hashlib
 import json
+import os
+import struct
+import sys
 import uuid
+from collections import deque, namedtuple
+from functools import lru_cache
+from itertools import chain
+from multiprocessing import Pool
+
+# UUID の採番方式
+#   legacy  a0ee0000-0000-0000-0000-000000000001 のような連番（seed.sql やアプリ側のコードが参照している形式）
+#   uuid5   元データの ID から決まる UUID（順序に依存しないので、大量データや差分生成向き）
+UUID_SCHEMES = ("legacy", "uuid5")
+SEED_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, "https://ehime-base.example.com/seed")
+
+FORMATS = ("insert", "copy", "binary")
+DEFAULT_BATCH_SIZE = 1000
+# copy / binary 形式でワーカーに渡す1チャンクの行数
+COPY_CHUNK_ROWS = 5000
+# これより行数の少ないテーブルはプロセスプールを使わずにこのプロセスで整形する
+# （組み込みのデータのような数十行では、ワーカーの起動のほうが整形よりずっと高くつく）
+PARALLEL_MIN_ROWS = 20000
 
 # Mappings for IDs
 company_id_map = {}
@@ -11,21 +62,58 @@ job_id_map = {}
 org_uuid_counter = 1
 job_uuid_counter = 1
 
+uuid_scheme = "legacy"
+
+@lru_cache(maxsize=1 << 16)
+def seed_uuid5(name):
+    """str(uuid.uuid5(SEED_NAMESPACE, name)) と同じ値を、UUID オブジェクトを作らずに求める"""
+    digest = bytearray(hashlib.sha1(SEED_NAMESPACE.bytes + name.encode("utf-8")).digest()[:16])
+    digest[6] = (digest[6] & 0x0F) | 0x50
+    digest[8] = (digest[8] & 0x3F) | 0x80
+    h = digest.hex()
+    return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
 def get_org_uuid(original_id):
     global org_uuid_counter
+    if uuid_scheme == "uuid5":
+        return seed_uuid5(f"organizations/{original_id}")
     if original_id not in company_id_map:
         # Generate deterministic UUID like a0ee0000-0000-0000-0000-000000000001
-        company_id_map[original_id] = f"a0ee0000-0000-0000-0000-00000000{org_uuid_counter:04d}"
+        # （12桁なので 9999 件を超えても形式が崩れない。9999 件までは従来と同じ値）
+        company_id_map[original_id] = f"a0ee0000-0000-0000-0000-{org_uuid_counter:012d}"
         org_uuid_counter += 1
     return company_id_map[original_id]
 
 def get_job_uuid(original_id):
     global job_uuid_counter
+    if uuid_scheme == "uuid5":
+        return seed_uuid5(f"jobs/{original_id}")
     if original_id not in job_id_map:
-        job_id_map[original_id] = f"b0ee0000-0000-0000-0000-00000000{job_uuid_counter:04d}"
+        job_id_map[original_id] = f"b0ee0000-0000-0000-0000-{job_uuid_counter:012d}"
         job_uuid_counter += 1
     return job_id_map[original_id]
 
+def assign_legacy_uuids(companies, jobs):
+    """連番方式の UUID を、従来の出力と同じ順序（組織 → 求人ごとに求人・組織）で先に割り当てる。
+
+    ワーカーは割り当て済みの対応表を受け取るので、どのチャンクをどのプロセスが
+    処理しても同じ UUID になる。
+    """
+    for c in companies:
+        get_org_uuid(c["id"])
+    for j in jobs:
+        get_job_uuid(j["id"])
+        get_org_uuid(j["companyId"])
+    return dict(company_id_map), dict(job_id_map)
+
+def configure_uuids(scheme, company_map=None, job_map=None):
+    global uuid_scheme
+    uuid_scheme = scheme
+    if company_map is not None:
+        company_id_map.update(company_map)
+    if job_map is not None:
+        job_id_map.update(job_map)
+
 # Minimal dummy data replica for script (pasted from viewed file)
 # I will use a simplified structure based on what I read to avoid parsing complex TS
 companies = [
@@ -74,67 +162,460 @@ jobs = [
 ]
 
 
-# Generate SQL
-print("-- Organizations")
-print("INSERT INTO organizations (id, name, industry, location, description, is_premium, logo_url, cover_image_url, representative_name, established_date, employee_count, capital, website_url, type)")
-print("VALUES")
-
-org_values = []
-for c in companies:
-    uuid_str = get_org_uuid(c["id"])
-    name = c["name"]
-    industry = c["industry"]
-    location = c["location"]
-    description = c.get("description", "")
-    is_premium = str(c.get("isPremium", False)).lower()
-    logo_url = c.get("image", "")
-    cover_image_url = c.get("image", "")
-    representative_name = c.get("representative", "")
-    established_date = str(c.get("foundingYear", ""))
-    employee_count = c.get("employeeCount", "")
-    capital = c.get("capital", "")
-    website_url = c.get("website", "")
-    
-    # Escape single quotes
-    description = description.replace("'", "''")
-    
-    val = f"('{uuid_str}', '{name}', '{industry}', '{location}', '{description}', {is_premium}, '{logo_url}', '{cover_image_url}', '{representative_name}', '{established_date}', '{employee_count}', '{capital}', '{website_url}', 'company')"
-    org_values.append(val)
-
-print(",\n".join(org_values) + ";")
-
-print("\n-- Jobs")
-print("INSERT INTO jobs (id, organization_id, title, type, category, description, is_active, salary, working_hours, holidays, selection_process, welfare, location, reward)")
-print("VALUES")
-
-job_values = []
-for j in jobs:
-    uuid_str = get_job_uuid(j["id"])
-    company_uuid = get_org_uuid(j["companyId"])
-    title = j["title"]
-    type_ = j["type"]
-    category = j["category"]
-    description = j["description"]
-    is_active = "true"
-    salary = j.get("salary", "NULL")
-    working_hours = j.get("workingHours", "NULL")
-    holidays = j.get("holidays", "NULL")
-    selection_process = j.get("selectionProcess", "NULL")
-    welfare = j.get("welfare", "NULL")
-    location = j.get("location", "NULL")
-    reward = j.get("reward", "NULL")
-    
-    # Escape quotes
-    description = description.replace("'", "''")
-    if salary != "NULL": salary = f"'{salary}'"
-    if working_hours != "NULL": working_hours = f"'{working_hours}'"
-    if holidays != "NULL": holidays = f"'{holidays}'"
-    if selection_process != "NULL": selection_process = f"'{selection_process}'"
-    if welfare != "NULL": welfare = f"'{welfare}'"
-    if location != "NULL": location = f"'{location}'"
-    if reward != "NULL": reward = f"'{reward}'"
-
-    val = f"('{uuid_str}', '{company_uuid}', '{title}', '{type_}', '{category}', '{description}', {is_active}, {salary}, {working_hours}, {holidays}, {selection_process}, {welfare}, {location}, {reward})"
-    job_values.append(val)
-
-print(",\n".join(job_values) + ";")
+# ------------------------------------------------------------------
+# テーブル定義
+# ------------------------------------------------------------------
+
+# columns: (列名, 型) のタプル。型は uuid / text / bool / int（binary 形式のエンコードに使う）
+SeedTable = namedtuple("SeedTable", "name label columns to_row")
+
+def organization_row(c):
+    return (
+        get_org_uuid(c["id"]),
+        c["name"],
+        c["industry"],
+        c["location"],
+        c.get("description", ""),
+        bool(c.get("isPremium", False)),
+        c.get("image", ""),
+        c.get("image", ""),
+        c.get("representative", ""),
+        str(c.get("foundingYear", "")),
+        c.get("employeeCount", ""),
+        c.get("capital", ""),
+        c.get("website", ""),
+        "company",
+    )
+
+def job_row(j):
+    return (
+        get_job_uuid(j["id"]),
+        get_org_uuid(j["companyId"]),
+        j["title"],
+        j["type"],
+        j["category"],
+        j["description"],
+        True,
+        j.get("salary"),
+        j.get("workingHours"),
+        j.get("holidays"),
+        j.get("selectionProcess"),
+        j.get("welfare"),
+        j.get("location"),
+        j.get("reward"),
+    )
+
+# FK の順（organizations → jobs）に並べる
+SEED_TABLES = (
+    SeedTable("organizations", "Organizations", (
+        ("id", "uuid"), ("name", "text"), ("industry", "text"), ("location", "text"),
+        ("description", "text"), ("is_premium", "bool"), ("logo_url", "text"),
+        ("cover_image_url", "text"), ("representative_name", "text"), ("established_date", "text"),
+        ("employee_count", "text"), ("capital", "text"), ("website_url", "text"), ("type", "text"),
+    ), organization_row),
+    SeedTable("jobs", "Jobs", (
+        ("id", "uuid"), ("organization_id", "uuid"), ("title", "text"), ("type", "text"),
+        ("category", "text"), ("description", "text"), ("is_active", "bool"), ("salary", "text"),
+        ("working_hours", "text"), ("holidays", "text"), ("selection_process", "text"),
+        ("welfare", "text"), ("location", "text"), ("reward", "text"),
+    ), job_row),
+)
+TABLES_BY_NAME = {table.name: table for table in SEED_TABLES}
+
+# FK: テーブル名 → ((列名, 参照先のテーブル名), ...)。差分で参照先の行だけが消えないかの確認に使う
+FOREIGN_KEYS = {
+    "jobs": (("organization_id", "organizations"),),
+}
+
+# ON CONFLICT に使う主キー（既定は id）
+CONFLICT_KEYS = {
+    "rpg_progress": ("user_id",),
+}
+
+def column_list(table):
+    return ", ".join(name for name, _ in table.columns)
+
+def conflict_key(table):
+    return CONFLICT_KEYS.get(table.name, ("id",))
+
+def upsert_clause(table):
+    """ON CONFLICT ... DO UPDATE。値が変わらない行は書き換えない（WAL と不要な行バージョンを増やさない）"""
+    keys = conflict_key(table)
+    columns = [name for name, _ in table.columns if name not in keys]
+    if not columns:
+        return f"ON CONFLICT ({', '.join(keys)}) DO NOTHING"
+    assignments = ", ".join(f"{name} = EXCLUDED.{name}" for name in columns)
+    current = ", ".join(f"{table.name}.{name}" for name in columns)
+    excluded = ", ".join(f"EXCLUDED.{name}" for name in columns)
+    return (f"ON CONFLICT ({', '.join(keys)}) DO UPDATE SET {assignments}\n"
+            f"WHERE ({current}) IS DISTINCT FROM ({excluded})")
+
+
+# ------------------------------------------------------------------
+# 値のエンコード
+# ------------------------------------------------------------------
+
+def sql_literal(value):
+    """INSERT 用のリテラル（standard_conforming_strings = on 前提）"""
+    if value is None:
+        return "NULL"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, int):
+        return str(value)
+    text = str(value)
+    if "\x00" in text:
+        raise ValueError(f"NUL character cannot be stored in a text column: {text!r}")
+    return "'" + text.replace("'", "''") + "'"
+
+def copy_text_field(value):
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    text = str(value)
+    if "\x00" in text:
+        raise ValueError(f"NUL character cannot be stored in a text column: {text!r}")
+    # str.translate は非 ASCII の文字列で遅いので replace を重ねる
+    return text.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+PGCOPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack(">ii", 0, 0)
+PGCOPY_TRAILER = struct.pack(">h", -1)
+NULL_FIELD = struct.pack(">i", -1)
+
+def copy_binary_field(value, column_type):
+    if value is None:
+        return NULL_FIELD
+    if column_type == "uuid":
+        data = bytes.fromhex(value.replace("-", ""))
+    elif column_type == "bool":
+        data = b"\x01" if value else b"\x00"
+    elif column_type == "int":
+        data = struct.pack(">i", value)
+    else:
+        data = str(value).encode("utf-8")
+    return struct.pack(">i", len(data)) + data
+
+
+# ------------------------------------------------------------------
+# チャンク単位の整形（ワーカープロセスで実行される）
+# ------------------------------------------------------------------
+
+def render_insert(table, rows, upsert=False):
+    values = ",\n".join("(" + ", ".join(map(sql_literal, row)) + ")" for row in rows)
+    conflict = f"\n{upsert_clause(table)}" if upsert else ""
+    return f"INSERT INTO {table.name} ({column_list(table)})\nVALUES\n{values}{conflict};\n"
+
+def render_chunk(task):
+    """(SeedTable, 形式, レコードの iterable) を整形し、書き出す bytes を返す"""
+    table, fmt, records = task
+    rows = [table.to_row(record) for record in records]
+    if fmt == "insert":
+        return render_insert(table, rows).encode("utf-8")
+    if fmt == "copy":
+        return "".join("\t".join(map(copy_text_field, row)) + "\n" for row in rows).encode("utf-8")
+    types = [column_type for _, column_type in table.columns]
+    header = struct.pack(">h", len(types))
+    return b"".join(
+        header + b"".join(copy_binary_field(value, column_type) for value, column_type in zip(row, types))
+        for row in rows
+    )
+
+def chunked(records, size):
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+# ------------------------------------------------------------------
+# 出力
+# ------------------------------------------------------------------
+
+class SeedWriter:
+    """テーブルごとにレコードをチャンクへ分け、並列に整形して順番どおりに書き出す"""
+
+    def __init__(self, fmt, batch_size=DEFAULT_BATCH_SIZE, workers=None, scheme="legacy",
+                 company_map=None, job_map=None):
+        self.fmt = fmt
+        self.chunk_rows = batch_size if fmt == "insert" else COPY_CHUNK_ROWS
+        configure_uuids(scheme, company_map, job_map)
+        if workers is None:
+            workers = os.cpu_count() or 1
+        self.workers = workers
+        self.uuid_args = (scheme, company_map, job_map)
+        # 結果待ちのチャンクはこの数までしか投入しない（出力を全部メモリに溜めないため）
+        self.max_pending = workers * 2
+        # プールは PARALLEL_MIN_ROWS 行以上のテーブルが来たときに初めて起動する
+        self.pool = None
+
+    def chunks(self, table, records):
+        """整形済みのチャンクを投入順に返す。
+
+        records が chunks(size) を持っていれば（seed_synthetic のように）
+        ワーカー側でレコードを生成するチャンクをそのまま渡す。
+        """
+        if hasattr(records, "chunks"):
+            parts = records.chunks(self.chunk_rows)
+        else:
+            parts = chunked(records, self.chunk_rows)
+        # 並列にする価値があるか、PARALLEL_MIN_ROWS 行に達するまで先読みして確かめる
+        head, rows = [], 0
+        for part in parts:
+            head.append(part)
+            rows += len(part)
+            if rows >= PARALLEL_MIN_ROWS:
+                break
+        tasks = ((table, self.fmt, part) for part in chain(head, parts))
+        if self.workers <= 1 or rows < PARALLEL_MIN_ROWS:
+            return map(render_chunk, tasks)
+        if self.pool is None:
+            self.pool = Pool(self.workers, initializer=configure_uuids, initargs=self.uuid_args)
+        return self._ordered(tasks)
+
+    def _ordered(self, tasks):
+        # Pool.imap はタスクを際限なく先読みするので、投入数を抑えながら投入順に結果を返す
+        pending = deque()
+        for task in tasks:
+            pending.append(self.pool.apply_async(render_chunk, (task,)))
+            if len(pending) >= self.max_pending:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
+
+    def write_table(self, out, table, records):
+        """テーブル1つ分のデータ部分を書く"""
+        if self.fmt == "binary":
+            out.write(PGCOPY_HEADER)
+        for data in self.chunks(table, records):
+            out.write(data)
+        if self.fmt == "binary":
+            out.write(PGCOPY_TRAILER)
+
+    def write_script(self, out, sources):
+        """psql にそのまま流せる1本の SQL を書く（insert / copy 形式）"""
+        for i, (table, records) in enumerate(sources):
+            out.write(("\n" if i else "").encode("utf-8") + f"-- {table.label}\n".encode("utf-8"))
+            if self.fmt == "copy":
+                out.write(f"COPY {table.name} ({column_list(table)}) FROM stdin;\n".encode("utf-8"))
+            self.write_table(out, table, records)
+            if self.fmt == "copy":
+                out.write(b"\\.\n")
+
+    def write_dir(self, out_dir, sources):
+        """テーブルごとのファイルと load.sql を out_dir に書く"""
+        os.makedirs(out_dir, exist_ok=True)
+        extension = {"insert": "sql", "copy": "tsv", "binary": "bin"}[self.fmt]
+        load_lines = ["-- 出力ディレクトリで psql -f load.sql を実行する", "BEGIN;"]
+        for table, records in sources:
+            file_name = f"{table.name}.{extension}"
+            with open(os.path.join(out_dir, file_name), "wb") as out:
+                self.write_table(out, table, records)
+            if self.fmt == "insert":
+                load_lines.append(f"\\i {file_name}")
+            else:
+                options = " WITH (FORMAT binary)" if self.fmt == "binary" else ""
+                load_lines.append(f"\\copy {table.name} ({column_list(table)}) FROM '{file_name}'{options}")
+        load_lines.append("COMMIT;")
+        with open(os.path.join(out_dir, "load.sql"), "w", encoding="utf-8") as f:
+            f.write("\n".join(load_lines) + "\n")
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+
+
+# ------------------------------------------------------------------
+# 差分出力（--delta）
+# ------------------------------------------------------------------
+# スナップショット: {"version": 1, "uuid_scheme": ..., "tables": {テーブル名: {主キー: 行のハッシュ}}}
+
+SNAPSHOT_VERSION = 1
+
+def row_key(table, row):
+    names = [name for name, _ in table.columns]
+    return "\x1f".join(str(row[names.index(key)]) for key in conflict_key(table))
+
+def row_digest(row):
+    # COPY テキスト形式の1行と同じ表現でハッシュを取る（None と空文字を区別するため）
+    return hashlib.sha1("\t".join(map(copy_text_field, row)).encode("utf-8")).hexdigest()[:16]
+
+def pending_path(path):
+    """差分を流し終えるまで新しいスナップショットを置いておく場所"""
+    return f"{path}.pending"
+
+def load_snapshot(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            snapshot = json.load(f)
+    except FileNotFoundError:
+        return {}
+    if not isinstance(snapshot, dict) or snapshot.get("version") != SNAPSHOT_VERSION:
+        print(f"Warning: ignoring {path} (unknown snapshot version)", file=sys.stderr)
+        return {}
+    return snapshot
+
+def save_snapshot(path, scheme, tables):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": SNAPSHOT_VERSION, "uuid_scheme": scheme, "tables": tables}, f, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def commit_snapshot(path):
+    """差分を流し終えたあとに SNAPSHOT.pending を SNAPSHOT に昇格させる"""
+    os.replace(pending_path(path), path)
+
+def diff_table(table, records, previous):
+    """(upsert する行のリスト, 削除する主キーのリスト, 今回のエントリ, FK 列ごとの参照先の値) を返す"""
+    names = [name for name, _ in table.columns]
+    foreign_keys = [(names.index(column), column, target) for column, target in FOREIGN_KEYS.get(table.name, ())]
+    entries, changed, references = {}, {}, {(column, target): set() for _, column, target in foreign_keys}
+    for record in records:
+        row = table.to_row(record)
+        for index, column, target in foreign_keys:
+            references[column, target].add(str(row[index]))
+        key = row_key(table, row)
+        digest = entries[key] = row_digest(row)
+        if previous.get(key) != digest:
+            # 同じ主キーが2回出てきたら後の行を使う（1文の upsert で同じ行を2回更新できないため）
+            changed[key] = row
+    removed = [key for key in previous if key not in entries]
+    return list(changed.values()), removed, entries, references
+
+def check_removed_references(diffs):
+    """残っている行が参照している行を消す差分なら ValueError（CASCADE で子の行まで消えるため）"""
+    removed = {table.name: set(keys) for table, _, keys, _, _ in diffs}
+    for table, _, _, _, references in diffs:
+        for (column, target), values in references.items():
+            orphaned = removed.get(target, set()) & values
+            if orphaned:
+                raise ValueError(f"{len(orphaned)} removed {target} rows are still referenced by "
+                                 f"{table.name}.{column} (e.g. {sorted(orphaned)[0]}); remove or reassign "
+                                 f"those {table.name} rows first")
+
+def render_delete(table, keys):
+    columns = conflict_key(table)
+    if len(columns) == 1:
+        values = ", ".join(sql_literal(key) for key in keys)
+        return f"DELETE FROM {table.name} WHERE {columns[0]} IN ({values});\n"
+    values = ", ".join("(" + ", ".join(map(sql_literal, key.split("\x1f"))) + ")" for key in keys)
+    return f"DELETE FROM {table.name} WHERE ({', '.join(columns)}) IN ({values});\n"
+
+def write_delta(out, sources, previous_tables, batch_size=DEFAULT_BATCH_SIZE):
+    """前回のエントリとの差分だけを1トランザクションの SQL として書き、(今回のエントリ, 集計) を返す。
+
+    DELETE は参照する側から（FK の逆順）、upsert は参照される側から（FK の順）に並べる。
+    残っている行が参照している行を消すことになるなら、何も書かずに ValueError。
+    """
+    diffs = [(table, *diff_table(table, records, previous_tables.get(table.name, {})))
+             for table, records in sources]
+    check_removed_references(diffs)
+    summary = {table.name: (len(changed), len(removed)) for table, changed, removed, _, _ in diffs}
+    out.write(b"-- Delta seed: " + ", ".join(
+        f"{name} {upserts} upserted / {deletes} deleted" for name, (upserts, deletes) in summary.items()
+    ).encode("utf-8") + b"\nBEGIN;\n")
+    for table, _, removed, _, _ in reversed(diffs):
+        for chunk in chunked(removed, batch_size):
+            out.write(f"-- {table.label} (removed)\n".encode("utf-8") + render_delete(table, chunk).encode("utf-8"))
+    for table, changed, _, _, _ in diffs:
+        for chunk in chunked(changed, batch_size):
+            out.write(f"-- {table.label}\n".encode("utf-8") + render_insert(table, chunk, upsert=True).encode("utf-8"))
+    out.write(b"COMMIT;\n")
+    return {table.name: entries for table, _, _, entries, _ in diffs}, summary
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="organizations / jobs のシード SQL を生成する")
+    parser.add_argument("--format", choices=FORMATS, default="insert", help="出力形式")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="INSERT 1文あたりの行数")
+    parser.add_argument("--uuid-scheme", choices=UUID_SCHEMES, default="legacy",
+                        help="legacy: a0ee0000-... の連番 / uuid5: 元データの ID から決まる UUID")
+    parser.add_argument("--workers", type=int, default=None, help="整形に使うプロセス数（既定: CPU 数）")
+    parser.add_argument("--out", default="-", help="SQL の出力先（既定: 標準出力）")
+    parser.add_argument("--out-dir", help="テーブルごとのファイルと load.sql を書き出すディレクトリ")
+    parser.add_argument("--delta", metavar="SNAPSHOT",
+                        help="前回のスナップショットとの差分（upsert と DELETE）だけを書き、"
+                             "新しいスナップショットを SNAPSHOT.pending に書く")
+    parser.add_argument("--commit-snapshot", metavar="SNAPSHOT",
+                        help="差分を DB に流し終えたあとに SNAPSHOT.pending を SNAPSHOT に昇格させて終了する")
+    return parser
+
+def write_delta_script(args, sources):
+    snapshot = load_snapshot(args.delta)
+    if snapshot and snapshot.get("uuid_scheme") != args.uuid_scheme:
+        print(f"Warning: {args.delta} was written with --uuid-scheme {snapshot.get('uuid_scheme')}; "
+              "every row will be replaced", file=sys.stderr)
+    previous = snapshot.get("tables", {})
+    pending = pending_path(args.delta)
+    if os.path.exists(pending):
+        print(f"Warning: {pending} was never committed; this delta also covers the changes it recorded",
+              file=sys.stderr)
+    if args.out == "-":
+        tables, summary = write_delta(sys.stdout.buffer, sources, previous, args.batch_size)
+        sys.stdout.buffer.flush()
+    else:
+        tmp_path = f"{args.out}.tmp"
+        try:
+            with open(tmp_path, "wb") as out:
+                tables, summary = write_delta(out, sources, previous, args.batch_size)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        os.replace(tmp_path, args.out)
+    # 確定済みのスナップショットは差分が DB に流れるまで進めない（--commit-snapshot で昇格させる）
+    save_snapshot(pending, args.uuid_scheme, tables)
+    for name, (upserts, deletes) in summary.items():
+        print(f"{name}: {upserts} upserted, {deletes} deleted", file=sys.stderr)
+    print(f"Wrote {pending}; after the delta is applied, run --commit-snapshot {args.delta}", file=sys.stderr)
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.commit_snapshot:
+        if args.delta:
+            parser.error("--commit-snapshot runs on its own, after the delta has been applied")
+        try:
+            commit_snapshot(args.commit_snapshot)
+        except FileNotFoundError:
+            parser.error(f"no pending snapshot at {pending_path(args.commit_snapshot)}")
+        print(f"Committed {pending_path(args.commit_snapshot)} -> {args.commit_snapshot}", file=sys.stderr)
+        return
+    if args.format == "binary" and not args.out_dir:
+        parser.error("--format binary requires --out-dir")
+    if args.batch_size < 1:
+        parser.error("--batch-size must be at least 1")
+    if args.delta and (args.format != "insert" or args.out_dir):
+        parser.error("--delta writes a single SQL script; use it with --format insert and without --out-dir")
+
+    company_map = job_map = None
+    if args.uuid_scheme == "legacy":
+        company_map, job_map = assign_legacy_uuids(companies, jobs)
+    sources = [(TABLES_BY_NAME["organizations"], companies), (TABLES_BY_NAME["jobs"], jobs)]
+    if args.delta:
+        # 差分はハッシュを取るために全行をこのプロセスで整形するので、ワーカーは使わない
+        configure_uuids(args.uuid_scheme, company_map, job_map)
+        try:
+            write_delta_script(args, sources)
+        except ValueError as e:
+            parser.error(str(e))
+        return
+    writer = SeedWriter(args.format, args.batch_size, args.workers, args.uuid_scheme, company_map, job_map)
+    try:
+        if args.out_dir:
+            writer.write_dir(args.out_dir, sources)
+        elif args.out == "-":
+            writer.write_script(sys.stdout.buffer, sources)
+            sys.stdout.buffer.flush()
+        else:
+            with open(args.out, "wb") as out:
+                writer.write_script(out, sources)
+    finally:
+        writer.close()
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,162 @@
-from docx2pdf import convert
+"""請求書 DOCX を PDF に変換する。
+
+エンジン:
+    direct       ファイル名（請求書_YYYYMMDD_金額.docx）から請求書の内容を復元し、
+                 create_invoice_pdf.py のレイアウトで PDF を直接描く（Word も LibreOffice も不要）
+    libreoffice  soffice --headless で DOCX をそのまま変換する（ワーカーごとに別プロファイル）
+    word         docx2pdf 経由で Microsoft Word に変換させる（macOS / Windows のみ、直列）
+
+    python scripts/convert_to_pdf.py --src ~/Downloads/個人事業請求書 --out-dir /tmp/pdf
+    python scripts/convert_to_pdf.py --engine libreoffice --workers 4
+"""
+import argparse
 import os
+import re
+import shutil
+import subprocess
 import sys
+import tempfile
+import time
+from multiprocessing import Pool
+
+ENGINES = ("direct", "libreoffice", "word")
+DEFAULT_TARGET_DIR = "/Users/yuyu24/Downloads/個人事業請求書"
+SOFFICE_TIMEOUT = 120
+
+# create_invoice.py が付けるファイル名（請求書_20250203_300000.docx）
+INVOICE_NAME_RE = re.compile(r"^請求書_(\d{4})(\d{2})(\d{2})_(\d+)\.docx$")
+
+
+def invoice_from_filename(filename):
+    """ファイル名から (振込日 "YYYY/MM/DD", 金額 "300,000") を返す。形式が違えば ValueError"""
+    match = INVOICE_NAME_RE.match(os.path.basename(filename))
+    if not match:
+        raise ValueError(f"cannot derive invoice fields from file name: {os.path.basename(filename)}")
+    year, month, day, amount = match.groups()
+    return f"{year}/{month}/{day}", f"{int(amount):,}"
+
+
+def pdf_path_for(docx_path, out_dir):
+    return os.path.join(out_dir, os.path.splitext(os.path.basename(docx_path))[0] + ".pdf")
+
+
+def convert_direct(docx_path, out_dir):
+    import create_invoice_pdf
+
+    date_str, amount_str = invoice_from_filename(docx_path)
+    pdf_path = pdf_path_for(docx_path, out_dir)
+    tmp_path = f"{pdf_path}.tmp"
+    create_invoice_pdf.create_pdf_invoice(date_str, amount_str, tmp_path, verbose=False)
+    os.replace(tmp_path, pdf_path)
+    return pdf_path
+
+
+def soffice_binary():
+    return shutil.which("soffice") or shutil.which("libreoffice")
+
+
+def convert_libreoffice(docx_path, out_dir):
+    binary = soffice_binary()
+    if binary is None:
+        raise RuntimeError("soffice (LibreOffice) not found on PATH")
+    # 同じプロファイルを複数の soffice が同時に使うと失敗するので、変換ごとに別のプロファイルを使う
+    with tempfile.TemporaryDirectory(prefix="soffice_profile_") as profile:
+        result = subprocess.run(
+            [binary, f"-env:UserInstallation=file://{profile}", "--headless",
+             "--convert-to", "pdf", "--outdir", out_dir, docx_path],
+            capture_output=True, text=True, timeout=SOFFICE_TIMEOUT,
+        )
+    pdf_path = pdf_path_for(docx_path, out_dir)
+    if result.returncode != 0 or not os.path.exists(pdf_path):
+        detail = (result.stderr or result.stdout).strip().splitlines()
+        raise RuntimeError(f"soffice exited with {result.returncode}: {detail[-1] if detail else 'no output'}")
+    return pdf_path
+
+
+def convert_word(docx_path, out_dir):
+    from docx2pdf import convert
 
-def convert_invoices_to_pdf(target_dir):
-    print(f"Target directory: {target_dir}")
-    
-    if not os.path.exists(target_dir):
-        print("Directory not found!")
-        return
+    pdf_path = pdf_path_for(docx_path, out_dir)
+    convert(docx_path, pdf_path)
+    return pdf_path
 
-    # Convert all docx files in the directory
+
+CONVERTERS = {"direct": convert_direct, "libreoffice": convert_libreoffice, "word": convert_word}
+
+
+def convert_task(task):
+    """ワーカーで1件を変換し、(DOCX のパス, PDF のパス or None, 秒数, エラー文字列 or None) を返す"""
+    engine, docx_path, out_dir = task
+    start = time.perf_counter()
     try:
-        print("Starting conversion... Microsoft Word will open.")
-        convert(target_dir)
-        print("Conversion complete.")
+        pdf_path = CONVERTERS[engine](docx_path, out_dir)
+        return docx_path, pdf_path, time.perf_counter() - start, None
     except Exception as e:
-        print(f"Error during conversion: {e}")
+        return docx_path, None, time.perf_counter() - start, f"{type(e).__name__}: {e}"
+
+
+def find_docx(src_dir):
+    return sorted(
+        os.path.join(src_dir, name) for name in os.listdir(src_dir)
+        if name.lower().endswith(".docx") and not name.startswith("~$")  # ~$ は Word のロックファイル
+    )
+
+
+def convert_invoices_to_pdf(target_dir, out_dir=None, engine="direct", workers=None, verbose=True):
+    """target_dir 内の DOCX をすべて変換し、1件ごとの結果のリストを返す"""
+    out_dir = out_dir or target_dir
+    if not os.path.isdir(target_dir):
+        raise FileNotFoundError(f"directory not found: {target_dir}")
+    os.makedirs(out_dir, exist_ok=True)
+
+    tasks = [(engine, path, out_dir) for path in find_docx(target_dir)]
+    if engine == "word":
+        workers = 1  # Word は1プロセスしか動かせない
+    workers = min(workers or os.cpu_count() or 1, len(tasks) or 1)
+
+    results = []
+    if workers > 1:
+        with Pool(workers) as pool:
+            for result in pool.imap_unordered(convert_task, tasks):
+                results.append(result)
+                if verbose:
+                    print_result(result)
+    else:
+        for task in tasks:
+            result = convert_task(task)
+            results.append(result)
+            if verbose:
+                print_result(result)
+    return results
+
+
+def print_result(result):
+    docx_path, pdf_path, seconds, error = result
+    name = os.path.basename(docx_path)
+    if error:
+        print(f"  FAILED {name} ({seconds:.2f}s): {error}")
+    else:
+        print(f"  ok     {name} -> {pdf_path} ({seconds:.2f}s)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="請求書 DOCX を PDF に変換する")
+    parser.add_argument("--src", default=DEFAULT_TARGET_DIR, help="DOCX のあるディレクトリ")
+    parser.add_argument("--out-dir", help="PDF の出力先（既定: --src と同じ）")
+    parser.add_argument("--engine", choices=ENGINES, default="direct")
+    parser.add_argument("--workers", type=int, default=None, help="プロセス数（既定: CPU 数。word は常に 1）")
+    args = parser.parse_args(argv)
+
+    print(f"Converting {args.src} with {args.engine}")
+    start = time.perf_counter()
+    results = convert_invoices_to_pdf(args.src, args.out_dir, args.engine, args.workers)
+    elapsed = time.perf_counter() - start
+
+    failed = [r for r in results if r[3]]
+    print(f"Converted {len(results) - len(failed)} of {len(results)} files in {elapsed:.2f}s"
+          + (f", {len(failed)} failed" if failed else ""))
+    return 1 if failed else 0
+
 
 if __name__ == "__main__":
-    target_directory = "/Users/yuyu24/Downloads/個人事業請求書"
-    convert_invoices_to_pdf(target_directory)
+    sys.exit(main())
@@ -1,110 +1,224 @@
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.units import mm
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.cidfonts import UnicodeCIDFont
+import argparse
+import csv
+import hashlib
+import json
 import os
 import datetime
-from dateutil.relativedelta import relativedelta
+import time
+from multiprocessing import Pool
 
-def register_font():
-    # CIDフォントを使用する（ファイルパス不要、最も互換性が高い）
-    # HeiseiKakuGo-W5 は太字のゴシック体
-    font_name = "HeiseiKakuGo-W5"
+from invoice_model import FORMATS, get_backend, invoice_filename as model_filename, parse_invoice
+
+# レイアウトを変えたら上げる（出力済みの請求書を作り直させるため）
+RENDER_VERSION = 1
+MANIFEST_NAME = ".invoice_manifest.json"
+DEFAULT_TARGET_DIR = "/Users/yuyu24/Downloads/個人事業請求書"
+
+# 描画は invoice_model の PdfBackend に任せる（レイアウトは create_invoice.py の DOCX と共通）
+
+def create_pdf_invoice(date_str, amount_str, output_filename, verbose=True):
+    get_backend("pdf").render(parse_invoice(date_str, amount_str), output_filename)
+    if verbose:
+        print(f"Generated PDF: {output_filename}")
+
+def create_pdf_batch(transactions, output_filename):
+    """複数の請求書を1つの PDF（1件1ページ）にまとめる。固定部分は Form XObject として1回だけ持つ"""
+    get_backend("pdf").render_pages(
+        (parse_invoice(date_str, amount_str) for date_str, amount_str in transactions), output_filename)
+
+# ------------------------------------------------------------------
+# バッチ生成
+# ------------------------------------------------------------------
+
+def normalize_transaction(date_value, amount_value):
+    """("2025/02/03" や "2025-02-03", "300,000" や 300000) → ("2025/02/03", "300,000")"""
+    date_text = str(date_value).strip()
+    for fmt in ("%Y/%m/%d", "%Y-%m-%d"):
+        try:
+            transfer_date = datetime.datetime.strptime(date_text, fmt)
+            break
+        except ValueError:
+            continue
+    else:
+        raise ValueError(f"invalid date: {date_value!r}")
+    amount_text = str(amount_value).replace(",", "").replace("¥", "").replace("円", "").strip()
+    if not amount_text.isdigit():
+        raise ValueError(f"invalid amount: {amount_value!r}")
+    return transfer_date.strftime("%Y/%m/%d"), f"{int(amount_text):,}"
+
+def read_transactions(path):
+    """CSV（date, amount 列）または JSONL（{"date": ..., "amount": ...}）から取引を読む"""
+    transactions = []
+    with open(path, "r", encoding="utf-8-sig") as f:
+        if path.endswith((".jsonl", ".ndjson")):
+            rows = (json.loads(line) for line in f if line.strip())
+        else:
+            rows = csv.DictReader(f)
+        for line_no, row in enumerate(rows, 1):
+            if "date" not in row or "amount" not in row:
+                raise ValueError(f"{path}: record {line_no} needs 'date' and 'amount' fields")
+            transactions.append(normalize_transaction(row["date"], row["amount"]))
+    return transactions
+
+def invoice_filename(date_str, amount_str, extension="pdf"):
+    return model_filename(parse_invoice(date_str, amount_str), extension)
+
+def input_hash(date_str, amount_str):
+    return hashlib.sha1(f"{RENDER_VERSION}\x1f{date_str}\x1f{amount_str}".encode("utf-8")).hexdigest()
+
+def file_sha1(path):
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def load_manifest(out_dir):
+    try:
+        with open(os.path.join(out_dir, MANIFEST_NAME), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_manifest(out_dir, manifest):
+    path = os.path.join(out_dir, MANIFEST_NAME)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def is_up_to_date(out_dir, manifest, filename, expected_input):
+    """出力が存在し、入力ハッシュと（前回記録した）出力の内容ハッシュが一致すれば True"""
+    entry = manifest.get(filename)
+    if not entry or entry.get("input") != expected_input:
+        return False
+    path = os.path.join(out_dir, filename)
     try:
-        pdfmetrics.registerFont(UnicodeCIDFont(font_name))
-        return font_name
-    except Exception as e:
-        print(f"Font registration warning: {e}")
-        return "Helvetica"
-
-def create_pdf_invoice(date_str, amount_str, output_filename):
-    c = canvas.Canvas(output_filename, pagesize=A4)
-    width, height = A4
-    font_name = register_font()
-
-    # Title
-    c.setFont(font_name, 24)
-    c.drawCentredString(width / 2, height - 30 * mm, "請 求 書")
-
-    # Header Info
-    c.setFont(font_name, 16)
-    # Recipient
-    c.drawString(20 * mm, height - 60 * mm, "合同会社EIS 御中")
-    c.setFont(font_name, 12)
-    c.drawString(20 * mm, height - 70 * mm, "件名：システム構築費")
-
-    # Sender (Right aligned manually)
-    c.setFont(font_name, 12)
-    sender_x = width - 60 * mm
-    c.drawString(sender_x, height - 60 * mm, "西村 友祐")
-    
-    # Invoice Date
-    transfer_date = datetime.datetime.strptime(date_str, "%Y/%m/%d")
-    invoice_date = transfer_date - relativedelta(months=1)
-    invoice_date_str = invoice_date.strftime("%Y年%m月%d日")
-    c.drawString(sender_x, height - 70 * mm, f"請求日：{invoice_date_str}")
-
-    # Spacer
-    
-    # Grand Total
-    c.setLineWidth(1)
-    c.setFont(font_name, 14)
-    c.drawString(width / 2 - 40*mm, height - 100 * mm, "ご請求金額")
-    c.setFont(font_name, 24)
-    c.drawString(width / 2 + 10*mm, height - 100 * mm, f"¥ {amount_str} -")
-    # Underline
-    c.line(width / 2 + 5*mm, height - 102 * mm, width / 2 + 70*mm, height - 102 * mm)
-
-    # Table Header
-    y_start = height - 130 * mm
-    c.setFont(font_name, 12)
-    c.rect(20*mm, y_start, 170*mm, 10*mm, fill=0) # Border
-    c.drawString(30*mm, y_start + 3*mm, "品目")
-    c.drawString(90*mm, y_start + 3*mm, "数量")
-    c.drawString(110*mm, y_start + 3*mm, "単価")
-    c.drawString(150*mm, y_start + 3*mm, "金額")
-
-    # Table Content
-    y_row = y_start - 10*mm
-    c.rect(20*mm, y_row, 170*mm, 10*mm, fill=0)
-    c.drawString(30*mm, y_row + 3*mm, "システム構築費")
-    c.drawString(95*mm, y_row + 3*mm, "1")
-    c.drawString(110*mm, y_row + 3*mm, f"¥ {amount_str}")
-    c.drawString(150*mm, y_row + 3*mm, f"¥ {amount_str}")
-
-    # Empty rows
-    for i in range(3):
-        y_row -= 10*mm
-        c.rect(20*mm, y_row, 170*mm, 10*mm, fill=0)
-
-    # Bank Info
-    y_bank = y_row - 20*mm
-    c.setFont(font_name, 14)
-    c.drawString(20*mm, y_bank, "お振込先")
-    
-    c.setFont(font_name, 11)
-    y_bank -= 8*mm
-    c.drawString(25*mm, y_bank, "ゆうちょ銀行")
-    y_bank -= 6*mm
-    c.drawString(25*mm, y_bank, "六四八（ロクヨンハチ）店 (648)")
-    y_bank -= 6*mm
-    c.drawString(25*mm, y_bank, "普通　1050996")
-    y_bank -= 6*mm
-    c.drawString(25*mm, y_bank, "記号番号：16440　口座番号：10509961")
-    y_bank -= 6*mm
-    c.drawString(25*mm, y_bank, "名義：ニシムラ ユウスケ")
-
-    # Notes
-    y_note = y_bank - 15*mm
-    c.setFont(font_name, 9)
-    c.setFillColorRGB(0.4, 0.4, 0.4)
-    c.drawString(20*mm, y_note, "※ 振込手数料は貴社負担にてお願いいたします。")
-
-    c.save()
-    print(f"Generated PDF: {output_filename}")
+        return file_sha1(path) == entry.get("output")
+    except OSError:
+        return False
+
+def init_worker(formats):
+    """ワーカーの初期化。フォント登録や DOCX テンプレートの作成はここで1回だけ行う"""
+    for fmt in formats:
+        get_backend(fmt)
+
+def render_task(task):
+    """ワーカーで1件を生成する。途中で落ちても壊れたファイルが残らないよう一時ファイル経由で置き換える"""
+    fmt, invoice, path = task
+    start = time.perf_counter()
+    tmp_path = f"{path}.tmp"
+    get_backend(fmt).render(invoice, tmp_path)
+    os.replace(tmp_path, path)
+    return os.path.basename(path), file_sha1(path), time.perf_counter() - start
+
+def render_batch(transactions, out_dir, workers=None, force=False, formats=("pdf",)):
+    """取引のリストから請求書をまとめて生成し、集計を dict で返す。
+
+    formats に "docx" も含めれば、1回の解析で PDF と DOCX の両方を書き出す。
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = {} if force else load_manifest(out_dir)
+    started = time.perf_counter()
+
+    tasks, input_hashes, skipped, duplicates = [], {}, 0, 0
+    seen = set()
+    for date_str, amount_str in transactions:
+        invoice = parse_invoice(date_str, amount_str)
+        if invoice.stem in seen:
+            duplicates += 1
+            continue
+        seen.add(invoice.stem)
+        expected = input_hash(date_str, amount_str)
+        for fmt in formats:
+            filename = model_filename(invoice, fmt)
+            if is_up_to_date(out_dir, manifest, filename, expected):
+                skipped += 1
+                continue
+            manifest.pop(filename, None)
+            input_hashes[filename] = expected
+            tasks.append((fmt, invoice, os.path.join(out_dir, filename)))
+
+    render_seconds = 0.0
+    if tasks:
+        workers = workers or os.cpu_count() or 1
+        if workers > 1 and len(tasks) > 1:
+            # フォントやテンプレートはワーカーごとに initializer で1回だけ用意する
+            with Pool(workers, initializer=init_worker, initargs=(formats,)) as pool:
+                results = list(pool.imap_unordered(render_task, tasks, chunksize=16))
+        else:
+            init_worker(formats)
+            results = [render_task(task) for task in tasks]
+        for filename, output_hash, seconds in results:
+            manifest[filename] = {"input": input_hashes[filename], "output": output_hash}
+            render_seconds += seconds
+        save_manifest(out_dir, manifest)
+
+    elapsed = time.perf_counter() - started
+    return {
+        "rendered": len(tasks),
+        "skipped": skipped,
+        "duplicates": duplicates,
+        "seconds": elapsed,
+        "render_seconds": render_seconds,
+        "per_second": len(tasks) / elapsed if elapsed > 0 else 0.0,
+    }
+
+def render_single_pdf(transactions, output_path, force=False):
+    """取引をまとめて1つの複数ページ PDF に出す。入力が前回と同じなら作り直さない"""
+    out_dir = os.path.dirname(os.path.abspath(output_path))
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = {} if force else load_manifest(out_dir)
+    started = time.perf_counter()
+
+    # 同じ請求書は1ページだけにする（順序は入力順のまま）
+    unique = list(dict.fromkeys(transactions))
+    duplicates = len(transactions) - len(unique)
+    digest = hashlib.sha1(f"{RENDER_VERSION}\x1fsingle".encode("utf-8"))
+    for date_str, amount_str in unique:
+        digest.update(f"\x1e{date_str}\x1f{amount_str}".encode("utf-8"))
+    expected = digest.hexdigest()
+
+    filename = os.path.basename(output_path)
+    rendered = 0
+    if not is_up_to_date(out_dir, manifest, filename, expected):
+        tmp_path = f"{output_path}.tmp"
+        create_pdf_batch(unique, tmp_path)
+        os.replace(tmp_path, output_path)
+        manifest[filename] = {"input": expected, "output": file_sha1(output_path)}
+        save_manifest(out_dir, manifest)
+        rendered = len(unique)
+
+    elapsed = time.perf_counter() - started
+    return {
+        "rendered": rendered,
+        "skipped": len(unique) - rendered,
+        "duplicates": duplicates,
+        "seconds": elapsed,
+        "render_seconds": elapsed if rendered else 0.0,
+        "per_second": rendered / elapsed if elapsed > 0 else 0.0,
+    }
+
+def print_report(stats):
+    print(f"Rendered {stats['rendered']} invoices, skipped {stats['skipped']} up to date"
+          + (f", ignored {stats['duplicates']} duplicates" if stats["duplicates"] else "")
+          + f" in {stats['seconds']:.2f}s ({stats['per_second']:.1f} invoices/s)")
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="請求書 PDF をまとめて生成する")
+    parser.add_argument("--input", help="取引の CSV（date,amount 列）または JSONL。省略時はスクリプト内の取引一覧")
+    parser.add_argument("--out-dir", default=DEFAULT_TARGET_DIR, help="出力先ディレクトリ")
+    parser.add_argument("--workers", type=int, default=None, help="プロセス数（既定: CPU 数）")
+    parser.add_argument("--force", action="store_true", help="出力済みでもすべて作り直す")
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=["pdf"],
+                        help="出力する形式（pdf docx で両方）")
+    parser.add_argument("--single-pdf", metavar="PATH",
+                        help="1件1ファイルではなく、全件を1つの複数ページ PDF にまとめて出す")
+    return parser
 
 if __name__ == "__main__":
+    args = build_parser().parse_args()
+
     transactions = [
         ("2025/02/03", "300,000"),
         ("2025/04/25", "200,000"),
@@ -117,12 +231,10 @@ if __name__ == "__main__":
         ("2025/12/29", "150,000"),
     ]
 
-    target_dir = "/Users/yuyu24/Downloads/個人事業請求書"
-    if not os.path.exists(target_dir):
-        os.makedirs(target_dir)
+    if args.input:
+        transactions = read_transactions(args.input)
 
-    for date_str, amount in transactions:
-        dt = datetime.datetime.strptime(date_str, "%Y/%m/%d")
-        fname = f"請求書_{dt.strftime('%Y%m%d')}_{amount.replace(',', '')}.pdf"
-        output_path = os.path.join(target_dir, fname)
-        create_pdf_invoice(date_str, amount, output_path)
+    if args.single_pdf:
+        print_report(render_single_pdf(transactions, args.single_pdf, args.force))
+    else:
+        print_report(render_batch(transactions, args.out_dir, args.workers, args.force, tuple(args.formats)))
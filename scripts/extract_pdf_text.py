@@ -1,16 +1,202 @@
-from pypdf import PdfReader
+"""PDF からテキストをページ単位で取り出し、JSON Lines で出力する。
+
+- iter_pages() はページごとにテキストを返すジェネレータ（全ページ分を連結しない）
+- 複数の PDF（と大きな PDF のページ範囲）をプロセスプールで並列に処理する
+- 抽出結果は (ファイルの SHA-1, ページ番号) ごとに .pdf_text_cache/ に保存し、
+  同じファイルの再実行では PDF を開かずにキャッシュから返す
+
+出力（1行1ページ）:
+    {"file": "...", "sha1": "...", "page": 1, "pages": 12, "text": "..."}
+読めなかったファイルは {"file": "...", "error": "..."} の1行になる。
+
+    python scripts/extract_pdf_text.py statements/*.pdf --out pages.jsonl
+    python scripts/extract_pdf_text.py statement.pdf --text
+"""
+import argparse
+import hashlib
+import json
+import os
 import sys
+from multiprocessing import Pool
+
+DEFAULT_PDF = "/Users/yuyu24/Downloads/【確定】外注費_西村友祐様.pdf"
+DEFAULT_CACHE_DIR = ".pdf_text_cache"
+# 1タスクで抽出するページ数（大きな PDF はこの単位でワーカーに分ける）
+PAGES_PER_TASK = 16
+
+
+def file_sha1(path):
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def iter_pages(pdf_path, start=0, stop=None):
+    """(0 始まりのページ番号, テキスト) を1ページずつ返す"""
+    from pypdf import PdfReader
+
+    reader = PdfReader(pdf_path)
+    stop = len(reader.pages) if stop is None else min(stop, len(reader.pages))
+    for index in range(start, stop):
+        yield index, reader.pages[index].extract_text() or ""
+
 
 def extract_text(pdf_path):
+    """PDF 全体のテキスト（ページをそのまま連結したもの）"""
+    return "".join(text for _, text in iter_pages(pdf_path))
+
+
+# ------------------------------------------------------------------
+# キャッシュ（<cache_dir>/<sha1>/meta.json と <page>.txt）
+# ------------------------------------------------------------------
+
+def _write_atomic(path, text):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+class PageCache:
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+
+    def _dir(self, sha1):
+        return os.path.join(self.cache_dir, sha1)
+
+    def page_count(self, sha1):
+        try:
+            with open(os.path.join(self._dir(sha1), "meta.json"), encoding="utf-8") as f:
+                return json.load(f)["pages"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def store_page_count(self, sha1, pages):
+        os.makedirs(self._dir(sha1), exist_ok=True)
+        _write_atomic(os.path.join(self._dir(sha1), "meta.json"), json.dumps({"pages": pages}))
+
+    def get(self, sha1, index):
+        try:
+            with open(os.path.join(self._dir(sha1), f"{index}.txt"), encoding="utf-8") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def put(self, sha1, index, text):
+        _write_atomic(os.path.join(self._dir(sha1), f"{index}.txt"), text)
+
+
+class NoCache:
+    def page_count(self, sha1):
+        return None
+
+    def store_page_count(self, sha1, pages):
+        pass
+
+    def get(self, sha1, index):
+        return None
+
+    def put(self, sha1, index, text):
+        pass
+
+
+def make_cache(cache_dir):
+    return PageCache(cache_dir) if cache_dir else NoCache()
+
+
+# ------------------------------------------------------------------
+# 並列抽出
+# ------------------------------------------------------------------
+
+def extract_range(task):
+    """ワーカーでページ範囲を抽出し、[(ページ番号, テキスト)] を返す。キャッシュ済みのページは PDF を開かない"""
+    path, sha1, start, stop, cache_dir = task
+    cache = make_cache(cache_dir)
+    cached = [(index, cache.get(sha1, index)) for index in range(start, stop)]
+    if all(text is not None for _, text in cached):
+        return cached
+    pages = []
+    for index, text in iter_pages(path, start, stop):
+        cache.put(sha1, index, text)
+        pages.append((index, text))
+    return pages
+
+
+def plan_file(path, cache):
+    """ファイルのハッシュとページ数を求め、ワーカーに渡すタスクのリストを返す"""
+    sha1 = file_sha1(path)
+    pages = cache.page_count(sha1)
+    if pages is None:
+        from pypdf import PdfReader
+
+        pages = len(PdfReader(path).pages)
+        cache.store_page_count(sha1, pages)
+    return sha1, pages
+
+
+def iter_records(paths, workers=None, cache_dir=DEFAULT_CACHE_DIR):
+    """PDF のリストから出力レコード（dict）を入力順・ページ順に1件ずつ返す"""
+    cache = make_cache(cache_dir)
+    plans, tasks = [], []
+    for path in paths:
+        try:
+            sha1, pages = plan_file(path, cache)
+        except Exception as e:
+            plans.append((path, None, 0, f"{type(e).__name__}: {e}"))
+            continue
+        plans.append((path, sha1, pages, None))
+        tasks.extend((path, sha1, start, min(start + PAGES_PER_TASK, pages), cache_dir)
+                     for start in range(0, pages, PAGES_PER_TASK))
+
+    workers = min(workers or os.cpu_count() or 1, len(tasks) or 1)
+    pool = Pool(workers) if workers > 1 else None
     try:
-        reader = PdfReader(pdf_path)
-        text = ""
-        for page in reader.pages:
-            text += page.extract_text()
-        print(text)
-    except Exception as e:
-        print(f"Error reading PDF: {e}")
+        # imap は入力順に結果を返すので、そのまま書き出せばファイル順・ページ順になる
+        results = pool.imap(extract_range, tasks) if pool else map(extract_range, tasks)
+        for path, sha1, pages, error in plans:
+            if error:
+                yield {"file": path, "error": error}
+                continue
+            for _ in range(0, pages, PAGES_PER_TASK):
+                for index, text in next(results):
+                    yield {"file": path, "sha1": sha1, "page": index + 1, "pages": pages, "text": text}
+    finally:
+        if pool:
+            pool.terminate()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="PDF からテキストをページ単位で取り出す")
+    parser.add_argument("pdfs", nargs="*", default=[DEFAULT_PDF], help="PDF ファイル（複数可）")
+    parser.add_argument("--out", default="-", help="JSONL の出力先（既定: 標準出力）")
+    parser.add_argument("--text", action="store_true", help="JSONL ではなくテキストだけを出す")
+    parser.add_argument("--workers", type=int, default=None, help="プロセス数（既定: CPU 数）")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="ページごとの抽出結果のキャッシュ")
+    parser.add_argument("--no-cache", action="store_true", help="キャッシュを読み書きしない")
+    args = parser.parse_args(argv)
+
+    out = sys.stdout if args.out == "-" else open(args.out, "w", encoding="utf-8")
+    failed = 0
+    try:
+        for record in iter_records(args.pdfs, args.workers, None if args.no_cache else args.cache_dir):
+            if "error" in record:
+                failed += 1
+                print(f"Error reading PDF {record['file']}: {record['error']}", file=sys.stderr)
+                if args.text:
+                    continue
+            if args.text:
+                out.write(record["text"])
+            else:
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        if args.text:
+            out.write("\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 1 if failed else 0
+
 
 if __name__ == "__main__":
-    pdf_path = "/Users/yuyu24/Downloads/【確定】外注費_西村友祐様.pdf"
-    extract_text(pdf_path)
+    sys.exit(main())
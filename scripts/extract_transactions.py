@@ -0,0 +1,229 @@
+"""明細 PDF のテキストから取引（振込日, 金額）を取り出し、請求書の生成に渡す。
+
+extract_pdf_text.py のページ単位の出力をそのまま流し込み、1本のストリームで処理する:
+
+    PDF → ページのテキスト → 取引の行を正規表現で抽出 → 検証・重複除去 → 出力 / 請求書生成
+
+取引の行は「日付 …… 金額」が1行に並んでいるもの（例: "2025/02/03 外注費 300,000円"）。
+日付は 2025/02/03・2025-02-03・2025年2月3日。金額は ¥ / 円 が付いているかカンマ区切りのものだけを数え、
+"請求書No.12345" のような裸の整数や、"2025/01/01〜2025/01/31" の2つ目の日付は金額にしない。
+1行に金額が複数あるときは、残高・合計・手数料などの見出しが付いたものを除き、
+支払・振込などの見出しが付いたもの（なければ残った1つ）を取る。決められない行は取引にしない。
+
+    python scripts/extract_transactions.py statement.pdf --out transactions.jsonl
+    python scripts/extract_transactions.py statement.pdf --render ~/Downloads/個人事業請求書
+    python scripts/extract_pdf_text.py statement.pdf | python scripts/extract_transactions.py --from-jsonl -
+    python scripts/extract_transactions.py --make-sample /tmp/sample_statement.pdf
+"""
+import argparse
+import csv
+import datetime
+import json
+import re
+import sys
+
+from create_invoice_pdf import normalize_transaction, print_report, render_batch
+from extract_pdf_text import DEFAULT_CACHE_DIR, iter_records
+
+DATE_PATTERN = r"(?<!\d)(?P<year>\d{4})(?:[/-]|年)(?P<month>\d{1,2})(?:[/-]|月)(?P<day>\d{1,2})(?!\d)日?"
+DATE_RE = re.compile(DATE_PATTERN)
+# 日付を含む行。ページ全体に対して finditer で1回だけ走らせ、金額はその行の中だけで探す
+DATED_LINE_RE = re.compile(r"^[^\n]*?" + DATE_PATTERN + r"[^\n]*$", re.MULTILINE)
+# ¥ / 円 の付いた数字か、カンマ区切りの数字（"No.12345" のような裸の整数は金額にしない）
+AMOUNT_RE = re.compile(
+    r"[¥￥][^\S\n]*(?P<yen>\d{1,3}(?:,\d{3})+|\d+)(?![\d,])"
+    r"|(?<![\d,.])(?P<suffixed>\d{1,3}(?:,\d{3})+|\d+)[^\S\n]*円"
+    r"|(?<![\d,.])(?P<grouped>\d{1,3}(?:,\d{3})+)(?![\d,])"
+)
+# 金額の直前の見出し。EXCLUDED_LABELS の付いた金額は取引の金額にしない
+PAYMENT_LABELS = ("支払", "振込", "出金", "引落", "外注費")
+EXCLUDED_LABELS = ("残高", "合計", "小計", "累計", "繰越", "手数料", "消費税", "税額", "入金")
+
+# これを超える金額は読み取りの誤りとみなす
+MAX_AMOUNT = 100_000_000
+MIN_YEAR, MAX_YEAR = 2000, 2100
+
+
+def line_amount(line):
+    """日付を含む1行から取引の金額の文字列を選ぶ。金額がない・決められないときは None"""
+    # 日付の部分（期間の2つ目の日付も含む）は金額として読まないよう空白にしておく
+    text = DATE_RE.sub(lambda m: " " * len(m.group()), line)
+    amounts, start = [], 0
+    for match in AMOUNT_RE.finditer(text):
+        label = text[start:match.start()]
+        start = match.end()
+        if any(word in label for word in EXCLUDED_LABELS):
+            continue
+        amounts.append((any(word in label for word in PAYMENT_LABELS), match.group(match.lastgroup)))
+    if len(amounts) > 1:
+        amounts = [amount for amount in amounts if amount[0]]
+    return amounts[0][1] if len(amounts) == 1 else None
+
+
+def iter_candidates(pages, stats):
+    """(ページ番号, テキスト) から (ページ番号, 日付 "YYYY/MM/DD", 金額の文字列) を返す"""
+    for page, text in pages:
+        for match in DATED_LINE_RE.finditer(text):
+            amount = line_amount(match.group())
+            if amount is None:
+                continue
+            year, month, day = match.group("year", "month", "day")
+            stats["candidates"] += 1
+            yield page, f"{year}/{int(month):02d}/{int(day):02d}", amount
+
+
+def iter_transactions(pages, stats):
+    """候補を検証して重複を除き、("2025/02/03", "300,000") を出現順に返す"""
+    seen = set()
+    for page, date_str, amount in iter_candidates(pages, stats):
+        try:
+            transaction = normalize_transaction(date_str, amount)
+        except ValueError as e:
+            stats["invalid"] += 1
+            print(f"page {page}: skipped {e}", file=sys.stderr)
+            continue
+        year = int(transaction[0][:4])
+        value = int(amount.replace(",", ""))
+        if not (MIN_YEAR <= year <= MAX_YEAR) or not (0 < value <= MAX_AMOUNT):
+            stats["invalid"] += 1
+            print(f"page {page}: skipped out-of-range {date_str} {amount}", file=sys.stderr)
+            continue
+        if transaction in seen:
+            stats["duplicates"] += 1
+            continue
+        seen.add(transaction)
+        stats["transactions"] += 1
+        yield transaction
+
+
+def pages_from_pdfs(paths, workers, cache_dir, stats):
+    for record in iter_records(paths, workers, cache_dir):
+        if "error" in record:
+            print(f"Error reading PDF {record['file']}: {record['error']}", file=sys.stderr)
+            stats["failed_files"] += 1
+            continue
+        stats["pages"] += 1
+        yield f"{record['file']}:{record['page']}", record["text"]
+
+
+def pages_from_jsonl(f, stats):
+    for line in f:
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        if "error" in record:
+            stats["failed_files"] += 1
+            continue
+        stats["pages"] += 1
+        yield f"{record['file']}:{record['page']}", record["text"]
+
+
+def new_stats():
+    return {"pages": 0, "candidates": 0, "invalid": 0, "duplicates": 0, "transactions": 0, "failed_files": 0}
+
+
+# ------------------------------------------------------------------
+# 動作確認用の明細 PDF
+# ------------------------------------------------------------------
+
+def write_sample_statement(path, transactions):
+    """取引の行と関係のない行（見出し・対象期間・発行日・請求書番号・残高・合計）が混ざった明細 PDF を作る"""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import mm
+    from reportlab.pdfgen import canvas
+
+    from invoice_model import register_font
+
+    font_name = register_font()
+    c = canvas.Canvas(path, pagesize=A4, invariant=1)
+    width, height = A4
+    rows_per_page = 25
+    for start in range(0, len(transactions), rows_per_page):
+        y = height - 20 * mm
+        c.setFont(font_name, 14)
+        c.drawString(20 * mm, y, "外注費 支払明細")
+        y -= 8 * mm
+        c.setFont(font_name, 10)
+        c.drawString(20 * mm, y, f"発行日：{datetime.date(2026, 1, 5):%Y年%m月%d日}")
+        y -= 6 * mm
+        page_rows = transactions[start:start + rows_per_page]
+        c.drawString(20 * mm, y, f"対象期間 {min(page_rows)[0]}〜{max(page_rows)[0]}")
+        y -= 10 * mm
+        balance = 5_000_000
+        for i, (date_str, amount_str) in enumerate(page_rows):
+            # 日付の書式・残高の有無・¥ か 円 かは行ごとに変え、ときどき請求書番号だけの行を挟む
+            year, month, day = date_str.split("/")
+            date_text = (date_str, f"{year}-{month}-{day}", f"{year}年{int(month)}月{int(day)}日")[i % 3]
+            amount_text = f"¥{amount_str}" if i % 4 == 3 else f"{amount_str}円"
+            balance -= int(amount_str.replace(",", ""))
+            suffix = f"  残高 {balance:,}" if i % 2 else ""
+            c.drawString(20 * mm, y, f"{date_text}  外注費 西村友祐様  {amount_text}{suffix}")
+            y -= 6 * mm
+            if i % 5 == 4:
+                c.drawString(20 * mm, y, f"{date_text}  請求書No.{12345 + i}")
+                y -= 6 * mm
+        c.drawString(20 * mm, y - 4 * mm, f"合計 {len(transactions[start:start + rows_per_page])} 件")
+        c.showPage()
+    c.save()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="明細 PDF から取引（日付, 金額）を取り出す")
+    parser.add_argument("pdfs", nargs="*", help="明細 PDF（複数可）")
+    parser.add_argument("--from-jsonl", metavar="PATH", help="extract_pdf_text.py の出力（- で標準入力）を読む")
+    parser.add_argument("--out", default="-", help="取引の出力先（.csv なら CSV、それ以外は JSONL。既定: 標準出力）")
+    parser.add_argument("--render", metavar="OUT_DIR", help="取引を出力せず、そのまま請求書を生成する")
+    parser.add_argument("--formats", nargs="+", choices=("pdf", "docx"), default=["pdf"])
+    parser.add_argument("--workers", type=int, default=None, help="プロセス数（既定: CPU 数）")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="ページごとの抽出結果のキャッシュ")
+    parser.add_argument("--make-sample", metavar="PATH", help="動作確認用の明細 PDF を書き出して終了する")
+    args = parser.parse_args(argv)
+
+    if args.make_sample:
+        sample = [("2025/02/03", "300,000"), ("2025/04/25", "200,000"), ("2025/05/01", "260,000"),
+                  ("2025/05/21", "250,000"), ("2025/04/25", "200,000")]
+        write_sample_statement(args.make_sample, sample)
+        print(f"Wrote sample statement: {args.make_sample}")
+        return 0
+    if not args.pdfs and not args.from_jsonl:
+        parser.error("pass statement PDFs or --from-jsonl")
+
+    stats = new_stats()
+    source = None
+    if args.from_jsonl:
+        source = sys.stdin if args.from_jsonl == "-" else open(args.from_jsonl, encoding="utf-8")
+        pages = pages_from_jsonl(source, stats)
+    else:
+        pages = pages_from_pdfs(args.pdfs, args.workers, args.cache_dir, stats)
+    transactions = iter_transactions(pages, stats)
+
+    # pages は遅延して読むので、source は取引を書き終えるまで開いておく
+    try:
+        if args.render:
+            print_report(render_batch(transactions, args.render, args.workers, formats=tuple(args.formats)))
+        else:
+            out = sys.stdout if args.out == "-" else open(args.out, "w", encoding="utf-8", newline="")
+            try:
+                if args.out.endswith(".csv"):
+                    writer = csv.writer(out)
+                    writer.writerow(["date", "amount"])
+                    writer.writerows(transactions)
+                else:
+                    for date_str, amount_str in transactions:
+                        out.write(json.dumps({"date": date_str, "amount": amount_str}, ensure_ascii=False) + "\n")
+            finally:
+                if out is not sys.stdout:
+                    out.close()
+    finally:
+        if source is not None and source is not sys.stdin:
+            source.close()
+
+    print(f"{stats['transactions']} transactions from {stats['pages']} pages "
+          f"({stats['candidates']} candidates, {stats['invalid']} invalid, {stats['duplicates']} duplicates"
+          + (f", {stats['failed_files']} unreadable files" if stats["failed_files"] else "") + ")",
+          file=sys.stderr)
+    return 1 if stats["failed_files"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
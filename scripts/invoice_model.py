@@ -0,0 +1,396 @@
+"""請求書の共通モデルとレイアウト、DOCX / PDF の描画バックエンド。
+
+create_invoice.py（DOCX）と create_invoice_pdf.py（PDF）はどちらもこのモジュールを使う。
+
+- 取引（振込日, 金額）は parse_invoice() で1回だけ解析して Invoice にする
+  （請求日 = 振込日の1か月前。日付ごとの計算結果はキャッシュする）
+- 固定の文言は定数、PDF の配置は page_layout() で1回だけ計算する
+  （固定部分 static と、請求書ごとに値を埋める fields に分かれる）
+- DocxBackend は固定部分を埋め込んだテンプレート DOCX を1回だけ作り、
+  請求書ごとには document.xml のプレースホルダーを置き換えて追記するだけにする
+
+reportlab と python-docx は各バックエンドを作るときに初めて import する。
+"""
+import datetime
+import io
+import os
+import zipfile
+from collections import namedtuple
+from functools import lru_cache
+from xml.sax.saxutils import escape
+
+from dateutil.relativedelta import relativedelta
+
+# reportlab の mm / A4 と同じ値（ポイント）
+MM = 72 / 25.4
+PAGE_SIZE = (210 * MM, 297 * MM)
+
+TITLE = "請 求 書"
+RECIPIENT = "合同会社EIS 御中"
+SUBJECT = "件名：システム構築費"
+SENDER = "西村 友祐"
+TOTAL_LABEL = "ご請求金額"
+TABLE_HEADER = ("品目", "数量", "単価", "金額")
+ITEM_NAME = "システム構築費"
+ITEM_QUANTITY = "1"
+EMPTY_ROWS = 3
+BANK_HEADING = "お振込先"
+BANK_LINES = (
+    "ゆうちょ銀行",
+    "六四八（ロクヨンハチ）店 (648)",
+    "普通　1050996",
+    "記号番号：16440　口座番号：10509961",
+    "名義：ニシムラ ユウスケ",
+)
+NOTE = "※ 振込手数料は貴社負担にてお願いいたします。"
+NOTE_GRAY = 0.4
+
+# 請求書ごとに変わる値の書式（キーは Invoice のフィールド名）
+INVOICE_DATE_TEXT = "請求日：{invoice_date}"
+TOTAL_TEXT = "¥ {amount} -"
+PRICE_TEXT = "¥ {amount}"
+
+# ------------------------------------------------------------------
+# モデル
+# ------------------------------------------------------------------
+
+# transfer_date: "2025/02/03" / amount: "300,000" / invoice_date: "2025年01月03日" / stem: 拡張子なしのファイル名
+Invoice = namedtuple("Invoice", "transfer_date amount invoice_date stem")
+
+
+@lru_cache(maxsize=4096)
+def _dates(date_str):
+    transfer_date = datetime.datetime.strptime(date_str, "%Y/%m/%d")
+    invoice_date = transfer_date - relativedelta(months=1)
+    return invoice_date.strftime("%Y年%m月%d日"), transfer_date.strftime("%Y%m%d")
+
+
+def parse_invoice(date_str, amount_str):
+    """("2025/02/03", "300,000") → Invoice"""
+    invoice_date, compact_date = _dates(date_str)
+    return Invoice(date_str, amount_str, invoice_date, f"請求書_{compact_date}_{amount_str.replace(',', '')}")
+
+
+def invoice_filename(invoice, extension):
+    return f"{invoice.stem}.{extension}"
+
+
+# ------------------------------------------------------------------
+# レイアウト（PDF 用の座標。原点は左下）
+# ------------------------------------------------------------------
+
+# align: "left" / "center"、gray: None なら黒
+Text = namedtuple("Text", "x y size text align gray")
+Line = namedtuple("Line", "x1 y1 x2 y2")
+Rect = namedtuple("Rect", "x y width height")
+# template を Invoice の値で format して描く
+Slot = namedtuple("Slot", "x y size template")
+
+PageLayout = namedtuple("PageLayout", "width height static fields")
+
+
+def _text(x, y, size, text, align="left", gray=None):
+    return Text(x, y, size, text, align, gray)
+
+
+@lru_cache(maxsize=None)
+def page_layout(width=PAGE_SIZE[0], height=PAGE_SIZE[1]):
+    """1ページ分の配置を計算する（ページサイズごとに1回だけ）"""
+    sender_x = width - 60 * MM
+    static = [
+        _text(width / 2, height - 30 * MM, 24, TITLE, align="center"),
+        _text(20 * MM, height - 60 * MM, 16, RECIPIENT),
+        _text(20 * MM, height - 70 * MM, 12, SUBJECT),
+        _text(sender_x, height - 60 * MM, 12, SENDER),
+        _text(width / 2 - 40 * MM, height - 100 * MM, 14, TOTAL_LABEL),
+        Line(width / 2 + 5 * MM, height - 102 * MM, width / 2 + 70 * MM, height - 102 * MM),
+    ]
+
+    # 明細表（見出し行・品目行・空行）
+    column_x = (30 * MM, 90 * MM, 110 * MM, 150 * MM)
+    y_start = height - 130 * MM
+    static.append(Rect(20 * MM, y_start, 170 * MM, 10 * MM))
+    static.extend(_text(x, y_start + 3 * MM, 12, label) for x, label in zip(column_x, TABLE_HEADER))
+    y_row = y_start - 10 * MM
+    static.append(Rect(20 * MM, y_row, 170 * MM, 10 * MM))
+    static.append(_text(column_x[0], y_row + 3 * MM, 12, ITEM_NAME))
+    static.append(_text(95 * MM, y_row + 3 * MM, 12, ITEM_QUANTITY))
+    item_y = y_row + 3 * MM
+    for _ in range(EMPTY_ROWS):
+        y_row -= 10 * MM
+        static.append(Rect(20 * MM, y_row, 170 * MM, 10 * MM))
+
+    # 振込先と注記
+    y_bank = y_row - 20 * MM
+    static.append(_text(20 * MM, y_bank, 14, BANK_HEADING))
+    y_bank -= 2 * MM
+    for line in BANK_LINES:
+        y_bank -= 6 * MM
+        static.append(_text(25 * MM, y_bank, 11, line))
+    static.append(_text(20 * MM, y_bank - 15 * MM, 9, NOTE, gray=NOTE_GRAY))
+
+    fields = (
+        Slot(sender_x, height - 70 * MM, 12, INVOICE_DATE_TEXT),
+        Slot(width / 2 + 10 * MM, height - 100 * MM, 24, TOTAL_TEXT),
+        Slot(column_x[2], item_y, 12, PRICE_TEXT),
+        Slot(column_x[3], item_y, 12, PRICE_TEXT),
+    )
+    return PageLayout(width, height, tuple(static), fields)
+
+
+# ------------------------------------------------------------------
+# PDF
+# ------------------------------------------------------------------
+
+# プロセスごとに1回だけ登録したフォント名
+_font_name = None
+
+
+def register_font():
+    # CIDフォントを使用する（ファイルパス不要、最も互換性が高い）
+    # HeiseiKakuGo-W5 は太字のゴシック体
+    # 登録はプロセスごとに1回だけ行い、以降は登録済みの名前を返す
+    global _font_name
+    if _font_name is not None:
+        return _font_name
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.cidfonts import UnicodeCIDFont
+
+    font_name = "HeiseiKakuGo-W5"
+    try:
+        pdfmetrics.registerFont(UnicodeCIDFont(font_name))
+        _font_name = font_name
+    except Exception as e:
+        print(f"Font registration warning: {e}")
+        _font_name = "Helvetica"
+    return _font_name
+
+
+class PdfBackend:
+    """reportlab で PageLayout を描く"""
+
+    extension = "pdf"
+    # 固定部分の Form XObject 名（render_pages で全ページから参照する）
+    STATIC_FORM = "invoice_static"
+
+    def __init__(self, layout=None):
+        from reportlab.pdfgen import canvas
+
+        self.canvas_class = canvas.Canvas
+        self.layout = layout or page_layout()
+        self.font_name = register_font()
+
+    def new_canvas(self, path):
+        # invariant=1: 作成日時などを埋め込まず、同じ入力から同じバイト列を出す（内容ハッシュでの比較用）
+        return self.canvas_class(path, pagesize=(self.layout.width, self.layout.height), invariant=1)
+
+    def draw_static(self, c):
+        font_name = self.font_name
+        c.setLineWidth(1)
+        for item in self.layout.static:
+            if isinstance(item, Text):
+                if item.gray is not None:
+                    c.saveState()
+                    c.setFillColorRGB(item.gray, item.gray, item.gray)
+                c.setFont(font_name, item.size)
+                if item.align == "center":
+                    c.drawCentredString(item.x, item.y, item.text)
+                else:
+                    c.drawString(item.x, item.y, item.text)
+                if item.gray is not None:
+                    c.restoreState()
+            elif isinstance(item, Line):
+                c.line(item.x1, item.y1, item.x2, item.y2)
+            else:
+                c.rect(item.x, item.y, item.width, item.height, fill=0)
+
+    def draw_fields(self, c, invoice):
+        values = invoice._asdict()
+        for slot in self.layout.fields:
+            c.setFont(self.font_name, slot.size)
+            c.drawString(slot.x, slot.y, slot.template.format(**values))
+
+    def render(self, invoice, path):
+        """1件を1ファイルに描く"""
+        c = self.new_canvas(path)
+        self.draw_static(c)
+        self.draw_fields(c, invoice)
+        c.save()
+
+    def render_pages(self, invoices, path):
+        """複数件を1ファイル（1件1ページ）に描く。固定部分は Form XObject として1回だけ持つ"""
+        c = self.new_canvas(path)
+        c.beginForm(self.STATIC_FORM)
+        self.draw_static(c)
+        c.endForm()
+        for invoice in invoices:
+            c.doForm(self.STATIC_FORM)
+            self.draw_fields(c, invoice)
+            c.showPage()
+        c.save()
+
+
+# ------------------------------------------------------------------
+# DOCX
+# ------------------------------------------------------------------
+
+# テンプレート DOCX に埋め込むプレースホルダー（1つの run に収まるので XML 上でも分割されない）
+DOCX_PLACEHOLDERS = Invoice("@@TRANSFER_DATE@@", "@@AMOUNT@@", "@@INVOICE_DATE@@", "@@STEM@@")
+DOCX_BODY = "word/document.xml"
+
+
+def build_docx(invoice):
+    """python-docx で請求書の Document を組み立てる（create_invoice.py の元のレイアウト）"""
+    from docx import Document
+    from docx.enum.text import WD_ALIGN_PARAGRAPH
+    from docx.shared import Pt, RGBColor
+
+    values = invoice._asdict()
+    doc = Document()
+
+    # Title
+    title = doc.add_heading(TITLE, 0)
+    title.alignment = WD_ALIGN_PARAGRAPH.CENTER
+
+    doc.add_paragraph("") # Spacer
+
+    # Top Section: Recipient and Sender
+    # Use a table for layout
+    table_bg = doc.add_table(rows=1, cols=2)
+    table_bg.autofit = True
+
+    # Recipient (Left)
+    cell_to = table_bg.cell(0, 0)
+    p_to = cell_to.paragraphs[0]
+    p_to.add_run(RECIPIENT).bold = True
+    p_to.runs[0].font.size = Pt(16)
+    cell_to.add_paragraph(SUBJECT)
+
+    # Sender (Right)
+    cell_from = table_bg.cell(0, 1)
+    p_from = cell_from.paragraphs[0]
+    p_from.alignment = WD_ALIGN_PARAGRAPH.RIGHT
+    p_from.add_run(SENDER).bold = True
+
+    date_p = cell_from.add_paragraph(INVOICE_DATE_TEXT.format(**values))
+    date_p.alignment = WD_ALIGN_PARAGRAPH.RIGHT
+
+    doc.add_paragraph("") # Spacer
+    doc.add_paragraph("") # Spacer
+
+    # Grand Total
+    total_p = doc.add_paragraph()
+    total_p.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    run_total_label = total_p.add_run(f"{TOTAL_LABEL}　")
+    run_total_label.font.size = Pt(14)
+    run_total = total_p.add_run(TOTAL_TEXT.format(**values))
+    run_total.bold = True
+    run_total.font.size = Pt(24)
+    run_total.font.underline = True
+
+    doc.add_paragraph("") # Spacer
+
+    # Details Table
+    table = doc.add_table(rows=1, cols=4)
+    table.style = 'Table Grid'
+
+    hdr_cells = table.rows[0].cells
+    for cell, label in zip(hdr_cells, TABLE_HEADER):
+        cell.text = label
+        # Center align headers
+        cell.paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
+
+    # Row 1
+    row_cells = table.add_row().cells
+    row_cells[0].text = ITEM_NAME
+    row_cells[1].text = ITEM_QUANTITY
+    row_cells[2].text = PRICE_TEXT.format(**values)
+    row_cells[3].text = PRICE_TEXT.format(**values)
+
+    # Add empty rows
+    for _ in range(EMPTY_ROWS):
+        table.add_row()
+
+    doc.add_paragraph("") # Spacer
+
+    # Bank Info
+    doc.add_heading(BANK_HEADING, level=2)
+    bank_info = doc.add_paragraph()
+    bank_info.add_run(BANK_LINES[0] + "\n").bold = True
+    for line in BANK_LINES[1:-1]:
+        bank_info.add_run(line + "\n")
+    bank_info.add_run(BANK_LINES[-1])
+
+    doc.add_paragraph("")
+    note = doc.add_paragraph(NOTE)
+    note.runs[0].font.size = Pt(9)
+    note.runs[0].font.color.rgb = RGBColor(100, 100, 100)
+    return doc
+
+
+class DocxBackend:
+    """テンプレート DOCX を1回だけ作り、請求書ごとには値を差し込んだ document.xml だけを圧縮する。
+
+    styles.xml などの固定部分（展開後 800KB 強）は、圧縮済みの ZIP として1回だけ作っておき、
+    請求書ごとにはそのバイト列に document.xml を追記する。
+    """
+
+    extension = "docx"
+
+    def __init__(self):
+        buffer = io.BytesIO()
+        build_docx(DOCX_PLACEHOLDERS).save(buffer)
+        static = io.BytesIO()
+        with zipfile.ZipFile(io.BytesIO(buffer.getvalue())) as template, \
+                zipfile.ZipFile(static, "w") as out:
+            for info in template.infolist():
+                if info.filename == DOCX_BODY:
+                    self.body_info = info
+                    self.body = template.read(info)
+                else:
+                    out.writestr(info, template.read(info))
+        self.static_zip = static.getvalue()
+        self.placeholders = [
+            (placeholder.encode("utf-8"), name)
+            for name, placeholder in DOCX_PLACEHOLDERS._asdict().items()
+        ]
+
+    def render(self, invoice, path):
+        values = invoice._asdict()
+        body = self.body
+        for placeholder, name in self.placeholders:
+            body = body.replace(placeholder, escape(values[name]).encode("utf-8"))
+        buffer = io.BytesIO(self.static_zip)
+        buffer.seek(0, io.SEEK_END)
+        with zipfile.ZipFile(buffer, "a") as out:
+            out.writestr(self.body_info, body)
+        with open(path, "wb") as f:
+            f.write(buffer.getvalue())
+
+
+BACKENDS = {"pdf": PdfBackend, "docx": DocxBackend}
+FORMATS = tuple(BACKENDS)
+
+# プロセスごとに作ったバックエンド（テンプレートやフォント登録を使い回す）
+_backends = {}
+
+
+def get_backend(fmt):
+    backend = _backends.get(fmt)
+    if backend is None:
+        backend = _backends[fmt] = BACKENDS[fmt]()
+    return backend
+
+
+def render_invoices(transactions, out_dir, formats=FORMATS):
+    """取引を1回だけ解析し、指定したすべての形式で書き出す。書き出したパスのリストを返す"""
+    os.makedirs(out_dir, exist_ok=True)
+    backends = [get_backend(fmt) for fmt in formats]
+    paths = []
+    for date_str, amount_str in transactions:
+        invoice = parse_invoice(date_str, amount_str)
+        for backend in backends:
+            path = os.path.join(out_dir, invoice_filename(invoice, backend.extension))
+            backend.render(invoice, path)
+            paths.append(path)
+    return paths
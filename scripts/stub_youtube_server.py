@@ -0,0 +1,169 @@
+"""再生時間フェッチャーの動作確認用スタブサーバー。
+
+/watch?v=<ID> に approxDurationMs を含む固定の視聴ページを返す。
+keep-alive（HTTP/1.1）に対応し、/__stats でリクエスト数を JSON で返す。
+
+    python scripts/stub_youtube_server.py --port 8765 --fail-rate 0.2
+    python update_data_real.py --watch-base-url http://127.0.0.1:8765
+
+ID の先頭で挙動を切り替えられる:
+    gone_...  404 を返す（削除済み動画）
+    priv_...  playabilityStatus が LOGIN_REQUIRED のページを返す（非公開動画）
+    slow_...  --slow 秒待ってから返す（タイムアウトの確認用）
+    flaky_... その ID の最初の FLAKY_FAILURES 回は 503 を返す（リトライの確認用）
+    limit_... その ID の最初の1回は 429 と Retry-After: 1 を返す（バックオフの確認用）
+"""
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FLAKY_FAILURES = 2
+
+PAGE_TEMPLATE = (
+    '<html><head><title>{video_id}</title></head><body>'
+    '<script>var ytInitialPlayerResponse = {{"playabilityStatus":{{"status":"OK"}},'
+    '"streamingData":{{"approxDurationMs":"{ms}"}}}};</script>'
+    '{padding}</body></html>'
+)
+PRIVATE_TEMPLATE = (
+    '<html><body><script>var ytInitialPlayerResponse = '
+    '{{"playabilityStatus":{{"status":"LOGIN_REQUIRED","reason":"private"}}}};</script>'
+    '{padding}</body></html>'
+)
+
+
+def stub_duration_ms(video_id):
+    """ID から決まる再生時間（1分〜90分）"""
+    digest = hashlib.sha1(video_id.encode("utf-8")).digest()
+    return (60 + int.from_bytes(digest[:4], "big") % (90 * 60)) * 1000
+
+
+class StubState:
+    def __init__(self, fail_rate, slow, padding):
+        self.fail_rate = fail_rate
+        self.slow = slow
+        self.padding = padding
+        self.lock = threading.Lock()
+        self.hits = {}
+        self.times = {}
+        self.connections = 0
+
+    def hit(self, video_id):
+        """リクエストを数え、その ID への何回目のリクエストか（1始まり）を返す"""
+        with self.lock:
+            self.hits[video_id] = self.hits.get(video_id, 0) + 1
+            self.times.setdefault(video_id, []).append(time.monotonic())
+            return self.hits[video_id]
+
+    def stats(self):
+        with self.lock:
+            return {
+                "requests": sum(self.hits.values()),
+                "unique": len(self.hits),
+                "connections": self.connections,
+                "hits": dict(self.hits),
+            }
+
+
+def make_handler(state):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def setup(self):
+            super().setup()
+            with state.lock:
+                state.connections += 1
+
+        def log_message(self, format, *args):
+            pass
+
+        def send_body(self, status, body, content_type="text/html; charset=utf-8", headers=None):
+            data = body.encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            parsed = urllib.parse.urlsplit(self.path)
+            if parsed.path == "/__stats":
+                self.send_body(200, json.dumps(state.stats()), "application/json")
+                return
+            if parsed.path != "/watch":
+                self.send_body(404, "not found")
+                return
+
+            video_id = urllib.parse.parse_qs(parsed.query).get("v", [""])[0]
+            count = state.hit(video_id)
+            if video_id.startswith("flaky_") and count <= FLAKY_FAILURES:
+                self.send_body(503, "unavailable")
+                return
+            if video_id.startswith("limit_") and count == 1:
+                self.send_body(429, "rate limited", headers={"Retry-After": "1"})
+                return
+            if random.random() < state.fail_rate:
+                if random.random() < 0.5:
+                    self.send_body(429, "rate limited", headers={"Retry-After": "0"})
+                else:
+                    self.send_body(503, "unavailable")
+                return
+            if video_id.startswith("gone_"):
+                self.send_body(404, "gone")
+                return
+            if video_id.startswith("slow_"):
+                time.sleep(state.slow)
+            padding = "x" * state.padding
+            if video_id.startswith("priv_"):
+                self.send_body(200, PRIVATE_TEMPLATE.format(padding=padding))
+                return
+            self.send_body(200, PAGE_TEMPLATE.format(
+                video_id=video_id, ms=stub_duration_ms(video_id), padding=padding))
+
+    return Handler
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # クライアント側のタイムアウトで切られた接続は想定内なので黙って捨てる
+        pass
+
+
+def serve(port=0, fail_rate=0.0, slow=5.0, padding=0):
+    """スタブサーバーをバックグラウンドスレッドで起動し、(server, state) を返す"""
+    state = StubState(fail_rate, slow, padding)
+    server = StubServer(("127.0.0.1", port), make_handler(state))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state
+
+
+def main():
+    parser = argparse.ArgumentParser(description="YouTube 視聴ページのスタブサーバー")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="429/503 を返す確率")
+    parser.add_argument("--slow", type=float, default=5.0, help="slow_ で始まる ID の応答遅延（秒）")
+    parser.add_argument("--padding", type=int, default=0, help="ページに付け足すバイト数")
+    args = parser.parse_args()
+
+    server, state = serve(args.port, args.fail_rate, args.slow, args.padding)
+    print(f"Stub server listening on http://127.0.0.1:{server.server_address[1]}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        stats = state.stats()
+        print(f"requests={stats['requests']} unique={stats['unique']} connections={stats['connections']}")
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
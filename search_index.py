@@ -0,0 +1,288 @@
+"""e-learning カタログの検索インデックス（ビルド時に作る転置インデックス）。
+
+フロントエンドが ALL_CONTENT を毎回線形に走査しなくて済むよう、update_data_real.py と
+convert_csv_to_ts.py が mock_elearning_data.ts と一緒に elearning_search_index.ts を書き出す。
+
+- 形態素解析を使わず、NFKC + 小文字化したテキストの文字 bigram / trigram を索引にする
+  （gram は空白で区切った語の中だけで作る。「C 言語」の C のような1文字だけの語は、
+  bigram が作れないのでその1文字を gram にする）
+- レッスンのタイトルはレッスン（ALL_CONTENT のインデックス）ごとに、
+  コース名とカリキュラムの説明はコース（グループ）ごとに索引を持つ。
+  同じコースの全レッスンに説明文の gram を展開しないので、インデックスが膨らまない
+- postings は gram ごとに昇順の整数列を差分符号化し、1本の配列に連結して offsets で区切る
+
+検索（Python の SearchIndex.search と TS の searchContent は同じ規則）:
+    語ごとに、3文字以上なら全 trigram、2文字ならその bigram、1文字ならその文字を含む bigram か
+    その1文字の gram のどれかを含むレッスンに絞り込み、すべての語の条件を満たすレッスンのインデックスを昇順に返す。
+    gram はタイトルか、レッスンの属するコースのテキストのどちらかにあればよい。
+"""
+import json
+import unicodedata
+
+INDEX_VERSION = 2
+GRAM_SIZES = (2, 3)
+DEFAULT_OUTPUT_TS = "src/data/elearning_search_index.ts"
+# 配列を書き出すときに1回で文字列にする要素数
+WRITE_SLICE = 10000
+
+
+def normalize(text):
+    return unicodedata.normalize("NFKC", text).lower()
+
+
+def text_grams(text):
+    """テキストの bigram / trigram の集合（1文字だけの語はその文字）"""
+    grams = set()
+    for word in normalize(text).split():
+        if len(word) == 1:
+            grams.add(word)
+            continue
+        for size in GRAM_SIZES:
+            grams.update(word[i:i + size] for i in range(len(word) - size + 1))
+    return grams
+
+
+def delta_encode(values):
+    previous = 0
+    encoded = []
+    for value in values:
+        encoded.append(value - previous)
+        previous = value
+    return encoded
+
+
+def flatten_postings(grams, postings):
+    """gram の順に差分符号化した postings を連結し、(offsets, 連結した配列) を返す"""
+    offsets, flat = [0], []
+    for gram in grams:
+        flat.extend(delta_encode(sorted(postings.get(gram, ()))))
+        offsets.append(len(flat))
+    return offsets, flat
+
+
+class SearchIndexBuilder:
+    """レッスンとコースのテキストを受け取り、SearchIndex を組み立てる"""
+
+    def __init__(self):
+        self.title_postings = {}  # gram → レッスン番号のリスト（追加順 = 昇順）
+        self.group_postings = {}  # gram → コース番号の集合
+        self.groups = {}  # コース名 → コース番号
+        self.doc_groups = []  # レッスン番号 → コース番号
+
+    def group_id(self, name):
+        group = self.groups.get(name)
+        if group is None:
+            group = self.groups[name] = len(self.groups)
+            self.add_group_text(name, name)
+        return group
+
+    def add_document(self, title, group):
+        """レッスンを ALL_CONTENT と同じ順に追加する"""
+        doc = len(self.doc_groups)
+        self.doc_groups.append(self.group_id(group))
+        postings = self.title_postings
+        for gram in text_grams(title):
+            docs = postings.get(gram)
+            if docs is None:
+                postings[gram] = [doc]
+            else:
+                docs.append(doc)
+        return doc
+
+    def add_group_text(self, group, text):
+        """コース全体に付くテキスト（カリキュラムの説明など）を追加する"""
+        group_id = self.group_id(group)
+        for gram in text_grams(text):
+            self.group_postings.setdefault(gram, set()).add(group_id)
+
+    def build(self):
+        grams = sorted(self.title_postings.keys() | self.group_postings.keys())
+        title_offsets, title_flat = flatten_postings(grams, self.title_postings)
+        group_offsets, group_flat = flatten_postings(grams, self.group_postings)
+        return SearchIndex(
+            grams, list(self.groups), self.doc_groups,
+            title_offsets, title_flat, group_offsets, group_flat,
+        )
+
+
+class SearchIndex:
+    def __init__(self, grams, groups, doc_groups, title_offsets, title_postings, group_offsets, group_postings):
+        self.grams = grams
+        self.groups = groups
+        self.doc_groups = doc_groups
+        self.title_offsets = title_offsets
+        self.title_postings = title_postings
+        self.group_offsets = group_offsets
+        self.group_postings = group_postings
+        self.gram_ids = {gram: i for i, gram in enumerate(grams)}
+        self._docs_by_group = None
+
+    @property
+    def size(self):
+        return len(self.doc_groups)
+
+    # --- 検索 ---
+
+    def decode(self, offsets, postings, gram_id):
+        value = 0
+        for delta in postings[offsets[gram_id]:offsets[gram_id + 1]]:
+            value += delta
+            yield value
+
+    def docs_by_group(self):
+        if self._docs_by_group is None:
+            self._docs_by_group = [[] for _ in self.groups]
+            for doc, group in enumerate(self.doc_groups):
+                self._docs_by_group[group].append(doc)
+        return self._docs_by_group
+
+    def requirements(self, term):
+        """語を「どれかの gram を含む」条件（gram 番号のリスト）の列にする"""
+        if len(term) == 1:
+            return [[i for i, gram in enumerate(self.grams) if gram == term or (len(gram) == 2 and term in gram)]]
+        if len(term) == 2:
+            return [[self.gram_ids.get(term, -1)]]
+        return [[self.gram_ids.get(term[i:i + 3], -1)] for i in range(len(term) - 2)]
+
+    def matches(self, gram_ids):
+        docs = set()
+        for gram_id in gram_ids:
+            if gram_id < 0:
+                continue
+            docs.update(self.decode(self.title_offsets, self.title_postings, gram_id))
+            by_group = self.docs_by_group()
+            for group in self.decode(self.group_offsets, self.group_postings, gram_id):
+                docs.update(by_group[group])
+        return docs
+
+    def search(self, query, limit=None):
+        """query にマッチするレッスンのインデックス（ALL_CONTENT の位置）を昇順に返す"""
+        result = None
+        for term in normalize(query).split():
+            for gram_ids in self.requirements(term):
+                docs = self.matches(gram_ids)
+                result = docs if result is None else result & docs
+                if not result:
+                    return []
+        if result is None:
+            return []
+        return sorted(result)[:limit]
+
+    # --- TS の出力 ---
+
+    def iter_ts(self):
+        yield TS_HEADER
+        yield "export const SEARCH_INDEX: SearchIndexData = {\n"
+        yield f"    version: {INDEX_VERSION},\n"
+        yield f"    size: {self.size},\n"
+        for name, values in (
+            ("groups", self.groups),
+            ("docGroups", self.doc_groups),
+            ("grams", self.grams),
+            ("titleOffsets", self.title_offsets),
+            ("titlePostings", self.title_postings),
+            ("groupOffsets", self.group_offsets),
+            ("groupPostings", self.group_postings),
+        ):
+            yield f"    {name}: ["
+            for start in range(0, len(values), WRITE_SLICE):
+                text = json.dumps(values[start:start + WRITE_SLICE], ensure_ascii=False, separators=(",", ":"))
+                yield ("," if start else "") + text[1:-1]
+            yield "],\n"
+        yield "};\n"
+        yield SEARCH_TS
+
+
+def build_index(contents, group_texts=()):
+    """contents: ALL_CONTENT の順の (タイトル, コース名) / group_texts: (コース名, テキスト)"""
+    builder = SearchIndexBuilder()
+    for title, group in contents:
+        builder.add_document(title, group)
+    for group, text in group_texts:
+        builder.add_group_text(group, text)
+    return builder.build()
+
+
+TS_HEADER = """// Search index over ALL_CONTENT, generated with mock_elearning_data.ts (search_index.py).
+// Do not edit by hand.
+
+export interface SearchIndexData {
+    version: number;
+    size: number;
+    groups: string[];
+    docGroups: number[];
+    grams: string[];
+    titleOffsets: number[];
+    titlePostings: number[];
+    groupOffsets: number[];
+    groupPostings: number[];
+}
+
+"""
+
+SEARCH_TS = """
+let gramIds: Map<string, number> | null = null;
+
+function gramId(gram: string): number {
+    if (!gramIds) {
+        gramIds = new Map();
+        SEARCH_INDEX.grams.forEach((g, i) => gramIds!.set(g, i));
+    }
+    return gramIds.get(gram) ?? -1;
+}
+
+function decode(offsets: number[], postings: number[], id: number, visit: (value: number) => void): void {
+    let value = 0;
+    for (let i = offsets[id]; i < offsets[id + 1]; i++) {
+        value += postings[i];
+        visit(value);
+    }
+}
+
+// 語を「どれかの gram を含む」条件の列にする（search_index.py の requirements と同じ規則）
+function requirements(term: string): number[][] {
+    const chars = Array.from(term);
+    if (chars.length === 1) {
+        const ids: number[] = [];
+        SEARCH_INDEX.grams.forEach((g, i) => {
+            if (g === term || (Array.from(g).length === 2 && g.includes(term))) ids.push(i);
+        });
+        return [ids];
+    }
+    if (chars.length === 2) return [[gramId(term)]];
+    const result: number[][] = [];
+    for (let i = 0; i + 3 <= chars.length; i++) result.push([gramId(chars.slice(i, i + 3).join(''))]);
+    return result;
+}
+
+/** query にマッチするレッスンの ALL_CONTENT でのインデックスを昇順に返す */
+export function searchContent(query: string, limit = Infinity): number[] {
+    const terms = query.normalize('NFKC').toLowerCase().split(/\\s+/).filter(Boolean);
+    if (terms.length === 0) return [];
+    const { size, docGroups, groups } = SEARCH_INDEX;
+    let result: Uint8Array | null = null;
+    for (const term of terms) {
+        for (const ids of requirements(term)) {
+            const mask = new Uint8Array(size);
+            const groupHit = new Uint8Array(groups.length);
+            let anyGroup = false;
+            for (const id of ids) {
+                if (id < 0) continue;
+                decode(SEARCH_INDEX.titleOffsets, SEARCH_INDEX.titlePostings, id, (doc) => { mask[doc] = 1; });
+                decode(SEARCH_INDEX.groupOffsets, SEARCH_INDEX.groupPostings, id, (g) => { groupHit[g] = 1; anyGroup = true; });
+            }
+            if (anyGroup) {
+                for (let doc = 0; doc < size; doc++) if (groupHit[docGroups[doc]]) mask[doc] = 1;
+            }
+            if (result) {
+                for (let doc = 0; doc < size; doc++) result[doc] &= mask[doc];
+            } else {
+                result = mask;
+            }
+        }
+    }
+    const hits: number[] = [];
+    for (let doc = 0; doc < size && hits.length < limit; doc++) if (result![doc]) hits.push(doc);
+    return hits;
+}
+"""
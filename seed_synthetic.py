@@ -0,0 +1,421 @@
+"""負荷試験用の合成シードデータを生成する。
+
+generate_seed.py の companies / jobs と同じ形のレコードを、指定した件数と乱数シードから作り、
+同じ SeedWriter（insert / copy / binary 形式）で書き出す。対象テーブル:
+
+    organizations, jobs, courses, course_curriculums, course_lessons, rpg_progress
+
+- 業種・所在地（愛媛県の市町、人口比）・プレミアム比率は偏りを持たせて割り当てる
+- 1組織あたりの求人数はべき乗則（Zipf）に従う
+- レコードは SYNTH_BLOCK 行ごとのブロック単位で、(シード, テーブル, ブロック番号) から作った
+  乱数で生成する。ブロックはワーカー側で生成するので、1000万行でもメモリに溜めず、
+  --workers や --batch-size を変えても出力は同じになる
+- UUID は generate_seed の uuid5 方式（get_org_uuid / get_job_uuid）を使う。
+  連番方式は手書きの seed.sql の ID と衝突するので使わない
+
+rpg_progress.user_id は auth.users を参照するので、対応するユーザーがない環境では
+FK を外した状態（例: SET session_replication_role = replica）で読み込む。
+
+    python seed_synthetic.py --organizations 100000 --jobs 1000000 --format copy --out-dir seed_out
+"""
+import argparse
+import hashlib
+import random
+import sys
+from bisect import bisect
+from itertools import accumulate
+from operator import itemgetter
+
+import generate_seed
+from generate_seed import DEFAULT_BATCH_SIZE, FORMATS, SeedTable, SeedWriter, seed_uuid5
+
+# 乱数を振り直す単位の行数（出力が --batch-size に依存しないよう固定）
+SYNTH_BLOCK = 1000
+# 求人の組織順位 → 組織インデックスの置換に使う素数（大口の組織が先頭に固まらないように）
+RANK_PRIME = 2654435761
+
+# 愛媛県の市町と人口（千人、おおよそ）
+EHIME_CITIES = (
+    ("松山市", 505), ("今治市", 150), ("新居浜市", 115), ("西条市", 105), ("四国中央市", 82),
+    ("宇和島市", 70), ("大洲市", 40), ("伊予市", 36), ("西予市", 35), ("東温市", 33),
+    ("八幡浜市", 31), ("松前町", 30), ("砥部町", 20), ("愛南町", 19), ("内子町", 15),
+    ("鬼北町", 9), ("伊方町", 8), ("久万高原町", 7), ("上島町", 6), ("松野町", 4),
+)
+
+# 業種と出現比率（generate_seed.py の companies と同じ業種名）
+INDUSTRIES = (
+    ("製造・エンジニアリング", 26), ("サービス・観光・飲食店", 22), ("その他", 15),
+    ("物流・運送", 12), ("医療・福祉", 11), ("IT・システム開発", 9), ("農業・一次産業", 5),
+)
+
+INDUSTRY_PROFILES = {
+    "製造・エンジニアリング": (("マニュファクチャリング", "精工", "機設", "テック工業"),
+                                ("生産技術エンジニア", "設備保全スタッフ", "品質管理", "CADオペレーター"),
+                                "確かな技術力で地域のものづくりを支えます。"),
+    "サービス・観光・飲食店": (("おもてなし庵", "ホテルズ", "フーズ", "ダイニング"),
+                                ("フロントサービススタッフ", "店舗運営スタッフ", "調理スタッフ", "観光プランナー"),
+                                "愛媛の魅力をお客様に届けるサービスを展開しています。"),
+    "その他": (("デザインラボ", "クラフトワークス", "エージェント", "ライフサポート"),
+                ("企画・広報", "営業スタッフ", "店長候補", "事務スタッフ"),
+                "地域に根ざした事業で、暮らしを豊かにします。"),
+    "物流・運送": (("ロジスティクス", "運輸", "物流センター", "エクスプレス"),
+                    ("配送ドライバー", "倉庫管理スタッフ", "配車オペレーター", "物流改善リーダー"),
+                    "四国の物流を支えるパートナーです。"),
+    "医療・福祉": (("ライフケア", "メディカル", "福祉会", "ケアサービス"),
+                    ("介護スタッフ", "看護師", "医療事務", "生活相談員"),
+                    "地域の人々の健康と暮らしを守ります。"),
+    "IT・システム開発": (("テクノサービス", "システムズ", "デジタル", "ソフトウェア"),
+                          ("Webエンジニア", "DX推進エンジニア", "インフラエンジニア", "ITサポート"),
+                          "愛媛のDXを支えるエンジニア集団です。"),
+    "農業・一次産業": (("スマートアグリ", "ファーム", "水産", "柑橘園"),
+                        ("栽培スタッフ", "出荷管理", "加工スタッフ", "農業インターン"),
+                        "愛媛の豊かな自然の恵みを全国へ届けます。"),
+}
+
+INDUSTRY_IMAGES = {
+    "製造・エンジニアリング": "https://images.unsplash.com/photo-1581091226825-a6a2a5aee158?auto=format&fit=crop&q=80&w=800",
+    "サービス・観光・飲食店": "https://images.unsplash.com/photo-1503899036084-c55cdd92da26?auto=format&fit=crop&q=80&w=800",
+    "その他": "https://images.unsplash.com/photo-1542744173-8e7e53415bb0?auto=format&fit=crop&q=80&w=800",
+    "物流・運送": "https://images.unsplash.com/photo-1586528116311-ad8dd3c8310d?auto=format&fit=crop&q=80&w=800",
+    "医療・福祉": "https://images.unsplash.com/photo-1576765608535-5f04d1e3f289?auto=format&fit=crop&q=80&w=800",
+    "IT・システム開発": "https://images.unsplash.com/photo-1486312338219-ce68d2c6f44d?auto=format&fit=crop&q=80&w=800",
+    "農業・一次産業": "https://images.unsplash.com/photo-1523348837708-15d4a09cfac2?auto=format&fit=crop&q=80&w=800",
+}
+
+FAMILY_NAMES = ("佐藤", "鈴木", "高橋", "田中", "伊藤", "渡辺", "山本", "中村", "小林", "村上", "越智", "矢野")
+GIVEN_NAMES = ("誠", "健太", "優子", "さくら", "翔", "陽菜", "大輔", "美咲", "拓海", "結衣")
+REPRESENTATIVE_TITLES = ("代表取締役", "代表", "代表社員", "理事長")
+
+# (type, category, 比率)
+JOB_KINDS = (("job", "中途", 45), ("job", "新卒", 25), ("quest", "体験JOB", 12),
+             ("quest", "インターンシップ", 10), ("quest", "アルバイト", 8))
+WORKING_HOURS = ("9:00 - 18:00", "8:00 - 17:00", "シフト制 (実働8時間)", "10:00 - 19:00 (フレックスあり)")
+HOLIDAYS = ("土日祝 (年間休日125日)", "シフト制", "4週8休", "日曜祝日 + その他")
+SELECTION = ("書類選考 -> 面接", "書類選考 -> 一次面接 -> 最終面接", "面談", "説明会 -> 面接")
+WELFARE = ("社会保険完備", "リモートワーク可, PC支給", "寮完備", "資格取得支援", None)
+
+COURSE_TOPICS = ("AI活用", "動画制作", "ITパスポート", "Webデザイン", "ビジネスマナー",
+                 "プログラミング基礎", "データ分析", "マーケティング", "簿記", "英会話")
+COURSE_LEVELS = (("初級", 55), ("中級", 35), ("上級", 10))
+LESSON_TYPES = (("video", 85), ("quiz", 10), ("document", 5))
+YOUTUBE_ID_CHARS = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_"
+
+
+def cumulative(weighted):
+    values = [value for value, _ in weighted]
+    return values, list(accumulate(weight for _, weight in weighted))
+
+CITY_VALUES, CITY_CUM = cumulative(EHIME_CITIES)
+INDUSTRY_VALUES, INDUSTRY_CUM = cumulative(INDUSTRIES)
+JOB_KIND_VALUES, JOB_KIND_CUM = cumulative([((t, c), w) for t, c, w in JOB_KINDS])
+LEVEL_VALUES, LEVEL_CUM = cumulative(COURSE_LEVELS)
+LESSON_TYPE_VALUES, LESSON_TYPE_CUM = cumulative(LESSON_TYPES)
+
+
+def pick(rng, values, cum):
+    return values[bisect(cum, rng.random() * cum[-1])]
+
+def pick_unit(u, values, cum):
+    return values[min(bisect(cum, u * cum[-1]), len(values) - 1)]
+
+def unit(seed, *parts):
+    """(seed, parts) から決まる [0, 1) の値。テーブルをまたいで同じ組織の属性を引くのに使う"""
+    key = ":".join(map(str, (seed, *parts))).encode("utf-8")
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "big") / 2 ** 64
+
+
+# ------------------------------------------------------------------
+# 組織の属性（求人側からも同じ値を引けるよう、乱数ではなくハッシュで決める）
+# ------------------------------------------------------------------
+
+def org_id(i):
+    return f"syn_o{i}"
+
+def org_city(seed, i):
+    return pick_unit(unit(seed, "org-city", i), CITY_VALUES, CITY_CUM)
+
+def org_industry(seed, i):
+    return pick_unit(unit(seed, "org-industry", i), INDUSTRY_VALUES, INDUSTRY_CUM)
+
+def zipf_rank(u, n, skew):
+    """連続近似の逆関数法で、P(r) ∝ r^-skew に従う順位 (0 始まり) を返す"""
+    if n <= 1:
+        return 0
+    if abs(skew - 1.0) < 1e-9:
+        r = n ** u
+    else:
+        r = ((n ** (1 - skew) - 1) * u + 1) ** (1 / (1 - skew))
+    return min(int(r) - 1, n - 1)
+
+
+# ------------------------------------------------------------------
+# 行ブロックの生成
+# ------------------------------------------------------------------
+
+def make_organizations(rng, start, stop, params):
+    seed = params["seed"]
+    for i in range(start, stop):
+        industry = org_industry(seed, i)
+        city = org_city(seed, i)
+        stems, _, description = INDUSTRY_PROFILES[industry]
+        name = f"{city[:-1]}{rng.choice(stems)}"
+        if rng.random() < 0.6:
+            name = f"株式会社{name}" if rng.random() < 0.5 else f"{name}株式会社"
+        employees = max(1, int(rng.lognormvariate(3.0, 1.1)))
+        yield {
+            "id": org_id(i),
+            "name": name,
+            "industry": industry,
+            "location": city,
+            "description": description,
+            "isPremium": unit(seed, "org-premium", i) < params["premium_ratio"],
+            "image": INDUSTRY_IMAGES[industry],
+            "representative": f"{rng.choice(REPRESENTATIVE_TITLES)} {rng.choice(FAMILY_NAMES)} {rng.choice(GIVEN_NAMES)}",
+            "foundingYear": 2024 - min(120, int(rng.expovariate(1 / 25))),
+            "employeeCount": f"{employees}名",
+            "capital": f"{max(1, employees // 5) * 100:,}万円",
+            "website": f"https://syn-{i}.example.com",
+        }
+
+def make_jobs(rng, start, stop, params):
+    seed, n_orgs = params["seed"], params["organizations"]
+    for i in range(start, stop):
+        rank = zipf_rank(rng.random(), n_orgs, params["job_skew"])
+        org = rank * RANK_PRIME % n_orgs
+        industry = org_industry(seed, org)
+        job_type, category = pick(rng, JOB_KIND_VALUES, JOB_KIND_CUM)
+        is_experience = category == "体験JOB"
+        if job_type == "job":
+            low = rng.randrange(18, 35)
+            salary = f"月給 {low}万円 ~ {low + rng.randrange(5, 20)}万円"
+        else:
+            salary = f"時給 {rng.randrange(950, 2000, 50):,}円"
+        yield {
+            "id": f"syn_j{i}",
+            "companyId": org_id(org),
+            "title": rng.choice(INDUSTRY_PROFILES[industry][1]),
+            "type": job_type,
+            "category": category,
+            "description": INDUSTRY_PROFILES[industry][2],
+            "isExperience": is_experience,
+            "salary": salary,
+            "workingHours": rng.choice(WORKING_HOURS),
+            "holidays": rng.choice(HOLIDAYS),
+            "selectionProcess": rng.choice(SELECTION),
+            "welfare": rng.choice(WELFARE),
+            # 9割は組織の所在地、残りは別拠点
+            "location": org_city(seed, org) if rng.random() < 0.9 else pick(rng, CITY_VALUES, CITY_CUM),
+            "reward": f"¥{rng.randrange(3, 21) * 1000:,}" if is_experience else None,
+        }
+
+def block_start(i, total, parents):
+    """total 件を parents 件の親に連続ブロックで割り振ったとき、親 i の先頭の行番号"""
+    return -(-i * total // parents)
+
+def make_courses(rng, start, stop, params):
+    for i in range(start, stop):
+        topic = COURSE_TOPICS[i % len(COURSE_TOPICS)]
+        level = pick(rng, LEVEL_VALUES, LEVEL_CUM)
+        yield {
+            "id": seed_uuid5(f"courses/syn_c{i}"),
+            # courses.title には UNIQUE 制約があるので通し番号を付ける
+            "title": f"{topic}{level}講座 #{i + 1}",
+            "description": f"{topic}を{level}レベルから学ぶ講座です。",
+            "category": topic,
+            "level": level,
+            "duration": f"{rng.randrange(1, 20)}時間",
+            "image": INDUSTRY_IMAGES["IT・システム開発"],
+            "is_published": rng.random() < 0.9,
+            "order_index": i,
+        }
+
+def make_curriculums(rng, start, stop, params):
+    n_courses, n_curriculums = params["courses"], params["curriculums"]
+    for i in range(start, stop):
+        course = i * n_courses // n_curriculums
+        order = i - block_start(course, n_curriculums, n_courses)
+        topic = COURSE_TOPICS[course % len(COURSE_TOPICS)]
+        yield {
+            "id": seed_uuid5(f"course_curriculums/syn_k{i}"),
+            "course_id": seed_uuid5(f"courses/syn_c{course}"),
+            "title": f"第{order + 1}章 {topic}",
+            "description": f"{topic}の第{order + 1}章です。",
+            "category": topic,
+            "order_index": order,
+        }
+
+def make_lessons(rng, start, stop, params):
+    n_curriculums, n_lessons = params["curriculums"], params["lessons"]
+    for i in range(start, stop):
+        curriculum = i * n_curriculums // n_lessons
+        order = i - block_start(curriculum, n_lessons, n_curriculums)
+        lesson_type = pick(rng, LESSON_TYPE_VALUES, LESSON_TYPE_CUM)
+        seconds = min(3 * 60 * 60, max(30, int(rng.lognormvariate(6.3, 0.6))))
+        video_id = "".join(rng.choice(YOUTUBE_ID_CHARS) for _ in range(11))
+        yield {
+            "id": seed_uuid5(f"course_lessons/syn_l{i}"),
+            "curriculum_id": seed_uuid5(f"course_curriculums/syn_k{curriculum}"),
+            "title": f"レッスン {order + 1}",
+            "description": None,
+            "youtube_url": f"https://www.youtube.com/watch?v={video_id}" if lesson_type == "video" else None,
+            "duration": f"{seconds // 60:02d}:{seconds % 60:02d}",
+            "type": lesson_type,
+            "order_index": order,
+        }
+
+def make_rpg_progress(rng, start, stop, params):
+    for i in range(start, stop):
+        # ほとんどのユーザーは序盤で止まり、ごく一部が高レベルになる
+        level = min(99, int(rng.paretovariate(1.6)))
+        max_hp = 100 + (level - 1) * 12
+        max_mp = 50 + (level - 1) * 5
+        yield {
+            "user_id": seed_uuid5(f"users/syn_u{i}"),
+            "name": "新人就活生",
+            "level": level,
+            "exp": (level - 1) ** 2 * 50 + rng.randrange(0, 50 * level),
+            "hp": rng.randint(max_hp // 2, max_hp),
+            "max_hp": max_hp,
+            "mp": rng.randint(0, max_mp),
+            "max_mp": max_mp,
+            "attack": 10 + (level - 1) * 2,
+            "defense": 10 + (level - 1) * 2,
+            "coins": int(rng.expovariate(1 / (100 * level))),
+            "current_map_id": "town_start",
+        }
+
+COURSE_COLUMNS = (
+    ("id", "uuid"), ("title", "text"), ("description", "text"), ("category", "text"), ("level", "text"),
+    ("duration", "text"), ("image", "text"), ("is_published", "bool"), ("order_index", "int"),
+)
+CURRICULUM_COLUMNS = (
+    ("id", "uuid"), ("course_id", "uuid"), ("title", "text"), ("description", "text"),
+    ("category", "text"), ("order_index", "int"),
+)
+LESSON_COLUMNS = (
+    ("id", "uuid"), ("curriculum_id", "uuid"), ("title", "text"), ("description", "text"),
+    ("youtube_url", "text"), ("duration", "text"), ("type", "text"), ("order_index", "int"),
+)
+RPG_PROGRESS_COLUMNS = (
+    ("user_id", "uuid"), ("name", "text"), ("level", "int"), ("exp", "int"), ("hp", "int"),
+    ("max_hp", "int"), ("mp", "int"), ("max_mp", "int"), ("attack", "int"), ("defense", "int"),
+    ("coins", "int"), ("current_map_id", "text"),
+)
+
+def dict_row(columns):
+    # itemgetter は pickle できるので、SeedTable.to_row としてワーカーに渡せる
+    return itemgetter(*[name for name, _ in columns])
+
+# (件数の引数名, SeedTable, 行ブロックの生成関数)。FK の順に並べる
+# organizations / jobs は generate_seed.py の companies / jobs と同じ形のレコードを作り、
+# 同じ organization_row / job_row（get_org_uuid / get_job_uuid）で行にする
+SYNTHETIC_TABLES = (
+    ("organizations", generate_seed.TABLES_BY_NAME["organizations"], make_organizations),
+    ("jobs", generate_seed.TABLES_BY_NAME["jobs"], make_jobs),
+    ("courses", SeedTable("courses", "Courses", COURSE_COLUMNS, dict_row(COURSE_COLUMNS)), make_courses),
+    ("curriculums", SeedTable("course_curriculums", "Curriculums", CURRICULUM_COLUMNS, dict_row(CURRICULUM_COLUMNS)), make_curriculums),
+    ("lessons", SeedTable("course_lessons", "Lessons", LESSON_COLUMNS, dict_row(LESSON_COLUMNS)), make_lessons),
+    ("users", SeedTable("rpg_progress", "RPG Progress", RPG_PROGRESS_COLUMNS, dict_row(RPG_PROGRESS_COLUMNS)), make_rpg_progress),
+)
+GENERATORS = {name: make for name, _, make in SYNTHETIC_TABLES}
+
+
+# ------------------------------------------------------------------
+# ワーカーに渡すチャンク
+# ------------------------------------------------------------------
+
+class SyntheticChunk:
+    """[start, stop) 行を生成するチャンク。pickle してワーカーに送り、そこで初めて行を作る"""
+
+    def __init__(self, kind, params, start, stop):
+        self.kind = kind
+        self.params = params
+        self.start = start
+        self.stop = stop
+
+    def __len__(self):
+        return self.stop - self.start
+
+    def __iter__(self):
+        make = GENERATORS[self.kind]
+        first_block = self.start // SYNTH_BLOCK
+        last_block = (self.stop - 1) // SYNTH_BLOCK
+        for block in range(first_block, last_block + 1):
+            rng = random.Random(f"{self.params['seed']}:{self.kind}:{block}")
+            block_begin = block * SYNTH_BLOCK
+            block_end = min(block_begin + SYNTH_BLOCK, self.params[self.kind])
+            # ブロックの途中から始まるチャンクは、手前の行を生成して捨てる（乱数列を揃えるため）
+            for i, record in enumerate(make(rng, block_begin, block_end, self.params), block_begin):
+                if i >= self.stop:
+                    break
+                if i >= self.start:
+                    yield record
+
+
+class SyntheticSource:
+    """SeedWriter に渡すレコード源。chunks(size) で SyntheticChunk を順に返す"""
+
+    def __init__(self, kind, params):
+        self.kind = kind
+        self.params = params
+
+    def chunks(self, size):
+        total = self.params[self.kind]
+        for start in range(0, total, size):
+            yield SyntheticChunk(self.kind, self.params, start, min(start + size, total))
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="負荷試験用の合成シードデータを生成する")
+    parser.add_argument("--organizations", type=int, default=1000, help="organizations の件数")
+    parser.add_argument("--jobs", type=int, default=5000, help="jobs の件数")
+    parser.add_argument("--courses", type=int, default=50, help="courses の件数")
+    parser.add_argument("--curriculums", type=int, default=300, help="course_curriculums の件数")
+    parser.add_argument("--lessons", type=int, default=3000, help="course_lessons の件数")
+    parser.add_argument("--users", type=int, default=1000, help="rpg_progress の件数")
+    parser.add_argument("--seed", type=int, default=0, help="乱数シード")
+    parser.add_argument("--premium-ratio", type=float, default=0.3, help="プレミアム組織の割合")
+    parser.add_argument("--job-skew", type=float, default=0.9, help="組織あたり求人数の Zipf 指数")
+    parser.add_argument("--format", choices=FORMATS, default="copy", help="出力形式")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="INSERT 1文あたりの行数")
+    parser.add_argument("--workers", type=int, default=None, help="生成・整形に使うプロセス数（既定: CPU 数）")
+    parser.add_argument("--out", default="-", help="SQL の出力先（既定: 標準出力）")
+    parser.add_argument("--out-dir", help="テーブルごとのファイルと load.sql を書き出すディレクトリ")
+    return parser
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.format == "binary" and not args.out_dir:
+        parser.error("--format binary requires --out-dir")
+    if args.batch_size < 1:
+        parser.error("--batch-size must be at least 1")
+    if args.jobs and not args.organizations:
+        parser.error("--jobs requires at least one organization")
+    if args.curriculums and not args.courses:
+        parser.error("--curriculums requires at least one course")
+    if args.lessons and not args.curriculums:
+        parser.error("--lessons requires at least one curriculum")
+
+    params = {
+        "seed": args.seed,
+        "premium_ratio": args.premium_ratio,
+        "job_skew": args.job_skew,
+        **{name: getattr(args, name) for name, _, _ in SYNTHETIC_TABLES},
+    }
+    sources = [(table, SyntheticSource(name, params)) for name, table, _ in SYNTHETIC_TABLES if params[name]]
+    writer = SeedWriter(args.format, args.batch_size, args.workers, "uuid5")
+    try:
+        if args.out_dir:
+            writer.write_dir(args.out_dir, sources)
+        elif args.out == "-":
+            writer.write_script(sys.stdout.buffer, sources)
+            sys.stdout.buffer.flush()
+        else:
+            with open(args.out, "wb") as out:
+                writer.write_script(out, sources)
+    finally:
+        writer.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,8 @@
+"""ルート直下のモジュール（update_data_real.py など）と scripts/ を import できるようにする。"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (ROOT, os.path.join(ROOT, "scripts")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
@@ -0,0 +1,113 @@
+"""catalog_binary の書き出しと CatalogReader での読み込み"""
+import json
+import os
+
+import pytest
+
+import catalog_binary as cb
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+COURSES_JSON = os.path.join(ROOT, "src", "data", "courses.json")
+
+
+@pytest.fixture(scope="module")
+def tables():
+    with open(COURSES_JSON, encoding="utf-8") as f:
+        return cb.tables_from_courses_json(json.load(f))
+
+
+def expected_row(tables, schema, row):
+    """CatalogReader.row が返すはずの dict（ref / range は参照先の ID になる）"""
+    result = {}
+    for field in schema.fields:
+        value = row.get(field.name)
+        if field.kind == "ref":
+            value = None if value is None else tables[field.target][value]["id"]
+        elif field.kind == "range":
+            value = [tables[field.target][child]["id"] for child in value or ()]
+        result[field.name] = value
+    return result
+
+
+def test_round_trip_courses_json(tmp_path, tables):
+    path = str(tmp_path / "catalog.bin")
+    assert cb.write_catalog(path, tables)
+    with cb.CatalogReader(path) as reader:
+        for schema in cb.TABLES:
+            rows = tables[schema.name]
+            assert rows and reader.count(schema.name) == len(rows)
+            first = {}
+            for row in rows:
+                first.setdefault(row["id"], row)
+            for row_id, row in first.items():
+                assert reader.get(schema.name, row_id) == expected_row(tables, schema, row)
+
+
+def test_missing_id_is_none(tmp_path, tables):
+    path = str(tmp_path / "catalog.bin")
+    cb.write_catalog(path, tables)
+    with cb.CatalogReader(path) as reader:
+        assert reader.get("lessons", "no-such-lesson") is None
+        assert reader.find("courses", "") is None
+
+
+def small_tables():
+    return {
+        "courses": [{"id": "c1", "title": "コース", "instructor": {"name": "講師"}, "curriculums": [0, 1]}],
+        "curriculums": [
+            {"id": "k1", "course": 0, "title": "第1章", "order": 1, "lessons": [0, 2]},
+            {"id": "k2", "course": 0, "title": "第2章", "order": 2, "lessons": [1]},
+        ],
+        "lessons": [
+            {"id": "l1", "curriculum": 0, "title": "最初", "duration_sec": 90},
+            {"id": "l2", "curriculum": 1, "title": "2番目", "duration_sec": None},
+            # 同じ ID の行が重複していれば先の行を引く
+            {"id": "l1", "curriculum": None, "title": "重複"},
+        ],
+    }
+
+
+def test_duplicate_ids_resolve_to_first_row(tmp_path):
+    path = str(tmp_path / "catalog.bin")
+    cb.write_catalog(path, small_tables())
+    with cb.CatalogReader(path) as reader:
+        assert reader.count("lessons") == 3
+        assert reader.get("lessons", "l1")["title"] == "最初"
+        assert reader.row("lessons", 2)["title"] == "重複"
+
+
+def test_ref_and_range_decoding(tmp_path):
+    path = str(tmp_path / "catalog.bin")
+    cb.write_catalog(path, small_tables())
+    with cb.CatalogReader(path) as reader:
+        course = reader.get("courses", "c1")
+        assert course["curriculums"] == ["k1", "k2"]
+        assert course["instructor"] == {"name": "講師"}
+        assert course["description"] is None
+        assert reader.get("curriculums", "k1")["lessons"] == ["l1", "l1"]
+        assert reader.get("curriculums", "k2")["course"] == "c1"
+        assert reader.get("lessons", "l2")["curriculum"] == "k2"
+        assert reader.get("lessons", "l2")["duration_sec"] is None
+        assert reader.row("lessons", 2)["curriculum"] is None
+
+
+@pytest.mark.parametrize("offset, value", [(0, b"NOTCATLG"), (8, b"\x02\x00")])
+def test_bad_magic_or_version(tmp_path, offset, value):
+    path = tmp_path / "catalog.bin"
+    data = bytearray(cb.encode_catalog(small_tables()))
+    data[offset:offset + len(value)] = value
+    path.write_bytes(bytes(data))
+    with pytest.raises(cb.CatalogFormatError):
+        cb.CatalogReader(str(path))
+
+
+def test_unchanged_content_is_not_rewritten(tmp_path):
+    path = str(tmp_path / "catalog.bin")
+    assert cb.write_catalog(path, small_tables())
+    mtime = os.stat(path).st_mtime_ns
+    assert not cb.write_catalog(path, small_tables())
+    assert os.stat(path).st_mtime_ns == mtime
+
+    changed = small_tables()
+    changed["lessons"][1]["title"] = "変更"
+    assert cb.write_catalog(path, changed)
@@ -0,0 +1,94 @@
+"""catalog_matching の照合（表記揺れは吸収し、番号やレベルだけが違う兄弟カリキュラムには結び付けない）"""
+import io
+
+import pytest
+
+from catalog_matching import (
+    CONFIDENT_SCORE,
+    REJECT_AMBIGUOUS,
+    REJECT_LOW_SCORE,
+    REJECT_MARKERS,
+    CurriculumMatcher,
+    match_courses,
+)
+
+TITLES = [
+    "SNSマーケティング入門 第1期",
+    "アプリ開発 初級",
+    "ITパスポート 基礎編",
+    "AI活用講座00000",
+    "AI活用講座00001",
+    "動画制作の基本と実践ワークショップ",
+]
+
+
+@pytest.fixture
+def matcher():
+    return CurriculumMatcher(TITLES)
+
+
+def test_exact_and_normalized(matcher):
+    assert matcher.match("アプリ開発 初級").method == "exact"
+    match = matcher.match("ＳＮＳマーケティング入門　第１期")
+    assert match.method == "normalized"
+    assert TITLES[match.curriculum] == "SNSマーケティング入門 第1期"
+
+
+def test_fuzzy_attaches_typo(matcher):
+    match = matcher.match("動画制作の基本と実践ワークショプ")
+    assert match.method == "fuzzy"
+    assert match.score >= CONFIDENT_SCORE
+    assert TITLES[match.curriculum] == "動画制作の基本と実践ワークショップ"
+
+
+@pytest.mark.parametrize("name, nearest", [
+    ("SNSマーケティング入門 第2期", "SNSマーケティング入門 第1期"),
+    ("アプリ開発 中級", "アプリ開発 初級"),
+    ("ITパスポート 応用編", "ITパスポート 基礎編"),
+    ("AI活用講座00099", "AI活用講座00000"),
+])
+def test_sibling_titles_are_not_attached(matcher, name, nearest):
+    match = matcher.match(name)
+    assert match.curriculum is None
+    assert match.reason == REJECT_MARKERS
+    assert TITLES[match.candidate] == nearest
+
+
+def test_sibling_with_typo_picks_matching_number():
+    matcher = CurriculumMatcher(["SNSマーケティング入門 第1期", "SNSマーケティング入門 第2期"])
+    match = matcher.match("SNSマーケテング入門 第2期")
+    assert match.method == "fuzzy"
+    assert matcher.titles[match.curriculum] == "SNSマーケティング入門 第2期"
+
+
+def test_ambiguous_is_not_attached():
+    matcher = CurriculumMatcher(["データ分析実務講座A", "データ分析実務講座B"])
+    match = matcher.match("データ分析実務講座")
+    assert match.curriculum is None
+    assert match.ambiguous
+    assert match.reason == REJECT_AMBIGUOUS
+
+
+def test_low_score_is_reported_not_attached():
+    matcher = CurriculumMatcher(["キャリアデザイン実践講座"])
+    match = matcher.match("キャリアデザイン講座")
+    assert match.curriculum is None
+    assert match.reason == REJECT_LOW_SCORE
+
+
+def test_result_keeps_near_misses_out_of_title_for():
+    names = ["アプリ開発 初級", "アプリ開発 中級", "アプリ開発 中級", "まったく別の話"]
+    result = match_courses(names, TITLES)
+    assert result.title_for("アプリ開発 中級") == "アプリ開発 中級"
+    assert result.title_for("アプリ開発 初級") == "アプリ開発 初級"
+    assert [name for name, _ in result.low_confidence()] == ["アプリ開発 中級"]
+    assert [name for name, _ in result.orphans()] == ["まったく別の話"]
+
+    summary = result.to_json()["summary"]
+    assert summary["exact"] == {"courses": 1, "lessons": 1}
+    assert summary["low_confidence"] == {"courses": 1, "lessons": 2}
+    assert summary["orphan"] == {"courses": 1, "lessons": 1}
+
+    out = io.StringIO()
+    result.report(out=out)
+    assert "low confidence, not attached: 'アプリ開発 中級' -> 'アプリ開発 初級'" in out.getvalue()
@@ -0,0 +1,81 @@
+"""convert_csv_to_ts のコマンドライン（入力 CSV のパスの指定・カリキュラムごとのチャンク）"""
+import csv
+import json
+
+import pytest
+
+import convert_csv_to_ts as cts
+from benchmarks import fixtures
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    return fixtures.write_catalog(str(tmp_path / "csv"), 100, 8, seed=2)
+
+
+def test_reads_csv_paths_from_arguments(tmp_path, catalog):
+    out = tmp_path / "mock_elearning_data.ts"
+    cts.main(["--content-csv", catalog["content"], "--curriculum-csv", catalog["curriculum"],
+              "--course-csv", catalog["course"], "--out", str(out)])
+    text = out.read_text(encoding="utf-8")
+    assert "import " not in text
+    assert text.count("export interface ContentItem") == 1
+    assert fixtures.curriculum_title(7) in text
+
+
+def test_config_and_argument_precedence(tmp_path, catalog):
+    config = tmp_path / "elearning.json"
+    config.write_text(json.dumps({"content_csv": catalog["content"], "curriculum_csv": "missing.csv",
+                                  "course_csv": catalog["course"]}), encoding="utf-8")
+    out = tmp_path / "out.ts"
+    cts.main(["--config", str(config), "--curriculum-csv", catalog["curriculum"], "--out", str(out)])
+    assert out.exists()
+
+
+def test_missing_csv_is_a_usage_error(tmp_path, capsys):
+    with pytest.raises(SystemExit) as exc:
+        cts.main(["--content-csv", str(tmp_path / "none.csv"), "--out", str(tmp_path / "out.ts")])
+    assert exc.value.code == 2
+    assert "--content-csv" in capsys.readouterr().err
+
+
+def test_shards_are_named_by_position(tmp_path, catalog):
+    with open(catalog["curriculum"], encoding="utf-8", newline="") as f:
+        rows = list(csv.reader(f))
+    # 2行目と3行目を同じ ID に、4行目をディレクトリの外を指す ID にする
+    rows[2][0] = rows[1][0]
+    rows[3][0] = "../x"
+    with open(catalog["curriculum"], "w", encoding="utf-8", newline="") as f:
+        csv.writer(f).writerows(rows)
+    shard_dir = tmp_path / "out" / "shards"
+    cts.main(["--content-csv", catalog["content"], "--curriculum-csv", catalog["curriculum"],
+              "--course-csv", catalog["course"], "--out", str(tmp_path / "out" / "out.ts"),
+              "--shard-dir", str(shard_dir)])
+
+    index = json.loads((shard_dir / "index.json").read_text(encoding="utf-8"))
+    assert [entry["id"] for entry in index[:3]] == [rows[1][0], rows[1][0], "../x"]
+    assert [entry["file"] for entry in index] == [f"{n}.json" for n in range(len(rows) - 1)]
+    files = sorted(path.name for path in shard_dir.iterdir())
+    assert files == sorted([entry["file"] for entry in index] + ["index.json"])
+    assert not (tmp_path / "out" / "x.json").exists()
+    for entry in index:
+        lessons = json.loads((shard_dir / entry["file"]).read_text(encoding="utf-8"))
+        assert len(lessons) == entry["lessonCount"]
+
+
+def test_nested_category_is_the_matched_curriculum_title(tmp_path, catalog):
+    assert fixtures.drift_courses(catalog["content"]) > 0
+    out = tmp_path / "out.ts"
+    shard_dir = tmp_path / "shards"
+    cts.main(["--content-csv", catalog["content"], "--curriculum-csv", catalog["curriculum"],
+              "--course-csv", catalog["course"], "--out", str(out), "--shard-dir", str(shard_dir)])
+    text = out.read_text(encoding="utf-8")
+    start = text.index("= ", text.index("export const ALL_CURRICULUMS")) + 2
+    curriculums = json.loads(text[start:text.index(";\n", start)])
+    assert sum(len(curr["lessons"]) for curr in curriculums) == 100
+    for curr in curriculums:
+        assert {lesson["category"] for lesson in curr["lessons"]} <= {curr["title"]}
+    # チャンクのレッスンも同じ
+    for entry in json.loads((shard_dir / "index.json").read_text(encoding="utf-8")):
+        lessons = json.loads((shard_dir / entry["file"]).read_text(encoding="utf-8"))
+        assert {lesson["category"] for lesson in lessons} <= {entry["title"]}
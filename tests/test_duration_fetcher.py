@@ -0,0 +1,113 @@
+"""duration_fetcher をプロセス内で起動したスタブサーバー（scripts/stub_youtube_server.py）に向けて確かめる"""
+import asyncio
+import time
+
+import pytest
+
+from duration_fetcher import ConnectionPool, backoff_delay, fetch_durations, format_duration
+from stub_youtube_server import FLAKY_FAILURES, serve, stub_duration_ms
+
+# テストでは待ち時間を短くする（レート制限は個別のテストで指定する）
+FAST = dict(rate=1000, burst=1000, backoff_base=0.01, backoff_max=0.05)
+
+
+@pytest.fixture
+def stub():
+    server, state = serve(slow=1.0)
+    yield f"http://127.0.0.1:{server.server_address[1]}", state
+    server.shutdown()
+    server.server_close()
+
+
+def test_fetches_durations_over_keep_alive(stub):
+    base_url, state = stub
+    ids = [f"vid{n}" for n in range(20)]
+    results = fetch_durations(ids, base_url=base_url, concurrency=4, **FAST)
+    assert {video_id: result.duration for video_id, result in results.items()} == {
+        video_id: format_duration(stub_duration_ms(video_id)) for video_id in ids
+    }
+    assert all(result.status == "ok" and result.attempts == 1 for result in results.values())
+    assert state.stats()["requests"] == 20
+    # 接続は同時実行数の分だけ開き、あとは使い回す
+    assert state.stats()["connections"] <= 4
+
+
+def test_unavailable_videos(stub):
+    base_url, _ = stub
+    results = fetch_durations(["gone_a", "priv_b"], base_url=base_url, **FAST)
+    assert results["gone_a"].status == "unavailable" and results["gone_a"].error == "HTTP 404"
+    assert results["priv_b"].status == "unavailable" and results["priv_b"].error == "LOGIN_REQUIRED"
+
+
+def test_retries_5xx_until_success(stub):
+    base_url, state = stub
+    result = fetch_durations(["flaky_x"], base_url=base_url, max_retries=4, **FAST)["flaky_x"]
+    assert result.status == "ok"
+    assert result.attempts == FLAKY_FAILURES + 1
+    assert state.hits["flaky_x"] == FLAKY_FAILURES + 1
+
+
+def test_gives_up_after_max_retries(stub):
+    base_url, state = stub
+    result = fetch_durations(["flaky_y"], base_url=base_url, max_retries=FLAKY_FAILURES - 1, **FAST)["flaky_y"]
+    assert result.status == "error"
+    assert result.error == "HTTP 503"
+    assert state.hits["flaky_y"] == FLAKY_FAILURES
+
+
+def test_429_waits_for_retry_after(stub):
+    base_url, state = stub
+    result = fetch_durations(["limit_z"], base_url=base_url, **FAST)["limit_z"]
+    assert result.status == "ok" and result.attempts == 2
+    first, second = state.times["limit_z"]
+    # backoff_max は 0.05 秒だが、Retry-After: 1 を下限にする
+    assert second - first >= 0.95
+
+
+def test_backoff_delay_is_capped_full_jitter(monkeypatch):
+    monkeypatch.setattr("random.uniform", lambda low, high: high)
+    assert [backoff_delay(attempt, 1.0, 5.0) for attempt in range(5)] == [1.0, 2.0, 4.0, 5.0, 5.0]
+    assert backoff_delay(0, 1.0, 5.0, retry_after="10") == 10.0
+    assert backoff_delay(0, 1.0, 5.0, retry_after="soon") == 1.0
+
+
+def test_rate_limit_spaces_requests(stub):
+    base_url, state = stub
+    ids = [f"rate{n}" for n in range(6)]
+    start = time.monotonic()
+    fetch_durations(ids, base_url=base_url, concurrency=6, rate=10, burst=1)
+    elapsed = time.monotonic() - start
+    # 1件目のあとは 0.1 秒に1件ずつ
+    assert elapsed >= 0.45
+    times = sorted(t for video_id in ids for t in state.times[video_id])
+    assert all(later - earlier >= 0.08 for earlier, later in zip(times, times[1:]))
+
+
+def test_timeout_uses_socket_timeout_and_drops_connection(stub):
+    base_url, _ = stub
+    results = fetch_durations(["slow_a", "fast_b"], base_url=base_url, timeout=0.3, max_retries=1,
+                              concurrency=1, **FAST)
+    assert results["slow_a"].status == "error"
+    assert "timed out" in results["slow_a"].error
+    assert results["fast_b"].status == "ok"
+
+
+def test_cancelled_request_keeps_connection_until_thread_finishes(stub):
+    base_url, _ = stub
+
+    async def run():
+        pool = ConnectionPool(base_url, 1, 5.0)
+        task = asyncio.ensure_future(pool.get("/watch?v=slow_c"))
+        await asyncio.sleep(0.2)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        # キャンセルされた接続はプールに戻らず、次のリクエストは新しい接続で送る
+        assert pool.idle == []
+        status, _, body = await pool.get("/watch?v=after")
+        pool.close()
+        return status, pool.connections_opened
+
+    status, opened = asyncio.run(run())
+    assert status == 200
+    assert opened == 2
@@ -0,0 +1,76 @@
+"""ScraperSource の重複排除（リクエスト数を数えるスタブサーバーで、正規化した動画 ID ごとに1回か確かめる）"""
+import asyncio
+from collections import namedtuple
+
+import pytest
+
+import update_data_real as udr
+from catalog_ingest import extract_video_id
+from duration_fetcher import SingleFlight, fetch_durations_async
+from duration_sources import ScraperSource
+from duration_store import DurationStore
+from stub_youtube_server import serve
+
+FAST = dict(rate=1000, burst=1000, concurrency=8, max_retries=0)
+
+Record = namedtuple("Record", "video_id url")
+
+
+@pytest.fixture
+def stub():
+    server, state = serve()
+    yield f"http://127.0.0.1:{server.server_address[1]}", state
+    server.shutdown()
+    server.server_close()
+
+
+def lesson_urls(video_ids):
+    """同じ動画をいろいろな書き方の URL で参照するレッスン"""
+    for vid in video_ids:
+        yield f"https://youtu.be/{vid}"
+        yield f"https://www.youtube.com/watch?v={vid}"
+        yield f"https://www.youtube.com/watch?v={vid}&t=42s"
+        yield f"https://youtu.be/{vid}?si=share"
+
+
+VIDEO_IDS = [f"v{n:010d}" for n in range(12)]
+
+
+def test_one_request_per_normalized_id(stub, tmp_path):
+    base_url, state = stub
+    records = [Record(extract_video_id(url), url) for url in lesson_urls(VIDEO_IDS)]
+    assert {record.video_id for record in records} == set(VIDEO_IDS)
+
+    store = DurationStore(str(tmp_path / "cache.json"))
+    try:
+        requested = udr.fetch_missing_durations(records, store, [ScraperSource(base_url=base_url, **FAST)])
+        assert requested == len(VIDEO_IDS)
+        assert state.hits == {vid: 1 for vid in VIDEO_IDS}
+        # 2回目はキャッシュから
+        assert udr.fetch_missing_durations(records, store, [ScraperSource(base_url=base_url, **FAST)]) == 0
+        assert sum(state.hits.values()) == len(VIDEO_IDS)
+    finally:
+        store.close()
+
+
+def test_duplicate_ids_coalesce_within_each_resolve(stub):
+    base_url, state = stub
+    source = ScraperSource(base_url=base_url, **FAST)
+    duplicated = VIDEO_IDS * 3
+    first = source.resolve(duplicated)
+    assert set(first) == set(VIDEO_IDS)
+    assert state.hits == {vid: 1 for vid in VIDEO_IDS}
+    assert source.coalesced == 2 * len(VIDEO_IDS)
+
+    # resolve ごとに新しいイベントループで動くので、前回の SingleFlight を引きずらない
+    second = source.resolve(duplicated)
+    assert {vid: r.duration for vid, r in second.items()} == {vid: r.duration for vid, r in first.items()}
+    assert state.hits == {vid: 2 for vid in VIDEO_IDS}
+
+
+def test_single_flight_rejects_another_event_loop(stub):
+    base_url, _ = stub
+    flight = SingleFlight()
+    asyncio.run(fetch_durations_async(VIDEO_IDS[:1], base_url=base_url, flight=flight, **FAST))
+    with pytest.raises(RuntimeError):
+        asyncio.run(fetch_durations_async(VIDEO_IDS[:1], base_url=base_url, flight=flight, **FAST))
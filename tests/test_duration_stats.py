@@ -0,0 +1,45 @@
+"""duration_stats の numpy の経路と array モジュールの経路が同じ結果になるか"""
+import pytest
+
+import duration_stats
+from duration_stats import UNRESOLVED, DurationTotals, course_totals, seconds_column
+
+np = pytest.importorskip("numpy")
+
+DURATIONS = ["1:02:45", "05:06", "10:00", "05:06", "不明", "", "PT1M30S", "1:02:45", "10:00", "45"]
+RESOLVED = [True, True, False, True, True, True, True, True, True, True]
+COURSES = ["A", "A", "A", "B", "B", "C", "C", "C", "D", "A"]
+
+EXPECTED_SECONDS = [3765, 306, UNRESOLVED, 306, UNRESOLVED, UNRESOLVED, 90, 3765, 600, 45]
+EXPECTED_TOTALS = {
+    "A": DurationTotals(3765 + 306 + 45, 4, 1),
+    "B": DurationTotals(306, 2, 1),
+    "C": DurationTotals(90 + 3765, 3, 1),
+    "D": DurationTotals(600, 1, 0),
+}
+
+
+def compute():
+    seconds = seconds_column(DURATIONS, RESOLVED)
+    return seconds, course_totals(COURSES, seconds)
+
+
+def test_numpy_and_fallback_agree(monkeypatch):
+    with_numpy = compute()
+    monkeypatch.setattr(duration_stats, "np", None)
+    without_numpy = compute()
+
+    assert list(with_numpy[0]) == list(without_numpy[0]) == EXPECTED_SECONDS
+    assert with_numpy[0].typecode == without_numpy[0].typecode == "q"
+    assert with_numpy[1] == without_numpy[1] == EXPECTED_TOTALS
+    for totals in (*with_numpy[1].values(), *without_numpy[1].values()):
+        assert all(type(value) is int for value in totals)
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_empty_columns(monkeypatch, use_numpy):
+    if not use_numpy:
+        monkeypatch.setattr(duration_stats, "np", None)
+    seconds = seconds_column([], [])
+    assert list(seconds) == []
+    assert course_totals([], seconds) == {}
@@ -0,0 +1,55 @@
+"""DurationStore の読み込み（旧形式の移行・壊れたファイル）と TTL"""
+import json
+import os
+import time
+
+import pytest
+
+from duration_store import DAY, DurationStore
+
+
+def write_json(path, data, age_days=0):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    if age_days:
+        old = time.time() - age_days * DAY
+        os.utime(path, (old, old))
+
+
+def test_legacy_cache_is_imported_as_fresh(tmp_path):
+    path = str(tmp_path / "duration_cache.json")
+    # 1年前から更新されていない旧形式のキャッシュでも、移行直後に全件を取り直さない
+    write_json(path, {"abc": "05:06", "def": "1:02:45"}, age_days=365)
+    store = DurationStore(path)
+    assert store.duration("abc") == "05:06"
+    assert not store.needs_fetch("abc")
+    assert not store.needs_fetch("def")
+    assert store.needs_fetch("abc", now=time.time() + 91 * DAY)
+
+
+@pytest.mark.parametrize("content", ["[1, 2, 3]", '"text"', "null", '{"version": 2, "entries": []}'])
+def test_non_object_cache_is_ignored(tmp_path, content):
+    path = str(tmp_path / "duration_cache.json")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+    store = DurationStore(path)
+    assert store.entries == {}
+    assert store.needs_fetch("abc")
+
+
+def test_legacy_cache_skips_non_string_values(tmp_path):
+    path = str(tmp_path / "duration_cache.json")
+    write_json(path, {"abc": "05:06", "bad": {"nested": True}, "num": 12})
+    assert set(DurationStore(path).entries) == {"abc"}
+
+
+def test_journal_survives_reopen(tmp_path):
+    path = str(tmp_path / "duration_cache.json")
+    store = DurationStore(path)
+    store.put("abc", "ok", "05:06")
+    store.put("gone", "unavailable", error="HTTP 404")
+    store.close()
+    reopened = DurationStore(path)
+    assert reopened.duration("abc") == "05:06"
+    assert not reopened.needs_fetch("gone")
+    assert reopened.needs_fetch("gone", now=time.time() + 15 * DAY)
@@ -0,0 +1,68 @@
+"""extract_pdf_text のページ単位のキャッシュ（ローカルで生成した明細 PDF で確認する）"""
+import os
+
+import pytest
+
+pytest.importorskip("reportlab")
+pypdf = pytest.importorskip("pypdf")
+
+import extract_pdf_text  # noqa: E402
+from extract_pdf_text import file_sha1, iter_records  # noqa: E402
+from extract_transactions import write_sample_statement  # noqa: E402
+
+TRANSACTIONS = [(f"2025/{month:02d}/03", f"{100_000 + month * 1_000:,}") for month in range(1, 13)]
+
+
+def extract(pdf, cache_dir):
+    return list(iter_records([pdf], workers=1, cache_dir=cache_dir))
+
+
+def forbid_reading_pdfs(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("the PDF should not be opened")
+
+    monkeypatch.setattr(extract_pdf_text, "iter_pages", fail)
+    monkeypatch.setattr(pypdf, "PdfReader", fail)
+
+
+@pytest.fixture
+def pdf(tmp_path):
+    path = str(tmp_path / "statement.pdf")
+    write_sample_statement(path, TRANSACTIONS)
+    return path
+
+
+def test_unchanged_pdf_is_served_from_cache(tmp_path, pdf, monkeypatch):
+    cache_dir = str(tmp_path / "cache")
+    first = extract(pdf, cache_dir)
+    assert "2025/01/03" in first[0]["text"]
+    sha1 = file_sha1(pdf)
+    assert sorted(os.listdir(os.path.join(cache_dir, sha1))) == ["0.txt", "meta.json"]
+
+    forbid_reading_pdfs(monkeypatch)
+    assert extract(pdf, cache_dir) == first
+
+
+def test_changed_pdf_is_extracted_again(tmp_path, pdf):
+    cache_dir = str(tmp_path / "cache")
+    first = extract(pdf, cache_dir)
+
+    write_sample_statement(pdf, [("2026/04/01", "777,000")])
+    second = extract(pdf, cache_dir)
+    assert second[0]["sha1"] == file_sha1(pdf) != first[0]["sha1"]
+    assert "777,000" in second[0]["text"]
+    assert "2025/01/03" not in second[0]["text"]
+    # 前の内容のキャッシュはそのまま残る（ハッシュごとのディレクトリ）
+    assert sorted(os.listdir(cache_dir)) == sorted([first[0]["sha1"], second[0]["sha1"]])
+
+
+def test_partial_cache_reads_the_missing_pages(tmp_path, pdf):
+    cache_dir = str(tmp_path / "cache")
+    first = extract(pdf, cache_dir)
+    os.remove(os.path.join(cache_dir, file_sha1(pdf), "0.txt"))
+    assert extract(pdf, cache_dir) == first
+
+
+def test_no_cache_writes_nothing(tmp_path, pdf):
+    assert extract(pdf, None) == extract(pdf, str(tmp_path / "cache"))
+    assert sorted(os.listdir(tmp_path)) == ["cache", "statement.pdf"]
@@ -0,0 +1,88 @@
+"""extract_transactions の取引行の抽出（ローカルで生成した明細 PDF で確認する）"""
+import gc
+import json
+
+import pytest
+
+pytest.importorskip("reportlab")
+pytest.importorskip("pypdf")
+
+from extract_pdf_text import iter_records  # noqa: E402
+from extract_transactions import (  # noqa: E402
+    iter_transactions,
+    line_amount,
+    main,
+    new_stats,
+    pages_from_pdfs,
+    write_sample_statement,
+)
+
+
+@pytest.mark.parametrize("line, amount", [
+    ("2025/02/03 外注費 300,000円", "300,000"),
+    ("2025-02-03 外注費 ¥ 200000", "200000"),
+    ("2025年2月3日 振込 1,250,000", "1,250,000"),
+    ("2025/02/03 外注費 300,000円 残高 1,200,000", "300,000"),
+    ("2025/02/03 合計 900,000円 お支払金額 300,000円", "300,000"),
+    ("2025/02/03 振込 300,000円 手数料 440円", "300,000"),
+])
+def test_line_amount(line, amount):
+    assert line_amount(line) == amount
+
+
+@pytest.mark.parametrize("line", [
+    "期間 2025/01/01〜2025/01/31",
+    "2025/02/03 請求書No.12345",
+    "発行日：2026年01月05日",
+    "2025/02/03 300,000円 260,000円",
+    "2025/02/03 残高 1,200,000",
+])
+def test_line_amount_rejects(line):
+    assert line_amount(line) is None
+
+
+@pytest.fixture
+def sample_transactions():
+    return [(f"2025/{month:02d}/{day:02d}", f"{100_000 + month * 7_000 + day * 1_000:,}")
+            for month in range(1, 13) for day in (3, 17, 28)]
+
+
+def test_sample_statement_round_trip(tmp_path, sample_transactions):
+    pdf = str(tmp_path / "statement.pdf")
+    write_sample_statement(pdf, sample_transactions)
+    stats = new_stats()
+    found = list(iter_transactions(pages_from_pdfs([pdf], 1, None, stats), stats))
+    assert found == sample_transactions
+    assert stats["invalid"] == 0
+    assert stats["pages"] == 2
+
+
+def test_duplicates_are_dropped(tmp_path, sample_transactions):
+    pdf = str(tmp_path / "statement.pdf")
+    write_sample_statement(pdf, sample_transactions[:5] + sample_transactions[:2])
+    stats = new_stats()
+    assert list(iter_transactions(pages_from_pdfs([pdf], 1, None, stats), stats)) == sample_transactions[:5]
+    assert stats["duplicates"] == 2
+
+
+def test_cli_writes_csv(tmp_path, sample_transactions):
+    pdf = str(tmp_path / "statement.pdf")
+    out = tmp_path / "transactions.csv"
+    write_sample_statement(pdf, sample_transactions[:3])
+    assert main([pdf, "--out", str(out), "--workers", "1", "--cache-dir", ""]) == 0
+    lines = out.read_text(encoding="utf-8").splitlines()
+    assert lines == ["date,amount"] + [f'{date},"{amount}"' for date, amount in sample_transactions[:3]]
+
+
+@pytest.mark.filterwarnings("error::pytest.PytestUnraisableExceptionWarning")
+def test_cli_reads_jsonl_and_closes_it(tmp_path, sample_transactions):
+    pdf = str(tmp_path / "statement.pdf")
+    write_sample_statement(pdf, sample_transactions[:4])
+    jsonl = tmp_path / "pages.jsonl"
+    jsonl.write_text("".join(json.dumps(record, ensure_ascii=False) + "\n"
+                             for record in iter_records([pdf], workers=1, cache_dir=None)), encoding="utf-8")
+    out = tmp_path / "transactions.jsonl"
+    assert main(["--from-jsonl", str(jsonl), "--out", str(out)]) == 0
+    gc.collect()
+    records = [json.loads(line) for line in out.read_text(encoding="utf-8").splitlines()]
+    assert [(r["date"], r["amount"]) for r in records] == sample_transactions[:4]
@@ -0,0 +1,107 @@
+"""generate_seed の差分出力（--delta / --commit-snapshot）と SeedWriter の並列整形"""
+import io
+import json
+
+import pytest
+
+import generate_seed
+
+
+@pytest.fixture
+def seed_data(monkeypatch):
+    """組み込みのデータの一部を差し替えられるようにコピーを使う"""
+    companies = [dict(c) for c in generate_seed.companies[:3]]
+    jobs = [dict(j, companyId=companies[i % 3]["id"]) for i, j in enumerate(generate_seed.jobs[:4])]
+    monkeypatch.setattr(generate_seed, "companies", companies)
+    monkeypatch.setattr(generate_seed, "jobs", jobs)
+    return companies, jobs
+
+
+def run(*args):
+    generate_seed.main(["--uuid-scheme", "uuid5", *args])
+
+
+def test_delta_snapshot_waits_for_commit(tmp_path, seed_data):
+    companies, _ = seed_data
+    snapshot = tmp_path / "snapshot.json"
+    out = tmp_path / "delta.sql"
+
+    run("--delta", str(snapshot), "--out", str(out))
+    assert not snapshot.exists()
+    assert json.loads((tmp_path / "snapshot.json.pending").read_text())["tables"]["jobs"]
+    assert "4 upserted" in out.read_text(encoding="utf-8")
+
+    # 流さなかった差分は次の実行でももう一度出る
+    run("--delta", str(snapshot), "--out", str(out))
+    assert "organizations 3 upserted / 0 deleted, jobs 4 upserted / 0 deleted" in out.read_text(encoding="utf-8")
+
+    run("--commit-snapshot", str(snapshot))
+    assert snapshot.exists() and not (tmp_path / "snapshot.json.pending").exists()
+
+    companies[0]["name"] = "名前を変更した会社"
+    run("--delta", str(snapshot), "--out", str(out))
+    assert "organizations 1 upserted / 0 deleted, jobs 0 upserted / 0 deleted" in out.read_text(encoding="utf-8")
+
+
+def test_commit_without_pending_fails(tmp_path):
+    with pytest.raises(SystemExit):
+        run("--commit-snapshot", str(tmp_path / "snapshot.json"))
+
+
+def test_deletes_run_child_first(tmp_path, seed_data):
+    companies, jobs = seed_data
+    snapshot = tmp_path / "snapshot.json"
+    out = tmp_path / "delta.sql"
+    run("--delta", str(snapshot), "--out", str(out))
+    run("--commit-snapshot", str(snapshot))
+
+    removed = companies.pop()
+    jobs[:] = [j for j in jobs if j["companyId"] != removed["id"]]
+    run("--delta", str(snapshot), "--out", str(out))
+    sql = out.read_text(encoding="utf-8")
+    assert sql.index("DELETE FROM jobs") < sql.index("DELETE FROM organizations")
+
+
+def test_removing_a_referenced_organization_is_refused(tmp_path, seed_data):
+    companies, _ = seed_data
+    snapshot = tmp_path / "snapshot.json"
+    out = tmp_path / "delta.sql"
+    run("--delta", str(snapshot), "--out", str(out))
+    run("--commit-snapshot", str(snapshot))
+
+    companies.pop()
+    with pytest.raises(SystemExit):
+        run("--delta", str(snapshot), "--out", str(out))
+    assert not (tmp_path / "delta.sql.tmp").exists()
+    assert not (tmp_path / "snapshot.json.pending").exists()
+
+
+def write_script(sources, workers):
+    writer = generate_seed.SeedWriter("copy", workers=workers, scheme="uuid5")
+    out = io.BytesIO()
+    try:
+        writer.write_script(out, sources)
+        return out.getvalue(), writer.pool is not None
+    finally:
+        writer.close()
+
+
+def test_small_tables_are_rendered_without_a_pool():
+    sources = [(generate_seed.TABLES_BY_NAME["organizations"], generate_seed.companies),
+               (generate_seed.TABLES_BY_NAME["jobs"], generate_seed.jobs)]
+    serial, _ = write_script(sources, workers=1)
+    output, started = write_script(sources, workers=4)
+    assert not started
+    assert output == serial
+
+
+def test_large_tables_use_the_pool_with_identical_output():
+    import seed_synthetic
+
+    params = dict(vars(seed_synthetic.build_parser().parse_args([])), jobs=generate_seed.PARALLEL_MIN_ROWS + 1)
+    table = generate_seed.TABLES_BY_NAME["jobs"]
+    sources = [(table, seed_synthetic.SyntheticSource("jobs", params))]
+    serial, _ = write_script(sources, workers=1)
+    output, started = write_script(sources, workers=2)
+    assert started
+    assert output == serial
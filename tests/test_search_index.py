@@ -0,0 +1,96 @@
+"""search_index の検索規則（TS の searchContent と同じ規則を Python 側で確かめる）"""
+import pytest
+
+from search_index import (
+    SearchIndex, SearchIndexBuilder, build_index, delta_encode, flatten_postings, normalize, text_grams,
+)
+
+CONTENTS = [
+    ("Python入門 第1回", "プログラミング講座"),     # 0
+    ("Python応用 第2回", "プログラミング講座"),     # 1
+    ("C 言語 第1回", "プログラミング講座"),         # 2
+    ("ChatGPT活用術", "AI活用講座"),               # 3
+    ("第1回 ライブ アーカイブ", "動画制作講座"),     # 4
+]
+DESCRIPTIONS = [("動画制作講座", "撮影とカット割りを基礎から学びます")]
+
+
+@pytest.fixture(scope="module")
+def index():
+    return build_index(CONTENTS, DESCRIPTIONS)
+
+
+def test_three_or_more_characters_need_every_trigram(index):
+    assert index.search("python") == [0, 1]
+    assert len(index.requirements("python")) == 4
+    # 語の一部の trigram しかないものは拾わない
+    assert index.search("pythox") == []
+    # gram は語の中だけで作るので、空白をまたぐ trigram はない
+    assert index.search("c言語") == []
+
+
+def test_two_characters_use_the_bigram(index):
+    assert index.requirements("入門") == [[index.gram_ids["入門"]]]
+    assert index.search("入門") == [0]
+    assert index.search("ｐｙ") == [0, 1]
+
+
+def test_one_character_uses_any_bigram_containing_it(index):
+    [ids] = index.requirements("応")
+    assert {index.grams[i] for i in ids} == {"n応", "応用"}
+    assert index.search("応") == [1]
+
+
+def test_one_character_word_is_searchable(index):
+    assert "c" in text_grams("C 言語")
+    assert index.search("c") == [2, 3]
+    assert index.search("C 言語") == [2]
+
+
+def test_group_and_description_only_matches(index):
+    # タイトルにはないが、コース名やカリキュラムの説明にある
+    assert index.search("プログラミング") == [0, 1, 2]
+    assert index.search("カット割り") == [4]
+    assert index.search("ライブ 撮影") == [4]
+
+
+def test_terms_are_anded(index):
+    assert index.search("python 第1回") == [0]
+    assert index.search("python chatgpt") == []
+    assert index.search("講座 活用") == [3]
+    assert index.search("   ") == []
+    assert index.search("python", limit=1) == [0]
+
+
+def linear_search(query):
+    terms = normalize(query).split()
+    texts = {group: normalize(f"{group} {text}") for group, text in DESCRIPTIONS}
+    return [doc for doc, (title, group) in enumerate(CONTENTS)
+            if all(term in normalize(title) or term in texts.get(group, normalize(group)) for term in terms)]
+
+
+@pytest.mark.parametrize("query", ["c", "第", "回", "活用", "チャ", "ライブ", "講座 第1回", "ｃｈａｔ", "制作 撮影"])
+def test_never_misses_a_substring_match(index, query):
+    assert set(linear_search(query)) <= set(index.search(query))
+
+
+def test_delta_encode_and_flatten_round_trip():
+    assert delta_encode([3, 5, 5, 12]) == [3, 2, 0, 7]
+    postings = {"ab": [9, 1, 4], "bc": [], "cd": [0]}
+    grams = ["ab", "bc", "cd", "zz"]
+    offsets, flat = flatten_postings(grams, postings)
+    assert offsets == [0, 3, 3, 4, 4]
+    index = SearchIndex(grams, [], [], offsets, flat, offsets, flat)
+    assert [list(index.decode(offsets, flat, i)) for i in range(len(grams))] == [[1, 4, 9], [], [0], []]
+
+
+def test_builder_postings_round_trip(index):
+    builder = SearchIndexBuilder()
+    for title, group in CONTENTS:
+        builder.add_document(title, group)
+    for group, text in DESCRIPTIONS:
+        builder.add_group_text(group, text)
+    for gram, docs in builder.title_postings.items():
+        assert list(index.decode(index.title_offsets, index.title_postings, index.gram_ids[gram])) == docs
+    for gram, groups in builder.group_postings.items():
+        assert list(index.decode(index.group_offsets, index.group_postings, index.gram_ids[gram])) == sorted(groups)
@@ -0,0 +1,122 @@
+"""seed_loader を実際の PostgreSQL に読み込んで確かめる（DATABASE_URL がなければスキップ）。
+
+テーブルは専用のスキーマに作り、終わったら消す。
+"""
+import csv
+import os
+import uuid
+
+import pytest
+
+psycopg = pytest.importorskip("psycopg")
+
+import seed_loader
+import update_data_real as udr
+from benchmarks import fixtures
+
+DSN = os.environ.get("DATABASE_URL")
+SCHEMA = "seed_loader_test"
+
+pytestmark = pytest.mark.skipif(not DSN, reason="DATABASE_URL is not set")
+
+# supabase/migrations の courses / course_curriculums / course_lessons（読み込みに関わる列と制約だけ）
+DDL = """
+CREATE TABLE courses (
+  id uuid PRIMARY KEY, title text NOT NULL UNIQUE, description text, category text, level text,
+  duration text, image text, is_published boolean DEFAULT true, order_index integer DEFAULT 0
+);
+CREATE TABLE course_curriculums (
+  id uuid PRIMARY KEY, course_id uuid REFERENCES courses(id) ON DELETE CASCADE NOT NULL,
+  title text NOT NULL, description text, category text, order_index integer DEFAULT 0
+);
+CREATE TABLE course_lessons (
+  id uuid PRIMARY KEY, curriculum_id uuid REFERENCES course_curriculums(id) ON DELETE CASCADE NOT NULL,
+  title text NOT NULL, description text, youtube_url text, duration text, type text,
+  order_index integer DEFAULT 0
+);
+"""
+
+
+@pytest.fixture
+def db():
+    with psycopg.connect(DSN, autocommit=True) as conn:
+        conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        conn.execute(f"CREATE SCHEMA {SCHEMA}")
+        conn.execute(f"SET search_path TO {SCHEMA}")
+        conn.execute(DDL)
+        yield conn
+        conn.execute(f"DROP SCHEMA {SCHEMA} CASCADE")
+
+
+@pytest.fixture
+def pool(db):
+    pool = seed_loader.ConnectionPool(DSN, 2, [f"SET search_path TO {SCHEMA}"])
+    yield pool
+    pool.close()
+
+
+def catalog_paths(tmp_path):
+    catalog = fixtures.write_catalog(str(tmp_path / "csv"), 200, 12, seed=3)
+    # 最初のカリキュラムと同じタイトルの行を ID を変えて足す
+    with open(catalog["curriculum"], encoding="utf-8", newline="") as f:
+        rows = list(csv.reader(f))
+    rows.append(["99", rows[1][1], "重複した行"])
+    with open(catalog["curriculum"], "w", encoding="utf-8", newline="") as f:
+        csv.writer(f).writerows(rows)
+    return udr.make_paths(content_csv=catalog["content"], curriculum_csv=catalog["curriculum"],
+                          course_csv=catalog["course"], cache_file=str(tmp_path / "duration_cache.json"),
+                          catalog_cache_dir=None)
+
+
+@pytest.mark.parametrize("method", seed_loader.METHODS)
+def test_catalog_loads_around_title_conflicts(tmp_path, db, pool, method):
+    existing_id = uuid.uuid4()
+    title = fixtures.curriculum_title(0)
+    db.execute("INSERT INTO courses (id, title) VALUES (%s, %s)", [existing_id, title])
+
+    sources = seed_loader.catalog_sources(catalog_paths(tmp_path))
+    assert seed_loader.adopt_existing_courses(pool, sources) == 1
+    loader = seed_loader.SeedLoader(pool, method, batch_size=50)
+    try:
+        stats = loader.load(sources)
+    finally:
+        loader.close()
+
+    assert stats["courses"].rows == 12
+    assert db.execute("SELECT count(*) FROM courses").fetchone()[0] == 12
+    assert db.execute("SELECT id FROM courses WHERE title = %s", [title]).fetchone()[0] == existing_id
+    chapter_courses = db.execute("SELECT course_id FROM course_curriculums WHERE title = %s", [title]).fetchall()
+    assert chapter_courses == [(existing_id,)]
+    assert db.execute("SELECT count(*) FROM course_lessons").fetchone()[0] == stats["course_lessons"].rows > 0
+
+    # もう一度読み込んでも同じ行に upsert されるだけ
+    sources = seed_loader.catalog_sources(catalog_paths(tmp_path))
+    seed_loader.adopt_existing_courses(pool, sources)
+    loader = seed_loader.SeedLoader(pool, method, batch_size=50)
+    try:
+        loader.load(sources)
+    finally:
+        loader.close()
+    assert db.execute("SELECT count(*) FROM courses").fetchone()[0] == 12
+
+
+def test_failed_statement_keeps_connection(pool):
+    with pytest.raises(psycopg.errors.UndefinedTable):
+        with pool.connection() as conn:
+            conn.execute("SELECT * FROM no_such_table")
+    # ロールバックできた接続はそのまま使い回す
+    with pool.connection() as again:
+        assert again is conn
+        assert again.execute("SELECT 1").fetchone() == (1,)
+
+
+def test_broken_connection_is_discarded(pool):
+    with pytest.raises(psycopg.OperationalError):
+        with pool.connection() as conn:
+            conn.execute("SELECT pg_terminate_backend(pg_backend_pid())")
+    assert conn.closed
+    assert pool.connections == []
+    with pool.connection() as fresh:
+        assert fresh is not conn
+        assert fresh.execute("SELECT 1").fetchone() == (1,)
+    assert pool.connections == [fresh]
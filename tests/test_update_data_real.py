@@ -0,0 +1,117 @@
+"""update_data_real のライブラリ API（ElearningBuilder）"""
+import csv
+import os
+
+import pytest
+
+import update_data_real as udr
+from benchmarks import fixtures
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    return fixtures.write_catalog(str(tmp_path / "csv"), 300, 40, seed=1)
+
+
+def make_paths(catalog, out_dir, **overrides):
+    return udr.make_paths(
+        content_csv=catalog["content"], curriculum_csv=catalog["curriculum"], course_csv=catalog["course"],
+        output_ts=os.path.join(out_dir, "ts", "mock_elearning_data.ts"),
+        cache_file=os.path.join(out_dir, "cache", "duration_cache.json"),
+        catalog_cache_dir=None, **overrides)
+
+
+def test_creates_missing_output_directories(tmp_path, catalog):
+    out_dir = str(tmp_path / "out")
+    paths = make_paths(catalog, out_dir, catalog_bin=os.path.join(out_dir, "bin", "catalog.bin"),
+                       match_report=os.path.join(out_dir, "reports", "match.json"))
+    with udr.ElearningBuilder(paths) as builder:
+        assert builder.build().written
+    for path in (paths.output_ts, paths.manifest_file, paths.search_index_ts, paths.catalog_bin, paths.match_report):
+        assert os.path.exists(path), path
+
+
+def test_no_sources_skips_fetch_and_compaction(tmp_path, catalog, capsys):
+    paths = make_paths(catalog, str(tmp_path / "out"))
+    with udr.ElearningBuilder(paths) as builder:
+        builder.build()
+    out = capsys.readouterr().out
+    assert "new or stale videos" not in out
+    # 何も取得していないので再生時間のキャッシュは書き直さない
+    assert not os.path.exists(paths.cache_file)
+
+
+def rewrite_titles(path, changes):
+    with open(path, encoding="utf-8", newline="") as f:
+        rows = list(csv.reader(f))
+    for index, title in changes.items():
+        rows[index][1] = title
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        csv.writer(f).writerows(rows)
+
+
+def read(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+def test_incremental_build_matches_full_build(tmp_path, catalog):
+    paths = make_paths(catalog, str(tmp_path / "out"))
+    with udr.ElearningBuilder(paths) as builder:
+        builder.build()
+        rewrite_titles(catalog["content"], {3: "変更したタイトル", 120: "もう1つ変更"})
+        content_table = builder.build().tables[0]
+        assert len(content_table.changed) == 2
+        assert not content_table.added and not content_table.removed
+
+    full = make_paths(catalog, str(tmp_path / "full"))
+    with udr.ElearningBuilder(full) as builder:
+        builder.build(full=True)
+    assert read(paths.output_ts) == read(full.output_ts)
+    # マニフェストは断片を持たないので出力よりずっと小さい
+    assert os.path.getsize(paths.manifest_file) < os.path.getsize(paths.output_ts) / 4
+
+
+def test_edited_output_is_not_reused(tmp_path, catalog):
+    paths = make_paths(catalog, str(tmp_path / "out"))
+    with udr.ElearningBuilder(paths) as builder:
+        builder.build()
+    expected = read(paths.output_ts)
+    with open(paths.output_ts, "w", encoding="utf-8") as f:
+        f.write(expected.replace("title:", "titel:"))
+    rewrite_titles(catalog["content"], {5: "変更したタイトル"})
+    with udr.ElearningBuilder(paths) as builder:
+        builder.build()
+    with udr.ElearningBuilder(make_paths(catalog, str(tmp_path / "full"))) as builder:
+        builder.build(full=True)
+    assert read(paths.output_ts) == read(os.path.join(str(tmp_path / "full"), "ts", "mock_elearning_data.ts"))
+
+
+def test_report_lists_at_most_limit_ids(capsys):
+    table = udr.TableBuild("ALL_CONTENT", None)
+    for n in range(50):
+        table.emit(str(n), "h", lambda: "x")
+    table.report(limit=5)
+    lines = capsys.readouterr().out.splitlines()
+    assert lines == ["ALL_CONTENT: 50 added, 0 changed, 0 removed", "  added: 0, 1, 2, 3, 4, ... 45 more"]
+
+
+def nested_categories(text):
+    """ALL_CURRICULUMS の (カリキュラムのタイトル, レッスンの category) を順に返す"""
+    section = text[text.index("export const ALL_CURRICULUMS"):text.index("export const ALL_COURSES")]
+    title = None
+    for line in section.splitlines():
+        if line.startswith("        title: '"):
+            title = line[len("        title: '"):-len("',")]
+        elif line.startswith("                category: '"):
+            yield title, line[len("                category: '"):-len("',")]
+
+
+def test_nested_category_is_the_matched_curriculum_title(tmp_path, catalog):
+    assert fixtures.drift_courses(catalog["content"]) > 0
+    paths = make_paths(catalog, str(tmp_path / "out"))
+    with udr.ElearningBuilder(paths) as builder:
+        builder.build()
+    pairs = list(nested_categories(read(paths.output_ts)))
+    assert len(pairs) == 300
+    assert all(category == title for title, category in pairs)
@@ -1,113 +1,72 @@
-import csv
+"""CSV（コンテンツ一覧・カリキュラム一覧・コース一覧）から src/data/mock_elearning_data.ts を生成する。
+
+コマンドとしても、ライブラリとしても使える:
+
+    python update_data_real.py --content-csv data/コンテンツ一覧.csv ...
+    python update_data_real.py --config elearning.json --watch
+
+    from update_data_real import ElearningBuilder, make_paths
+    with ElearningBuilder(make_paths(output_ts="out.ts")) as builder:
+        builder.build()
+
+ElearningBuilder は解析済みの CSV・レコード・再生時間キャッシュ・前回の行ハッシュをメモリに持つので、
+同じインスタンスで build() を繰り返すと変わった CSV だけを読み直して再生成する（--watch はこれを使う）。
+
+mock_elearning_data.ts と一緒に、タイトル・コース名・カリキュラムの説明の検索インデックス
+（elearning_search_index.ts、search_index.py を参照）も書き出す。catalog_bin を指定すると、
+サーバー側で ID から1件を引くためのバイナリのカタログ（catalog_binary.py を参照）も書き出す。
+
+レッスンの「コース」列とカリキュラムのタイトルは catalog_matching.py で照合する（表記揺れを吸収し、
+信頼度の低い一致とどのカリキュラムにも入らないレッスンを報告する）。
+"""
+import argparse
+import hashlib
 import json
-import re
-import time
-import urllib.request
-from datetime import datetime
 import os
-import concurrent.futures
+import time
+from collections import namedtuple
+
+from catalog_binary import tables_from_elearning, write_catalog
+from catalog_matching import CurriculumMatcher, MatchResult
+from catalog_ingest import (
+    CONTENT_SCHEMA, COURSE_SCHEMA, CURRICULUM_SCHEMA, DEFAULT_CACHE_DIR, load_catalog, load_table,
+)
+from duration_fetcher import DEFAULT_BASE_URL, FALLBACK_DURATION
+from duration_sources import MetadataIndexSource, ScraperSource
+from duration_stats import EMPTY_TOTALS, UNRESOLVED, course_totals, seconds_column
+from duration_store import DAY, DurationStore
+from elearning_ts import LAYOUTS, NORMALIZED_ACCESSOR_TS, NORMALIZED_CURRICULUMS_TS
+from search_index import build_index
 
-# Paths
+# Paths（既定値。--config / コマンドライン引数 / make_paths() で上書きできる）
 CONTENT_CSV = "/Users/yuyu24/2ndBrain/Ehime Base app/元データ/コンテンツ一覧.csv"
 COURSE_CSV = "/Users/yuyu24/2ndBrain/Ehime Base app/元データ/コース一覧.csv"
 CURRICULUM_CSV = "/Users/yuyu24/2ndBrain/Ehime Base app/元データ/カリキュラム一覧.csv"
 OUTPUT_TS = "src/data/mock_elearning_data.ts"
 CACHE_FILE = "duration_cache.json"
+# 差分ビルド用マニフェスト（指定がなければ duration_cache.json と同じ場所に置く）
+MANIFEST_NAME = "elearning_build_manifest.json"
+MANIFEST_FILE = os.path.join(os.path.dirname(CACHE_FILE), MANIFEST_NAME)
+MANIFEST_VERSION = 6
 
-# Load Cache
-duration_cache = {}
-if os.path.exists(CACHE_FILE):
-    try:
-        with open(CACHE_FILE, 'r') as f:
-            duration_cache = json.load(f)
-    except:
-        duration_cache = {}
-
-def get_video_duration(url):
-    if not url or ("youtube" not in url and "youtu.be" not in url):
-        return "10:00" # Default/Fallback
-    
-    video_id_match = re.search(r'(?:v=|\/)([\w-]{11})(?:[&?]|$)', url)
-    if not video_id_match:
-        return "10:00"
-    
-    video_id = video_id_match.group(1)
-    if video_id in duration_cache:
-        return duration_cache[video_id]
-        
-    try:
-        # Simple scraping
-        with urllib.request.urlopen(url) as response:
-            html = response.read().decode('utf-8')
-            match = re.search(r'"approxDurationMs":"(\d+)"', html)
-            if match:
-                ms = int(match.group(1))
-                seconds = ms // 1000
-                m, s = divmod(seconds, 60)
-                h, m = divmod(m, 60)
-                if h > 0:
-                    duration = f"{h}:{m:02d}:{s:02d}"
-                else:
-                    duration = f"{m:02d}:{s:02d}"
-                
-                duration_cache[video_id] = duration
-                return duration
-    except Exception as e:
-        print(f"Error fetching {url}: {e}")
-        
-    return "10:00" # Fallback
-
-def save_cache():
-    with open(CACHE_FILE, 'w') as f:
-        json.dump(duration_cache, f)
-
-# Read CSVs
-def read_csv(path):
-    with open(path, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        return list(reader)
-
-contents = read_csv(CONTENT_CSV)
-courses = read_csv(COURSE_CSV) # Tracks
-curriculums = read_csv(CURRICULUM_CSV) # Courses
-
-# Group Contents by 'コース' (Course Name)
-content_by_course = {}
-urls_to_fetch = []
-
-for c in contents:
-    course_name = c.get('コース', '').strip()
-    if not course_name:
-        course_name = "未分類"
-    
-    if course_name not in content_by_course:
-        content_by_course[course_name] = []
-    
-    url = c.get('YOUTUBE_URL', '')
-    if url:
-        vid_match = re.search(r'(?:v=|\/)([\w-]{11})(?:[&?]|$)', url)
-        if vid_match:
-            vid = vid_match.group(1)
-            if vid not in duration_cache:
-                urls_to_fetch.append(url)
-    
-    content_by_course[course_name].append(c)
-
-print(f"Found {len(urls_to_fetch)} new videos to fetch durations for.")
-
-def fetch_and_cache(url):
-    get_video_duration(url)
-
-if urls_to_fetch:
-    # Limit max workers to avoid rate limits
-    with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-        list(executor.map(fetch_and_cache, urls_to_fetch))
-    save_cache()
-
-# Generate TS Content
-ts_output = []
-
-ts_output.append("""// This file contains mock data imported from CSV files.
+# 検索インデックス（指定がなければ output_ts と同じ場所に置く）
+SEARCH_INDEX_NAME = "elearning_search_index.ts"
+SEARCH_INDEX_TS = os.path.join(os.path.dirname(OUTPUT_TS), SEARCH_INDEX_NAME)
+
+TABLE_NAMES = ("ALL_CONTENT", "ALL_CURRICULUMS", "ALL_COURSES")
+# 差分ビルドの報告で、追加・変更・削除ごとに表示する ID の数
+REPORT_LIMIT = 20
+
+# catalog_cache_dir / search_index_ts が空文字なら .catalog_cache を使わない / 検索インデックスを書かない。
+# catalog_bin（バイナリのカタログ）と match_report（カリキュラム照合の JSON レポート）は指定したときだけ書く
+Paths = namedtuple("Paths", "content_csv curriculum_csv course_csv output_ts cache_file manifest_file "
+                            "catalog_cache_dir search_index_ts catalog_bin match_report")
+DEFAULT_PATHS = Paths(CONTENT_CSV, CURRICULUM_CSV, COURSE_CSV, OUTPUT_TS, CACHE_FILE, MANIFEST_FILE, DEFAULT_CACHE_DIR,
+                      SEARCH_INDEX_TS, "", "")
+# 書き出すファイル（親ディレクトリがなければ作る）
+OUTPUT_FIELDS = ("output_ts", "cache_file", "manifest_file", "search_index_ts", "catalog_bin", "match_report")
+
+TS_HEADER = """// This file contains mock data imported from CSV files.
 // Generated via script with real durations.
 
 export interface QuizData {
@@ -124,9 +83,13 @@ export interface ContentItem {
     url?: string;
     thumbnail?: string;
     duration?: string;
+    // 再生時間（秒）。取得できずに duration が仮の値のときは null で、durationFallback が true
+    durationSec?: number | null;
+    durationFallback?: boolean;
     category: string;
     createdAt: string;
     quiz?: QuizData;
+    material_url?: string;
 }
 
 export interface CurriculumDef {
@@ -134,8 +97,17 @@ export interface CurriculumDef {
     title: string;
     description: string;
     thumbnail_url?: string;
+    image?: string; // カバー画像URL
     courseCount: number;
     lessons: ContentItem[];
+    // ビルド時の集計（totalDurationSec は再生時間が取れたレッスンだけの合計）
+    lessonCount?: number;
+    totalDurationSec?: number;
+    unresolvedDurationCount?: number;
+    viewCount?: number;
+    tags?: string[];
+    category?: string;
+    is_public?: boolean;
 }
 
 export interface CourseDef {
@@ -144,90 +116,719 @@ export interface CourseDef {
     description: string;
     category: string;
     lessonCount: number;
+    // New fields for popularity and admin flags
+    viewCount?: number;
+    tags?: string[];
 }
-""")
-
-# 1. Output ALL_CONTENT
-ts_output.append("export const ALL_CONTENT: ContentItem[] = [")
+"""
 
 def escape_js(s):
     return s.replace("'", "\\'").replace("\n", " ").replace("\r", "")
 
-for c in contents:
-    url = c.get('YOUTUBE_URL', '')
-    duration = get_video_duration(url)
-    title = escape_js(c["コンテンツ名"])
-    category = escape_js(c.get("コース", "未分類"))
-    
-    item_str = f"""    {{
-        id: '{c["ID"]}',
-        title: '{title}',
-        type: 'video',
-        url: '{url}',
-        category: '{category}',
-        duration: '{duration}',
-        createdAt: '{c.get("Created", "")}'
+def fingerprint(row_key, *extra):
+    """CSV 行（catalog_ingest の row_key）と付加情報からハッシュを作る"""
+    payload = "\x1f".join([row_key, *extra])
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+# ------------------------------------------------------------------
+# コンテンツ行のレコード化
+# ------------------------------------------------------------------
+# 各行は1回だけ解析・エスケープ・再生時間解決を行い、
+# カリキュラム側はレコードのインデックスで参照する。
+
+class LessonRecord:
+    __slots__ = ("id", "url", "video_id", "type", "title", "category", "course", "group", "created_at",
+                 "row_key", "duration", "resolved", "hash", "nested_ts")
+
+    def __init__(self, row_id, url, video_id, content_type, title, category, course, created_at, row_key):
+        self.id = row_id
+        self.url = url
+        self.video_id = video_id
+        self.type = content_type
+        self.title = title
+        self.category = category
+        self.course = course
+        # 属するカリキュラムのタイトル（match_curriculums で照合するまではコース名のまま）
+        self.group = course
+        self.created_at = created_at
+        # 行の生データ（ハッシュ計算用）
+        self.row_key = row_key
+        self.duration = FALLBACK_DURATION
+        # 再生時間を実際に取得できたか（False なら duration は FALLBACK_DURATION の仮の値）
+        self.resolved = False
+        # 行ハッシュには解決済みの再生時間も含める（キャッシュ更新で断片が変わるため）
+        self.hash = None
+        self.nested_ts = None
+
+def build_records(content):
+    """catalog_ingest のコンテンツ表を LessonRecord のリストにし、コース名 → インデックス一覧も返す"""
+    records = []
+    escaped = {}  # コース名は行をまたいで繰り返し出てくるのでエスケープ結果を使い回す
+    for row in content.rows():
+        category = escaped.get(row.category)
+        if category is None:
+            category = escaped[row.category] = escape_js(row.category)
+        records.append(LessonRecord(
+            row.id, row.url, row.video_id, row.type, escape_js(row.title),
+            category, row.course, row.created_at, row.row_key,
+        ))
+    return records, content.group_by("course")
+
+def match_curriculums(records, curriculums):
+    """レッスンのコース名をカリキュラムのタイトルに照合する（catalog_matching を参照）。
+
+    record.group を照合したタイトルにし、(タイトル → レコードのインデックス一覧, MatchResult) を返す。
+    """
+    matches = MatchResult(CurriculumMatcher(curr.title for curr in curriculums))
+    index_by_course = {}
+    for i, record in enumerate(records):
+        record.group = matches.add(record.course)
+        index_by_course.setdefault(record.group, []).append(i)
+    return index_by_course, matches
+
+def load_inputs(content_csv, curriculum_csv, course_csv, cache_dir=DEFAULT_CACHE_DIR):
+    """3つの CSV を読み、(records, index_by_course, curriculums, courses) を返す"""
+    catalog = load_catalog(content_csv, curriculum_csv, course_csv, cache_dir)
+    records, _ = build_records(catalog.content)
+    curriculums = list(catalog.curriculums.rows())
+    index_by_course, _ = match_curriculums(records, curriculums)
+    return records, index_by_course, curriculums, list(catalog.courses.rows())
+
+def resolve_durations(records, duration_store, release_row_keys=True):
+    """再生時間を割り当てて行ハッシュを計算する。
+
+    release_row_keys=False ならハッシュ計算用の row_key を残す（ElearningBuilder が再生時間の更新後に呼び直すため）。
+    """
+    for record in records:
+        if record.video_id is not None:
+            duration = duration_store.duration(record.video_id)
+            record.resolved = duration is not None
+            record.duration = duration or FALLBACK_DURATION
+        record.hash = hashlib.sha1(
+            f"{record.row_key}\x1f{record.duration}\x1f{record.resolved:d}".encode('utf-8')).hexdigest()
+        record.nested_ts = None
+        if release_row_keys:
+            record.row_key = None
+
+def build_duration_sources(args):
+    """問い合わせる順に取得元を並べる（手元のメタデータ → 視聴ページのスクレイピング）"""
+    sources = []
+    if args.metadata:
+        sources.append(MetadataIndexSource(args.metadata))
+    if not args.no_scrape:
+        sources.append(ScraperSource(
+            base_url=args.watch_base_url,
+            rate=args.rate,
+            burst=args.burst,
+            concurrency=args.concurrency,
+            timeout=args.timeout,
+            max_retries=args.retries,
+        ))
+    return sources
+
+def fetch_missing_durations(records, duration_store, sources):
+    """キャッシュにないか期限切れの再生時間を取得元に問い合わせ、問い合わせた動画の数を返す"""
+    if not sources:
+        # 取得元がなければ何も取れないので、件数の表示もキャッシュの書き直しもしない
+        return 0
+    # 取得は正規化した動画 ID ごとに1回（同じ動画を複数のレッスンや別の書き方の URL で参照していても）
+    stale = [record for record in records if record.video_id and duration_store.needs_fetch(record.video_id)]
+    pending = list(dict.fromkeys(record.video_id for record in stale))
+    print(f"Found {len(pending)} new or stale videos to fetch durations for.")
+    if len(stale) > len(pending):
+        urls = len({record.url for record in stale})
+        print(f"  {len(stale)} lessons via {urls} distinct URLs point to them; "
+              f"{len(stale) - len(pending)} duplicate requests avoided")
+    if not pending:
+        return 0
+    requested = len(pending)
+
+    def record_result(result):
+        # 1件ごとにジャーナルへ書き込むので、途中で止めても取得済みの分は残る
+        duration_store.record(result)
+        if result.status != "ok":
+            print(f"Error fetching {result.video_id}: {result.error}")
+
+    try:
+        for source in sources:
+            if not pending:
+                break
+            if source.incremental:
+                results = source.resolve(pending, on_result=record_result)
+            else:
+                # 一括で解決する取得元はまとめてジャーナルに書く（fsync は1回）
+                results = source.resolve(pending)
+                duration_store.record_many(results.values())
+            pending = [video_id for video_id in pending if video_id not in results]
+            print(f"  {source.name}: resolved {len(results)}, {len(pending)} left")
+    finally:
+        duration_store.compact()
+    failures = duration_store.failures()
+    if failures:
+        errors = sum(1 for entry in failures.values() if entry["status"] == "error")
+        print(f"{len(failures)} videos without duration "
+              f"({errors} errors will be retried next run, {len(failures) - errors} unavailable)")
+    return requested
+
+# ------------------------------------------------------------------
+# 差分ビルド（マニフェスト）
+# ------------------------------------------------------------------
+# 各行を ID + 内容ハッシュで識別し、前回と同じハッシュの行は前回の出力から断片をそのまま切り出して再利用する。
+# マニフェストには断片そのものではなく、行ごとの [ハッシュ, 出力の中の位置, 長さ]（位置と長さは文字数）と
+# 前回の出力の SHA-1 だけを持つ。出力が書き換えられていたら（SHA-1 が違えば）断片は作り直す。
+#
+#     {"version": 5, "output_sha1": "...", "tables": {"ALL_CONTENT": {"<ID>": ["<hash>", 1234, 310], ...}}}
+
+def load_manifest(path=MANIFEST_FILE, full=False):
+    if full or not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(manifest, dict) or manifest.get("version") != MANIFEST_VERSION:
+        return {}
+    return manifest
+
+def load_previous_output(path, sha1):
+    """前回の出力の中身。マニフェストを書いたときから変わっていれば（消えていれば）None"""
+    if not sha1:
+        return None
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+    if hashlib.sha1(data).hexdigest() != sha1:
+        return None
+    return data.decode('utf-8')
+
+def write_atomic(path, text):
+    # 途中で落ちても壊れたファイルが残らないよう、一時ファイル経由で置き換える
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+def file_sha1(path):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def write_if_changed(path, chunks):
+    """chunks を一時ファイルへ順に書き出し、内容が変わったときだけ置き換える。
+
+    変化がなければ一時ファイルを捨てるので、元ファイルの mtime はそのまま残る。
+    """
+    return write_chunks(path, chunks)[0]
+
+def write_chunks(path, chunks):
+    """write_if_changed と同じく書き出し、(置き換えたか, 書き出した内容の SHA-1) を返す"""
+    tmp_path = f"{path}.tmp"
+    digest = hashlib.sha1()
+    with open(tmp_path, 'wb') as f:
+        # 細かい断片を1MB程度ずつまとめてからエンコード・書き込みする
+        buffer, size = [], 0
+        for chunk in chunks:
+            buffer.append(chunk)
+            size += len(chunk)
+            if size >= 1 << 20:
+                data = "".join(buffer).encode('utf-8')
+                digest.update(data)
+                f.write(data)
+                buffer, size = [], 0
+        data = "".join(buffer).encode('utf-8')
+        digest.update(data)
+        f.write(data)
+    if os.path.exists(path) and file_sha1(path) == digest.hexdigest():
+        os.remove(tmp_path)
+        return False, digest.hexdigest()
+    os.replace(tmp_path, path)
+    return True, digest.hexdigest()
+
+class OutputCursor:
+    """出力の先頭から何文字目まで書いたか（断片の位置をマニフェストに残すため）"""
+
+    def __init__(self):
+        self.offset = 0
+
+    def track(self, chunks):
+        for chunk in chunks:
+            self.offset += len(chunk)
+            yield chunk
+
+class TableBuild:
+    """1テーブル分（ALL_CONTENT など）の行ハッシュと出力の中の位置、差分を管理する。
+
+    previous_text（前回の出力）と cursor（今回の出力の OutputCursor）があれば、前回と同じハッシュの行は
+    previous_text から切り出して再利用する。なければ全行を組み立てる（差分の報告はどちらでも同じ）。
+    """
+
+    def __init__(self, name, previous, previous_text=None, cursor=None):
+        self.name = name
+        self.previous = previous or {}
+        self.previous_text = previous_text
+        self.cursor = cursor
+        self.entries = {}
+        self.added = []
+        self.changed = []
+
+    def key_for(self, row_id):
+        # CSV に同じ ID が重複していてもエントリが潰れないようにする
+        key = row_id
+        n = 2
+        while key in self.entries:
+            key = f"{row_id}#{n}"
+            n += 1
+        return key
+
+    def emit(self, row_id, row_hash, render, prefix=""):
+        """prefix + 行の断片を返す（prefix は断片の前に置く区切り。位置には含めない）"""
+        key = row_id if row_id not in self.entries else self.key_for(row_id)
+        prev = self.previous.get(key)
+        if prev and prev[0] == row_hash:
+            if self.previous_text is not None:
+                fragment = self.previous_text[prev[1]:prev[1] + prev[2]]
+            else:
+                fragment = render()
+        else:
+            fragment = render()
+            (self.changed if prev else self.added).append(key)
+        offset = self.cursor.offset + len(prefix) if self.cursor is not None else None
+        self.entries[key] = [row_hash, offset, len(fragment)]
+        return prefix + fragment
+
+    @property
+    def removed(self):
+        return [key for key in self.previous if key not in self.entries]
+
+    def report(self, limit=REPORT_LIMIT):
+        print(f"{self.name}: {len(self.added)} added, {len(self.changed)} changed, {len(self.removed)} removed")
+        for label, keys in (("added", self.added), ("changed", self.changed), ("removed", self.removed)):
+            if keys:
+                more = f", ... {len(keys) - limit} more" if len(keys) > limit else ""
+                print(f"  {label}: {', '.join(keys[:limit])}{more}")
+
+# ------------------------------------------------------------------
+# TS 断片
+# ------------------------------------------------------------------
+
+def render_duration_sec(seconds, pad):
+    """durationSec の行（再生時間が取れなかったレッスンは null と durationFallback）"""
+    if seconds == UNRESOLVED:
+        return f"{pad}durationSec: null,\n{pad}durationFallback: true,\n"
+    return f"{pad}durationSec: {seconds},\n"
+
+def render_content(record, seconds):
+    return f"""    {{
+        id: '{record.id}',
+        title: '{record.title}',
+        type: '{record.type}',
+        url: '{record.url}',
+        category: '{record.category}',
+        duration: '{record.duration}',
+{render_duration_sec(seconds, "        ")}        createdAt: '{record.created_at}'
     }},"""
-    ts_output.append(item_str)
-
-ts_output.append("];\n")
-
-# 2. Output ALL_CURRICULUMS
-ts_output.append("export const ALL_CURRICULUMS: CurriculumDef[] = [")
-
-for curr in curriculums:
-    curr_title = curr['コース名']
-    children = content_by_course.get(curr_title, [])
-    
-    lessons_str = "[\n"
-    for child in children:
-        child_url = child.get('YOUTUBE_URL', '')
-        child_dur = get_video_duration(child_url)
-        child_title = escape_js(child["コンテンツ名"])
-        child_cat = escape_js(curr_title)
-        
-        lessons_str += f"""            {{
-                id: '{child["ID"]}',
-                title: '{child_title}',
-                type: 'video',
-                url: '{child_url}',
-                category: '{child_cat}',
-                duration: '{child_dur}',
-                createdAt: '{child.get("Created", "")}'
-            }},\n"""
-    lessons_str += "        ]"
-
-    title_esc = escape_js(curr_title)
-    desc_esc = escape_js(curr.get("コース概要", ""))
-    
-    ts_output.append(f"""    {{
-        id: '{curr["ID"]}',
+
+def render_nested_lesson(record, seconds, escaped_courses):
+    # 同じレコードが複数のカリキュラムに入っても組み立ては1回だけ
+    if record.nested_ts is None:
+        # category は照合したカリキュラムのタイトル（表記揺れのあるコース名のままにしない）
+        category = escaped_courses.get(record.group)
+        if category is None:
+            category = escaped_courses[record.group] = escape_js(record.group)
+        record.nested_ts = f"""            {{
+                id: '{record.id}',
+                title: '{record.title}',
+                type: '{record.type}',
+                url: '{record.url}',
+                category: '{category}',
+                duration: '{record.duration}',
+{render_duration_sec(seconds, "                ")}                createdAt: '{record.created_at}'
+            }},
+"""
+    return record.nested_ts
+
+def render_totals(totals):
+    return f"""        lessonCount: {totals.lessons},
+        totalDurationSec: {totals.seconds},
+        unresolvedDurationCount: {totals.unresolved},
+"""
+
+def render_curriculum(curr, records, children, seconds, totals, escaped_courses):
+    title_esc = escape_js(curr.title)
+    desc_esc = escape_js(curr.description)
+    lessons = "".join([render_nested_lesson(records[i], seconds[i], escaped_courses) for i in children])
+    return f"""    {{
+        id: '{curr.id}',
         title: '{title_esc}',
         description: '{desc_esc}',
         courseCount: {len(children)},
-        lessons: {lessons_str}
-    }},""")
-
-ts_output.append("];\n")
+{render_totals(totals)}        lessons: [
+{lessons}        ]
+    }},"""
 
-# 3. Output ALL_COURSES
-ts_output.append("export const ALL_COURSES: CourseDef[] = [")
+def render_curriculum_row(curr, records, children, totals):
+    # normalized レイアウト用: レッスンは ID の配列だけを持つ
+    title_esc = escape_js(curr.title)
+    desc_esc = escape_js(curr.description)
+    lesson_ids = ", ".join([f"'{records[i].id}'" for i in children])
+    return f"""    {{
+        id: '{curr.id}',
+        title: '{title_esc}',
+        description: '{desc_esc}',
+        courseCount: {len(children)},
+{render_totals(totals)}        lessonIds: [{lesson_ids}]
+    }},"""
 
-for course in courses:
-    title_esc = escape_js(course["プログラム名"])
-    desc_esc = escape_js(course.get("カリキュラム説明", ""))
-    
-    ts_output.append(f"""    {{
-        id: '{course["ID"]}',
+def render_course(course):
+    title_esc = escape_js(course.title)
+    desc_esc = escape_js(course.description)
+    return f"""    {{
+        id: '{course.id}',
         title: '{title_esc}',
         description: '{desc_esc}',
         category: 'General',
-        lessonCount: 5 
-    }},""")
+        lessonCount: 5
+    }},"""
+
+def generate_ts(records, index_by_course, curriculums, courses, tables, layout="nested"):
+    """出力ファイルの中身を先頭から順に yield する"""
+    content_table, curriculum_table, course_table = tables
+    yield TS_HEADER
+
+    # 再生時間の秒数とコースごとの集計は、全レッスンの列に対して一度に計算する
+    seconds = seconds_column([record.duration for record in records], [record.resolved for record in records])
+    totals_by_course = course_totals([record.group for record in records], seconds)
+
+    # 1. Output ALL_CONTENT
+    yield "\nexport const ALL_CONTENT: ContentItem[] = ["
+    for i, record in enumerate(records):
+        yield content_table.emit(record.id, record.hash, lambda: render_content(record, seconds[i]), "\n")
+    yield "\n];\n"
+
+    # 2. Output ALL_CURRICULUMS
+    if layout == "normalized":
+        yield NORMALIZED_ACCESSOR_TS
+        yield "\nexport const CURRICULUM_ROWS: CurriculumRow[] = ["
+        render = lambda: render_curriculum_row(curr, records, children, totals)
+    else:
+        yield "\nexport const ALL_CURRICULUMS: CurriculumDef[] = ["
+        escaped_courses = {}
+        render = lambda: render_curriculum(curr, records, children, seconds, totals, escaped_courses)
+    for curr in curriculums:
+        children = index_by_course.get(curr.title, ())
+        totals = totals_by_course.get(curr.title, EMPTY_TOTALS)
+        row_hash = fingerprint(curr.row_key, layout, *[records[i].hash for i in children])
+        yield curriculum_table.emit(curr.id, row_hash, render, "\n")
+    yield "\n];\n"
+    if layout == "normalized":
+        yield "\n" + NORMALIZED_CURRICULUMS_TS
+
+    # 3. Output ALL_COURSES
+    yield "\nexport const ALL_COURSES: CourseDef[] = ["
+    for course in courses:
+        yield course_table.emit(course.id, fingerprint(course.row_key), lambda: render_course(course), "\n")
+    yield "\n];\n"
+
+# ------------------------------------------------------------------
+# パスの設定
+# ------------------------------------------------------------------
+
+def make_paths(**overrides):
+    """DEFAULT_PATHS の一部を差し替えた Paths を返す（None の値は既定値のまま）。
+
+    manifest_file を指定しなければ cache_file と、search_index_ts を指定しなければ output_ts と
+    同じディレクトリに置く。
+    """
+    values = dict(DEFAULT_PATHS._asdict(), manifest_file=None, search_index_ts=None)
+    values.update({key: value for key, value in overrides.items() if value is not None})
+    if values["manifest_file"] is None:
+        values["manifest_file"] = os.path.join(os.path.dirname(values["cache_file"]), MANIFEST_NAME)
+    if values["search_index_ts"] is None:
+        values["search_index_ts"] = os.path.join(os.path.dirname(values["output_ts"]), SEARCH_INDEX_NAME)
+    return Paths(**values)
+
+def ensure_output_dirs(paths):
+    """書き出し先の親ディレクトリを作っておく（--cache-file out/cache.json などで out/ がなくてもよいように）"""
+    for field in OUTPUT_FIELDS:
+        directory = os.path.dirname(getattr(paths, field) or "")
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+def load_config(path):
+    """JSON の設定ファイル（キーは Paths のフィールド名）を読む。相対パスは設定ファイルの場所から解決する"""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if not isinstance(data, dict):
+        raise ValueError(f"{path}: expected a JSON object")
+    unknown = sorted(set(data) - set(Paths._fields))
+    if unknown:
+        raise ValueError(f"{path}: unknown keys {', '.join(unknown)} (expected {', '.join(Paths._fields)})")
+    base = os.path.dirname(os.path.abspath(path))
+    return {key: value and os.path.join(base, os.path.expanduser(value)) for key, value in data.items()}
+
+# ------------------------------------------------------------------
+# ライブラリ API（1回の生成・常駐しての再生成）
+# ------------------------------------------------------------------
+
+BuildResult = namedtuple("BuildResult", "written tables seconds")
+
+def stat_signature(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+class ElearningBuilder:
+    """CSV → TS の生成。解析結果・再生時間キャッシュ・前回の断片をメモリに保持して build() を繰り返せる"""
+
+    # 変更を検知してから、保存が終わって stat が落ち着くまで待つ間隔（秒）
+    SETTLE_SECONDS = 0.05
+
+    def __init__(self, paths=DEFAULT_PATHS, layout="nested", sources=(), ttl=90 * DAY, negative_ttl=14 * DAY):
+        self.paths = paths
+        self.layout = layout
+        self.sources = list(sources)
+        ensure_output_dirs(paths)
+        self.duration_store = DurationStore(paths.cache_file, ttl=ttl, negative_ttl=negative_ttl)
+        # スキーマ名 → (読み込んだときの stat, Table)
+        self.loaded = {}
+        self.records = None
+        self.index_by_course = None
+        self.curriculums = None
+        self.courses = None
+        self.resolved = False
+        # 検索インデックス・バイナリのカタログの元になった CSV（と再生時間）が変わったら作り直す
+        self.search_index_stale = True
+        self.catalog_bin_stale = True
+        # テーブル名 → 前回出力したエントリと、そのときの出力の SHA-1（初回だけマニフェストから読む）
+        self.previous_tables = None
+        self.previous_sha1 = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.duration_store.close()
+
+    @property
+    def input_paths(self):
+        return self.paths.content_csv, self.paths.curriculum_csv, self.paths.course_csv
+
+    def input_signature(self):
+        return tuple(stat_signature(path) for path in self.input_paths)
+
+    def _load_table(self, path, schema):
+        """前回から変わっていなければメモリ上の Table を返す。(Table, 読み直したか)"""
+        signature = stat_signature(path)
+        loaded = self.loaded.get(schema.name)
+        if loaded and signature is not None and loaded[0] == signature:
+            return loaded[1], False
+        table = load_table(path, schema, self.paths.catalog_cache_dir)
+        self.loaded[schema.name] = (signature, table)
+        return table, True
+
+    def build(self, full=False):
+        started = time.perf_counter()
+        content, content_changed = self._load_table(self.paths.content_csv, CONTENT_SCHEMA)
+        curriculums, curriculums_changed = self._load_table(self.paths.curriculum_csv, CURRICULUM_SCHEMA)
+        courses, courses_changed = self._load_table(self.paths.course_csv, COURSE_SCHEMA)
+        if content_changed or self.records is None:
+            self.records, _ = build_records(content)
+            self.resolved = False
+            self.search_index_stale = True
+            self.catalog_bin_stale = True
+        # curriculums: カリキュラム一覧.csv (Courses) / courses: コース一覧.csv (Tracks)
+        if curriculums_changed or self.curriculums is None:
+            self.curriculums = list(curriculums.rows())
+            self.search_index_stale = True
+            self.catalog_bin_stale = True
+        if courses_changed or self.courses is None:
+            self.courses = list(courses.rows())
+        if content_changed or curriculums_changed or self.index_by_course is None:
+            self.index_by_course, matches = match_curriculums(self.records, self.curriculums)
+            matches.report()
+            if self.paths.match_report:
+                matches.write_json(self.paths.match_report)
+
+        # 新しく取得した再生時間があれば行ハッシュを計算し直す
+        if fetch_missing_durations(self.records, self.duration_store, self.sources) or not self.resolved:
+            resolve_durations(self.records, self.duration_store, release_row_keys=False)
+            self.resolved = True
+            self.catalog_bin_stale = True
+
+        if full or self.previous_tables is None:
+            manifest = load_manifest(self.paths.manifest_file, full)
+            self.previous_tables = manifest.get("tables", {})
+            self.previous_sha1 = manifest.get("output_sha1")
+        output_ts = self.paths.output_ts
+        previous_text = load_previous_output(output_ts, self.previous_sha1)
+        cursor = OutputCursor()
+        tables = tuple(TableBuild(name, self.previous_tables.get(name), previous_text, cursor) for name in TABLE_NAMES)
+
+        # 変化がなければ書き込まない（mtime を保ち、Next.js のビルドキャッシュを無効化しない）
+        written, output_sha1 = write_chunks(output_ts, cursor.track(generate_ts(
+            self.records, self.index_by_course, self.curriculums, self.courses, tables, self.layout)))
+        del previous_text
+        for table in tables:
+            table.report()
+        if written:
+            print(f"Done generating {os.path.basename(output_ts)}")
+        else:
+            print(f"No changes; {output_ts} left untouched")
+
+        self.write_search_index(content)
+        self.write_catalog_bin(content)
+
+        self.previous_tables = {table.name: table.entries for table in tables}
+        # 出力が変わると後ろの行の位置もずれるので、ハッシュが同じでもマニフェストを書き直す
+        if full or written or output_sha1 != self.previous_sha1 or not os.path.exists(self.paths.manifest_file):
+            write_atomic(self.paths.manifest_file, json.dumps({
+                "version": MANIFEST_VERSION,
+                "output_sha1": output_sha1,
+                "tables": self.previous_tables,
+            }, ensure_ascii=False, separators=(",", ":")))
+        self.previous_sha1 = output_sha1
+        return BuildResult(written, tables, time.perf_counter() - started)
+
+    def write_search_index(self, content):
+        path = self.paths.search_index_ts
+        if not path or (not self.search_index_stale and os.path.exists(path)):
+            return
+        # タイトルは escape_js する前の値を使う（レコードと同じく ALL_CONTENT の順）
+        index = build_index(
+            zip(content["title"], (record.group for record in self.records)),
+            ((curr.title, curr.description) for curr in self.curriculums),
+        )
+        if write_if_changed(path, index.iter_ts()):
+            print(f"Done generating {os.path.basename(path)} ({len(index.grams)} grams)")
+        self.search_index_stale = False
+
+    def write_catalog_bin(self, content):
+        path = self.paths.catalog_bin
+        if not path or (not self.catalog_bin_stale and os.path.exists(path)):
+            return
+        tables = tables_from_elearning(content, self.records, self.index_by_course, self.curriculums)
+        if write_catalog(path, tables):
+            print(f"Done generating {os.path.basename(path)} ({os.path.getsize(path)} bytes)")
+        self.catalog_bin_stale = False
+
+    def watch(self, interval=0.5, full=False):
+        """入力 CSV を interval 秒ごとに stat し、変わったら再生成する（Ctrl-C で終了）"""
+        self.build(full)
+        signature = self.input_signature()
+        print(f"Watching {len(self.input_paths)} CSV files every {interval}s (Ctrl-C to stop)")
+        try:
+            while True:
+                time.sleep(interval)
+                current = self.input_signature()
+                if current == signature:
+                    continue
+                # エディタが書き込んでいる途中のファイルを読まないよう、stat が変わらなくなるまで待つ
+                while True:
+                    time.sleep(self.SETTLE_SECONDS)
+                    settled = self.input_signature()
+                    if settled == current:
+                        break
+                    current = settled
+                signature = current
+                if None in current:
+                    missing = [path for path, sig in zip(self.input_paths, current) if sig is None]
+                    print(f"Waiting for missing input: {', '.join(missing)}")
+                    continue
+                try:
+                    result = self.build()
+                except Exception as e:
+                    # 壊れた CSV を保存しても常駐は続け、次の変更で再試行する
+                    print(f"Build failed: {type(e).__name__}: {e}")
+                    continue
+                print(f"Rebuilt in {result.seconds * 1000:.0f} ms")
+        except KeyboardInterrupt:
+            print("Stopped watching")
+
+def generate(paths=DEFAULT_PATHS, full=False, **options):
+    """1回だけ生成する。options は ElearningBuilder の引数（layout, sources, ttl, negative_ttl）"""
+    with ElearningBuilder(paths, **options) as builder:
+        return builder.build(full)
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="CSV から mock_elearning_data.ts を生成する")
+    parser.add_argument("--full", action="store_true", help="マニフェストを無視して全エントリを再生成する")
+    parser.add_argument("--layout", choices=LAYOUTS, default="nested",
+                        help="nested: レッスンをカリキュラムに埋め込む / normalized: レッスン ID の配列で参照する")
+
+    paths = parser.add_argument_group("入出力のパス（--config より優先）")
+    paths.add_argument("--config", metavar="JSON", help="パスの設定ファイル（キーは下の各オプションと同じ名前）")
+    paths.add_argument("--content-csv", help="コンテンツ一覧.csv")
+    paths.add_argument("--curriculum-csv", help="カリキュラム一覧.csv")
+    paths.add_argument("--course-csv", help="コース一覧.csv")
+    paths.add_argument("--output-ts", help=f"出力する TS ファイル（既定: {OUTPUT_TS}）")
+    paths.add_argument("--cache-file", help=f"再生時間のキャッシュ（既定: {CACHE_FILE}）")
+    paths.add_argument("--manifest-file", help="差分ビルドのマニフェスト（既定: キャッシュと同じ場所）")
+    paths.add_argument("--catalog-cache-dir", help=f"CSV の解析結果のキャッシュ（既定: {DEFAULT_CACHE_DIR}）")
+    paths.add_argument("--no-catalog-cache", action="store_true", help="CSV の解析結果をキャッシュしない")
+    paths.add_argument("--search-index-ts", help="検索インデックスの TS ファイル（既定: 出力する TS と同じ場所）")
+    paths.add_argument("--no-search-index", action="store_true", help="検索インデックスを書き出さない")
+    paths.add_argument("--catalog-bin", help="ID で1件ずつ引けるバイナリのカタログの出力先（既定: 書き出さない）")
+    paths.add_argument("--match-report", help="レッスンとカリキュラムの照合結果（JSON）の出力先（既定: 書き出さない）")
+
+    watch = parser.add_argument_group("常駐モード")
+    watch.add_argument("--watch", action="store_true", help="CSV の変更を監視し、変わるたびに再生成する")
+    watch.add_argument("--interval", type=float, default=0.5, help="CSV の変更を確認する間隔（秒）")
+
+    parser.add_argument("--rate", type=float, default=2.0, help="再生時間取得のリクエスト数/秒")
+    parser.add_argument("--burst", type=int, default=5, help="レート制限のバースト上限")
+    parser.add_argument("--concurrency", type=int, default=5, help="同時接続数")
+    parser.add_argument("--timeout", type=float, default=15.0, help="1リクエストのタイムアウト（秒）")
+    parser.add_argument("--retries", type=int, default=4, help="429/5xx・通信エラー時のリトライ回数")
+    parser.add_argument("--ttl-days", type=float, default=90, help="取得済み再生時間を再検証するまでの日数")
+    parser.add_argument("--negative-ttl-days", type=float, default=14, help="削除・非公開動画を再確認するまでの日数")
+    parser.add_argument("--watch-base-url", default=DEFAULT_BASE_URL, help="視聴ページのベースURL（スタブサーバー用）")
+    parser.add_argument("--metadata", action="append", default=[], metavar="PATH",
+                        help="再生時間のメタデータ（CSV / JSON / JSONL、またはそれらを置いたディレクトリ）。"
+                             "視聴ページより先に参照する（複数指定可）")
+    parser.add_argument("--no-scrape", action="store_true", help="視聴ページを取得しない（メタデータだけで解決する）")
+    return parser
+
+def paths_from_args(args, parser):
+    overrides = {}
+    if args.config:
+        try:
+            overrides.update(load_config(args.config))
+        except (OSError, ValueError) as e:
+            parser.error(f"could not read config: {e}")
+    overrides.update({field: getattr(args, field) for field in Paths._fields if getattr(args, field) is not None})
+    if args.no_catalog_cache:
+        overrides["catalog_cache_dir"] = ""
+    if args.no_search_index:
+        overrides["search_index_ts"] = ""
+    return make_paths(**overrides)
 
-ts_output.append("];\n")
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    paths = paths_from_args(args, parser)
 
-with open(OUTPUT_TS, 'w', encoding='utf-8') as f:
-    f.write("\n".join(ts_output))
+    builder = ElearningBuilder(
+        paths,
+        layout=args.layout,
+        sources=build_duration_sources(args),
+        ttl=args.ttl_days * DAY,
+        negative_ttl=args.negative_ttl_days * DAY,
+    )
+    with builder:
+        if args.watch:
+            builder.watch(args.interval, args.full)
+        else:
+            builder.build(args.full)
 
-print("Done generating mock_elearning_data.ts")
+if __name__ == "__main__":
+    main()